@@ -22,11 +22,21 @@ case "$MODE" in
   dashboard)
     echo "📊 Starting Reflex Dashboard..."
     cd /workspace/src/app
+    python -m eda.snapshot || echo "⚠️ 报告快照构建失败，将在首次渲染时构建"
     reflex run --env prod
     ;;
 
+  inference)
+    echo "🤖 Starting local inference service..."
+    cd /workspace
+    exec python -m src.packages.inference.server --host 0.0.0.0 --port "${INFERENCE_PORT:-8765}"
+    ;;
+
   all)
     echo "🔥 Starting both Jupyter Lab and Reflex Dashboard..."
+    # Start shared inference service in background (models load on first request)
+    (cd /workspace && python -m src.packages.inference.server --lazy) &
+
     # Start Jupyter in background
     jupyter lab \
       --ip=0.0.0.0 \
@@ -43,6 +53,7 @@ case "$MODE" in
 
     # Start Reflex dashboard
     cd /workspace/src/app
+    python -m eda.snapshot || echo "⚠️ 报告快照构建失败，将在首次渲染时构建"
     reflex run --env prod
     ;;
 
@@ -53,7 +64,7 @@ case "$MODE" in
 
   *)
     echo "❌ Unknown mode: $MODE"
-    echo "Usage: $0 [jupyter|dashboard|all|bash]"
+    echo "Usage: $0 [jupyter|dashboard|inference|all|bash]"
     exit 1
     ;;
 esac
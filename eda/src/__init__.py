@@ -8,7 +8,7 @@ EDA Project Source Code
   - etl: ETL 数据加工模块
 """
 
-from .packages.etl import io, profiling, analysis  # noqa: F401
+from .packages.etl import io, profiling, analysis, instrumentation, events, pipeline, budget, streaming, sampling, profiles, topics, ids, text_features, temporal_network, cascades, communities, arrow_cache  # noqa: F401
 
-__all__ = ["io", "profiling", "analysis"]
+__all__ = ["io", "profiling", "analysis", "instrumentation", "events", "pipeline", "budget", "streaming", "sampling", "profiles", "topics", "ids", "text_features", "temporal_network", "cascades", "communities", "arrow_cache"]
 
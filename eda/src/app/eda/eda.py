@@ -15,4 +15,4 @@ def index() -> rx.Component:
 
 # 创建应用
 app = rx.App()
-app.add_page(index, route="/")
+app.add_page(index, route="/", on_load=report.ReportState.load)
@@ -0,0 +1,151 @@
+"""
+实时接入面板 - 追踪投放目录中新增的推文，增量推送小时级推文量
+
+设置环境变量 `LIVE_DROP_DIR` 后启用：
+- LIVE_DROP_DIR: 追加写入 CSV / JSONL 的目录
+- LIVE_EVENT: 事件名（见 config/events.json），默认 charlie-kirk
+- LIVE_POLL_SECONDS: 轮询间隔，默认 5 秒
+"""
+
+import asyncio
+import os
+import sys
+import threading
+from pathlib import Path
+
+import reflex as rx
+
+# src/app/eda/live.py -> eda/ 项目根目录（与 Notebook 中的 /workspace 一致）
+WORKSPACE_ROOT = Path(__file__).parent.parent.parent.parent
+
+LIVE_DROP_DIR = os.environ.get("LIVE_DROP_DIR")
+LIVE_EVENT = os.environ.get("LIVE_EVENT", "charlie-kirk")
+POLL_SECONDS = float(os.environ.get("LIVE_POLL_SECONDS", "5"))
+
+# 进程内共享一个接入管道，所有会话从中按版本号拉取增量
+_INGESTOR = None
+_INGESTOR_LOCK = threading.Lock()
+
+
+def get_ingestor():
+    """懒加载实时接入管道（首次调用时才导入 polars 与 etl）"""
+    global _INGESTOR
+    with _INGESTOR_LOCK:
+        if _INGESTOR is None:
+            if str(WORKSPACE_ROOT) not in sys.path:
+                sys.path.insert(0, str(WORKSPACE_ROOT))
+            from src.packages.etl import events, ids, io, streaming, text_features
+
+            event = events.get_event(LIVE_EVENT)
+            authors = None
+            if event.raw_authors is not None and event.raw_authors.exists():
+                authors = text_features.annotate_author_stance(io.read_well_known_authors(path=event.raw_authors))
+            _INGESTOR = streaming.LiveIngestor(
+                Path(LIVE_DROP_DIR),
+                event.event_timestamp,
+                authors=authors,
+                sink_dir=event.output_dir / "live",
+                checkpoint=event.output_dir / "live_checkpoint.json",
+                created_at_format=event.created_at_format,
+                ids=ids.IdDictionary(event.id_dir),  # 与批处理管道同一编码空间
+            )
+            _INGESTOR.start(POLL_SECONDS)
+        return _INGESTOR
+
+
+class LiveState(rx.State):
+    """实时面板状态：只在有新增小时数据时更新"""
+
+    hourly: list[dict] = []
+    total_tweets: int = 0
+    version: int = 0
+    streaming: bool = False
+
+    @rx.event(background=True)
+    async def follow(self):
+        async with self:
+            if self.streaming or not LIVE_DROP_DIR:
+                return
+            self.streaming = True
+            token = self.router.session.client_token
+
+        try:
+            ingestor = await asyncio.to_thread(get_ingestor)
+            hours: dict[str, dict] = {}
+            version = 0
+            while True:
+                # 页面卸载（stop）或客户端断开后结束，避免后台任务无限轮询
+                async with self:
+                    if not self.streaming or not _client_connected(token):
+                        break
+                version, delta = await asyncio.to_thread(ingestor.changes_since, version)
+                if delta.height:
+                    for row in delta.iter_rows(named=True):
+                        key = row["hour"].strftime("%m-%d %H:00")
+                        hours[key] = {"hour": key, "tweet_count": row["tweet_count"], "total_engagement": row["total_engagement"]}
+                    async with self:
+                        self.hourly = [hours[k] for k in sorted(hours)]
+                        self.total_tweets = ingestor.total_rows
+                        self.version = version
+                await asyncio.sleep(POLL_SECONDS)
+        except Exception as exc:
+            print(f"⚠️ 实时面板停止: {type(exc).__name__}: {exc}")
+        finally:
+            async with self:
+                self.streaming = False
+
+    @rx.event
+    def stop(self):
+        self.streaming = False
+
+
+def _client_connected(token: str) -> bool:
+    """客户端断开时 Reflex 会从 token → sid 映射中移除该会话"""
+    from reflex.utils.prerequisites import get_app
+
+    namespace = getattr(get_app().app, "event_namespace", None)
+    if namespace is None:
+        return True
+    return token in namespace.token_to_sid
+
+
+def live_section() -> rx.Component:
+    """实时推文量面板"""
+    return rx.box(
+        rx.cond(
+            LiveState.streaming,
+            rx.box(
+                rx.vstack(
+                    rx.hstack(
+                        rx.text("实时推文流", font_size="1em", font_weight="600", color="#333"),
+                        rx.badge("LIVE", color_scheme="red", size="1"),
+                        rx.spacer(),
+                        rx.text(f"累计 {LiveState.total_tweets} 条", font_size="0.9em", color="#666"),
+                        width="100%",
+                    ),
+                    rx.recharts.bar_chart(
+                        rx.recharts.bar(data_key="tweet_count", fill="#4E79A7"),
+                        rx.recharts.x_axis(data_key="hour"),
+                        rx.recharts.y_axis(),
+                        rx.recharts.graphing_tooltip(),
+                        data=LiveState.hourly,
+                        width="100%",
+                        height=280,
+                    ),
+                    spacing="2",
+                    align_items="flex_start",
+                    width="100%",
+                ),
+                padding="1.2em",
+                background="white",
+                border_radius="6px",
+                box_shadow="0 1px 3px rgba(0,0,0,0.1)",
+                width="100%",
+                margin_bottom="1.5em",
+            ),
+            rx.box(),
+        ),
+        on_mount=LiveState.follow,
+        on_unmount=LiveState.stop,
+        width="100%",
+    )
@@ -1,13 +1,22 @@
 """
 Charlie Kirk 暗杀事件社交媒体舆论分析报告
 Tableau Public 专业风格数据报告
+
+页面从报告快照（见 snapshot.py）渲染；polars / plotly 只在构建快照时导入。
 """
 
-import reflex as rx
-import polars as pl
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from __future__ import annotations
+
+import sys
 from pathlib import Path
+from typing import TYPE_CHECKING
+
+import reflex as rx
+
+if TYPE_CHECKING:
+    import polars as pl
+
+from ..live import LIVE_DROP_DIR, WORKSPACE_ROOT, live_section
 
 # 数据目录
 PARQUET_DIR = Path(__file__).parent.parent.parent.parent.parent / "src" / "notebooks" / "parquet"
@@ -38,11 +47,36 @@ COLORS = {
 }
 
 
+def _ensure_workspace_on_path() -> None:
+    """etl 包位于仓库根目录下的 src.packages，按需加入 sys.path"""
+    if str(WORKSPACE_ROOT) not in sys.path:
+        sys.path.insert(0, str(WORKSPACE_ROOT))
+
+
+def decode_author_ids(df: pl.DataFrame, columns: dict[str, str] | None = None) -> pl.DataFrame:
+    """展示前将 Int32 编码的作者 ID 还原为原始 ID（编码见 etl.ids）；`columns` 为 列名 → 命名空间"""
+    import polars as pl
+
+    columns = columns or {'pseudo_author_userName': 'user'}
+    if df is None or not any(df.schema.get(col) == pl.Int32 for col in columns):
+        return df
+    _ensure_workspace_on_path()
+    from src.packages.etl.ids import ID_DIR, IdDictionary
+
+    # 与 pipeline / Notebook 写入的是同一个全局字典（EventDataset.id_dir 默认即 ID_DIR）
+    return IdDictionary(ID_DIR).decode(df, columns)
+
+
 def load_all_data() -> dict:
-    """加载所有分析数据"""
+    """加载所有分析数据（两张大表经 etl.arrow_cache 内存映射，零拷贝）"""
+    import polars as pl
+
+    _ensure_workspace_on_path()
+    from src.packages.etl import arrow_cache
+
     try:
-        tweets_df = pl.read_parquet(str(PARQUET_DIR / "tweets_enriched.parquet"))
-        content_df = pl.read_parquet(str(PARQUET_DIR / "content_analysis.parquet"))
+        tweets_df = arrow_cache.frame(PARQUET_DIR / "tweets_enriched.parquet")
+        content_df = arrow_cache.frame(PARQUET_DIR / "content_analysis.parquet")
         emotion_evo = pl.read_parquet(str(PARQUET_DIR / "emotion_evolution.parquet"))
         narrative_evo = pl.read_parquet(str(PARQUET_DIR / "narrative_evolution.parquet"))
         hourly_df = pl.read_parquet(str(PARQUET_DIR / "tweets_hourly.parquet"))
@@ -50,11 +84,20 @@ def load_all_data() -> dict:
         # 【优化新增】加载作者画像数据（如果存在）
         try:
             author_prof = pl.read_parquet(str(PARQUET_DIR / "author_profiling.parquet"))
-            top_50 = pl.read_parquet(str(PARQUET_DIR / "top_50_influencers.parquet"))
+            top_50 = decode_author_ids(pl.read_parquet(str(PARQUET_DIR / "top_50_influencers.parquet")))
         except:
             author_prof = None
             top_50 = None
 
+        # 滑动窗口网络中心性（temporal_network 阶段产出，可选）：只读各窗口 PageRank 前 5 名
+        centrality_path = PARQUET_DIR / "network_centrality_hourly.parquet"
+        hourly_centrality = None
+        if centrality_path.exists():
+            hourly_centrality = decode_author_ids(
+                pl.scan_parquet(str(centrality_path)).filter(pl.col('pagerank_rank') <= 5).collect(),
+                {'node': 'user'},
+            )
+
         return {
             "tweets_df": tweets_df,
             "content_df": content_df,
@@ -63,6 +106,7 @@ def load_all_data() -> dict:
             "hourly_df": hourly_df,
             "author_prof": author_prof,
             "top_50": top_50,
+            "hourly_centrality": hourly_centrality,
             "total_tweets": tweets_df.height,
             "total_sampled": content_df.height,
             "date_range": f"{str(tweets_df['createdAt'].min())[:10]} ~ {str(tweets_df['createdAt'].max())[:10]}",
@@ -71,7 +115,7 @@ def load_all_data() -> dict:
         return {"error": str(e)}
 
 
-def kpi_card(icon: str, label: str, value: str, color: str) -> rx.Component:
+def kpi_card(icon: str, label: str, value: str | rx.Var, color: str) -> rx.Component:
     """KPI指标卡片"""
     return rx.box(
         rx.vstack(
@@ -92,7 +136,7 @@ def kpi_card(icon: str, label: str, value: str, color: str) -> rx.Component:
     )
 
 
-def chart_box(title: str, chart_html: str, height: str = "auto") -> rx.Component:
+def chart_box(title: str, chart_html: str | rx.Var, height: str = "auto") -> rx.Component:
     """图表容器"""
     return rx.box(
         rx.vstack(
@@ -113,17 +157,19 @@ def chart_box(title: str, chart_html: str, height: str = "auto") -> rx.Component
 
 def create_emotion_line(emotion_evo: pl.DataFrame) -> str:
     """情感演变折线图"""
-    df = emotion_evo.to_pandas()
+    import plotly.graph_objects as go
+
     fig = go.Figure()
+    x = emotion_evo['time_window'].to_numpy()
 
     emotions = ['sadness', 'anger', 'fear', 'surprise', 'joy', 'love']
     colors = [COLORS['red'], COLORS['orange'], COLORS['yellow'], COLORS['purple'], COLORS['green'], COLORS['pink']]
 
     for idx, emotion in enumerate(emotions):
         col = f'avg_{emotion}'
-        if col in df.columns:
+        if col in emotion_evo.columns:
             fig.add_trace(go.Scatter(
-                x=df['time_window'], y=df[col],
+                x=x, y=emotion_evo[col].to_numpy(),
                 name=EMOTION_CN[emotion],
                 line=dict(color=colors[idx], width=2.5),
                 mode='lines+markers',
@@ -145,9 +191,16 @@ def create_emotion_line(emotion_evo: pl.DataFrame) -> str:
 
 def create_narrative_pie(content_df: pl.DataFrame) -> str:
     """叙事饼图"""
-    counts = content_df.group_by('primary_narrative').agg(pl.len().alias('count')).sort('count', descending=True).to_pandas()
-    labels = [NARRATIVE_CN.get(n, n) for n in counts['primary_narrative'] if n in NARRATIVE_CN]
-    values = [counts[counts['primary_narrative'] == n]['count'].values[0] for n in counts['primary_narrative'] if n in NARRATIVE_CN]
+    import polars as pl
+    import plotly.graph_objects as go
+
+    counts = (
+        content_df.group_by('primary_narrative').agg(pl.len().alias('count'))
+        .filter(pl.col('primary_narrative').is_in(list(NARRATIVE_CN)))
+        .sort('count', descending=True)
+    )
+    labels = [NARRATIVE_CN[n] for n in counts['primary_narrative']]
+    values = counts['count'].to_numpy()
 
     fig = go.Figure(data=[go.Pie(
         labels=labels, values=values, hole=0.5,
@@ -166,13 +219,16 @@ def create_narrative_pie(content_df: pl.DataFrame) -> str:
 
 def create_stance_bar(content_df: pl.DataFrame) -> str:
     """立场柱状图"""
-    counts = content_df.group_by('political_stance').agg(pl.len().alias('count')).to_pandas()
+    import polars as pl
+    import plotly.graph_objects as go
+
+    counts = content_df.group_by('political_stance').agg(pl.len().alias('count'))
     labels = [STANCE_CN.get(s, s) for s in counts['political_stance']]
 
     fig = go.Figure(data=[go.Bar(
-        x=labels, y=counts['count'],
+        x=labels, y=counts['count'].to_numpy(),
         marker_color=[COLORS['red'], COLORS['gray'], COLORS['blue']],
-        text=counts['count'].apply(lambda x: f'{x:,}'),
+        text=[f'{x:,}' for x in counts['count']],
         textposition='outside',
     )])
 
@@ -189,10 +245,10 @@ def create_stance_bar(content_df: pl.DataFrame) -> str:
 
 def create_hourly_bar(hourly_df: pl.DataFrame) -> str:
     """小时级推文量"""
-    df = hourly_df.to_pandas()
+    import plotly.graph_objects as go
 
     fig = go.Figure(data=[go.Bar(
-        x=df['hour'], y=df['tweet_count'],
+        x=hourly_df['hour'].to_numpy(), y=hourly_df['tweet_count'].to_numpy(),
         marker_color=COLORS['blue'], marker_opacity=0.8,
     )])
 
@@ -209,19 +265,20 @@ def create_hourly_bar(hourly_df: pl.DataFrame) -> str:
 
 def create_emotion_heatmap(emotion_evo: pl.DataFrame) -> str:
     """情感热力图"""
-    df = emotion_evo.to_pandas()
+    import plotly.graph_objects as go
+
     emotions = ['sadness', 'anger', 'fear', 'surprise', 'joy', 'love']
     emotion_labels = [EMOTION_CN[e] for e in emotions]
 
     z_data = []
     for emotion in emotions:
         col = f'avg_{emotion}'
-        if col in df.columns:
-            z_data.append(df[col].values)
+        if col in emotion_evo.columns:
+            z_data.append(emotion_evo[col].to_numpy())
 
     fig = go.Figure(data=go.Heatmap(
         z=z_data,
-        x=df['time_window'].values,
+        x=emotion_evo['time_window'].to_numpy(),
         y=emotion_labels,
         colorscale='RdYlBu_r',
         showscale=True,
@@ -238,18 +295,20 @@ def create_emotion_heatmap(emotion_evo: pl.DataFrame) -> str:
 
 def create_narrative_area(narrative_evo: pl.DataFrame) -> str:
     """叙事堆叠面积图"""
-    df = narrative_evo.to_pandas()
+    import polars as pl
+    import plotly.graph_objects as go
+
     narratives = ['political_violence', 'consequences', 'polarization', 'free_speech', 'conspiracy', 'memorial']
     colors = [COLORS['blue'], COLORS['orange'], COLORS['green'], COLORS['red'], COLORS['yellow'], COLORS['purple']]
 
     fig = go.Figure()
 
     for idx, narrative in enumerate(narratives):
-        narrative_data = df[df['primary_narrative'] == narrative]
-        if not narrative_data.empty:
+        narrative_data = narrative_evo.filter(pl.col('primary_narrative') == narrative)
+        if narrative_data.height > 0:
             fig.add_trace(go.Scatter(
-                x=narrative_data['time_window'],
-                y=narrative_data['count'],
+                x=narrative_data['time_window'].to_numpy(),
+                y=narrative_data['count'].to_numpy(),
                 name=NARRATIVE_CN[narrative],
                 fill='tonexty',
                 line=dict(color=colors[idx], width=0),
@@ -270,18 +329,20 @@ def create_narrative_area(narrative_evo: pl.DataFrame) -> str:
 
 def create_dual_axis(hourly_df: pl.DataFrame) -> str:
     """推文量与情感双轴"""
-    df = hourly_df.to_pandas()
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
 
     fig = make_subplots(specs=[[{"secondary_y": True}]])
+    hours = hourly_df['hour'].to_numpy()
 
     fig.add_trace(
-        go.Bar(x=df['hour'], y=df['tweet_count'], name='推文量', marker_color=COLORS['blue'], opacity=0.5),
+        go.Bar(x=hours, y=hourly_df['tweet_count'].to_numpy(), name='推文量', marker_color=COLORS['blue'], opacity=0.5),
         secondary_y=False
     )
 
-    if 'avg_sadness' in df.columns:
+    if 'avg_sadness' in hourly_df.columns:
         fig.add_trace(
-            go.Scatter(x=df['hour'], y=df['avg_sadness'], name='悲伤', line=dict(color=COLORS['red'], width=2.5), mode='lines+markers'),
+            go.Scatter(x=hours, y=hourly_df['avg_sadness'].to_numpy(), name='悲伤', line=dict(color=COLORS['red'], width=2.5), mode='lines+markers'),
             secondary_y=True
         )
 
@@ -301,6 +362,9 @@ def create_dual_axis(hourly_df: pl.DataFrame) -> str:
 
 def create_stance_radar(content_df: pl.DataFrame) -> str:
     """立场情感雷达图"""
+    import polars as pl
+    import plotly.graph_objects as go
+
     stance_emotion = content_df.group_by('political_stance').agg([
         pl.col('emotion_sadness').mean().alias('sadness'),
         pl.col('emotion_anger').mean().alias('anger'),
@@ -308,14 +372,14 @@ def create_stance_radar(content_df: pl.DataFrame) -> str:
         pl.col('emotion_surprise').mean().alias('surprise'),
         pl.col('emotion_joy').mean().alias('joy'),
         pl.col('emotion_love').mean().alias('love'),
-    ]).to_pandas()
+    ])
 
     fig = go.Figure()
 
     emotions = ['sadness', 'anger', 'fear', 'surprise', 'joy', 'love']
     emotion_labels = [EMOTION_CN[e] for e in emotions]
 
-    for _, row in stance_emotion.iterrows():
+    for row in stance_emotion.iter_rows(named=True):
         stance = row['political_stance']
         if stance in ['conservative', 'liberal']:
             values = [row[e] for e in emotions] + [row[emotions[0]]]
@@ -341,7 +405,11 @@ def create_stance_radar(content_df: pl.DataFrame) -> str:
 
 def create_narrative_bar_comparison(content_df: pl.DataFrame) -> str:
     """叙事立场对比图"""
-    matrix = content_df.group_by(['political_stance', 'primary_narrative']).agg(pl.len().alias('count')).to_pandas()
+    import polars as pl
+    import plotly.graph_objects as go
+
+    matrix = content_df.group_by(['political_stance', 'primary_narrative']).agg(pl.len().alias('count'))
+    lookup = {(stance, narrative): count for stance, narrative, count in matrix.iter_rows()}
 
     fig = go.Figure()
 
@@ -349,10 +417,7 @@ def create_narrative_bar_comparison(content_df: pl.DataFrame) -> str:
     narratives = ['political_violence', 'memorial', 'consequences']
 
     for stance in stances:
-        counts = []
-        for narrative in narratives:
-            val = matrix[(matrix['political_stance'] == stance) & (matrix['primary_narrative'] == narrative)]
-            counts.append(val['count'].values[0] if not val.empty else 0)
+        counts = [lookup.get((stance, narrative), 0) for narrative in narratives]
 
         fig.add_trace(go.Bar(
             name=STANCE_CN[stance],
@@ -376,21 +441,23 @@ def create_narrative_bar_comparison(content_df: pl.DataFrame) -> str:
 
 def create_engagement_scatter(content_df: pl.DataFrame) -> str:
     """互动量散点图"""
-    df = content_df.to_pandas().head(500)
+    import plotly.graph_objects as go
+
+    df = content_df.head(500)
 
     fig = go.Figure(data=go.Scatter(
-        x=df['likeCount'],
-        y=df['retweetCount'],
+        x=df['likeCount'].to_numpy(),
+        y=df['retweetCount'].to_numpy(),
         mode='markers',
         marker=dict(
             size=8,
-            color=df['emotion_sadness'],
+            color=df['emotion_sadness'].to_numpy(),
             colorscale='RdYlBu_r',
             showscale=True,
             colorbar=dict(title="悲伤强度"),
             opacity=0.6
         ),
-        text=df['primary_narrative'].apply(lambda x: NARRATIVE_CN.get(x, x)),
+        text=[NARRATIVE_CN.get(x, x) for x in df['primary_narrative']],
         hovertemplate='<b>%{text}</b><br>点赞: %{x}<br>转发: %{y}<extra></extra>'
     ))
 
@@ -407,6 +474,9 @@ def create_engagement_scatter(content_df: pl.DataFrame) -> str:
 
 def create_stance_improvement_bar(content_df: pl.DataFrame) -> str:
     """【优化新增】立场分类改进对比图"""
+    import polars as pl
+    import plotly.graph_objects as go
+
     # 如果有author_stance_prelabel，计算改进效果
     if 'author_stance_prelabel' not in content_df.columns:
         return ""
@@ -415,14 +485,14 @@ def create_stance_improvement_bar(content_df: pl.DataFrame) -> str:
     with_bio = content_df.filter(pl.col('author_stance_prelabel') != 'neutral')
 
     # 对比bio预标注 vs 最终立场
-    bio_dist = with_bio.group_by('author_stance_prelabel').agg(pl.len().alias('count')).to_pandas()
-    final_dist = with_bio.group_by('political_stance').agg(pl.len().alias('count')).to_pandas()
+    bio_dist = dict(with_bio.group_by('author_stance_prelabel').agg(pl.len().alias('count')).iter_rows())
+    final_dist = dict(with_bio.group_by('political_stance').agg(pl.len().alias('count')).iter_rows())
 
     fig = go.Figure()
 
     stances = ['conservative', 'liberal', 'neutral']
-    for idx, (df, name) in enumerate([(bio_dist, 'Bio预标注'), (final_dist, '混合分类')]):
-        counts = [df[df.iloc[:, 0] == s]['count'].values[0] if len(df[df.iloc[:, 0] == s]) > 0 else 0 for s in stances]
+    for idx, (dist, name) in enumerate([(bio_dist, 'Bio预标注'), (final_dist, '混合分类')]):
+        counts = [dist.get(s, 0) for s in stances]
         fig.add_trace(go.Bar(
             name=name,
             x=[STANCE_CN[s] for s in stances],
@@ -447,10 +517,15 @@ def create_stance_improvement_bar(content_df: pl.DataFrame) -> str:
 
 def create_author_influence_stance(author_prof: pl.DataFrame) -> str:
     """【优化新增】影响力分层立场分布"""
+    import plotly.graph_objects as go
+
     if author_prof is None:
         return ""
 
-    df = author_prof.to_pandas()
+    tier_stance = {
+        (tier, stance): count
+        for tier, stance, count in author_prof.group_by('influence_tier', 'bio_stance').len().iter_rows()
+    }
 
     # 【修复】使用实际数据中的分层值
     tiers = ['Mega (1M+)', 'High (100K-1M)', 'Medium (10K-100K)']
@@ -459,10 +534,7 @@ def create_author_influence_stance(author_prof: pl.DataFrame) -> str:
     fig = go.Figure()
 
     for stance in stances:
-        counts = []
-        for tier in tiers:
-            val = df[(df['influence_tier'] == tier) & (df['bio_stance'] == stance)]
-            counts.append(len(val) if not val.empty else 0)
+        counts = [tier_stance.get((tier, stance), 0) for tier in tiers]
 
         fig.add_trace(go.Bar(
             name=STANCE_CN[stance],
@@ -486,19 +558,21 @@ def create_author_influence_stance(author_prof: pl.DataFrame) -> str:
 
 def create_top_influencers_table(top_50: pl.DataFrame) -> str:
     """【优化新增】Top 10影响力作者表格 - 使用 Plotly Table"""
+    import plotly.graph_objects as go
+
     if top_50 is None:
         return ""
 
-    df = top_50.head(10).to_pandas()
+    rows = top_50.head(10).to_dicts()
 
     # 准备表格数据
-    ranks = [f"#{i+1}" for i in range(len(df))]
-    author_ids = [f"用户{str(row['pseudo_author_userName'])[:12]}" for _, row in df.iterrows()]
-    followers = [f"{row['followers']:,}" for _, row in df.iterrows()]
-    tweet_counts = [str(row['tweet_count']) for _, row in df.iterrows()]
-    bio_stances = [STANCE_CN.get(row.get('bio_stance', 'neutral'), '中立') for _, row in df.iterrows()]
-    tweet_stances = [STANCE_CN.get(row.get('tweet_stance_mode', 'neutral'), '中立') for _, row in df.iterrows()]
-    consistencies = [row.get('stance_consistency', '-') for _, row in df.iterrows()]
+    ranks = [f"#{i+1}" for i in range(len(rows))]
+    author_ids = [f"用户{str(row['pseudo_author_userName'])[:12]}" for row in rows]
+    followers = [f"{row['followers']:,}" for row in rows]
+    tweet_counts = [str(row['tweet_count']) for row in rows]
+    bio_stances = [STANCE_CN.get(row.get('bio_stance', 'neutral'), '中立') for row in rows]
+    tweet_stances = [STANCE_CN.get(row.get('tweet_stance_mode', 'neutral'), '中立') for row in rows]
+    consistencies = [row.get('stance_consistency', '-') for row in rows]
 
     # 创建 Plotly 表格
     fig = go.Figure(data=[go.Table(
@@ -527,8 +601,50 @@ def create_top_influencers_table(top_50: pl.DataFrame) -> str:
     return fig.to_html(include_plotlyjs='cdn', div_id="top_influencers_table")
 
 
+def create_centrality_leaders(hourly_centrality: pl.DataFrame) -> str:
+    """滑动窗口 PageRank：进入各窗口前 5 名次数最多的 5 个账号"""
+    import plotly.graph_objects as go
+    import polars as pl
+
+    if hourly_centrality is None or hourly_centrality.is_empty():
+        return ""
+
+    leaders = (
+        hourly_centrality.group_by('node').agg(pl.len().alias('windows'), pl.col('pagerank').max())
+        .sort(['windows', 'pagerank'], descending=True)
+        .head(5)['node'].to_list()
+    )
+    colors = [COLORS['blue'], COLORS['orange'], COLORS['red'], COLORS['teal'], COLORS['green']]
+
+    fig = go.Figure()
+    for idx, node in enumerate(leaders):
+        series = hourly_centrality.filter(pl.col('node') == node).sort('window_end')
+        fig.add_trace(go.Scatter(
+            x=series['window_end'].to_list(),
+            y=series['pagerank'].to_list(),
+            name=f"用户{str(node)[:12]}",
+            line=dict(color=colors[idx], width=2),
+            mode='lines+markers',
+            marker=dict(size=5),
+        ))
+
+    fig.update_layout(
+        template='plotly_white',
+        height=280,
+        font=dict(family='Arial', size=11),
+        xaxis=dict(title='窗口结束时间', showgrid=True, gridcolor='#E5E5E5'),
+        yaxis=dict(title='PageRank', showgrid=True, gridcolor='#E5E5E5'),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="left", x=0),
+        margin=dict(t=30, b=30, l=50, r=10),
+        hovermode='x unified',
+    )
+    return fig.to_html(include_plotlyjs='cdn', div_id="centrality_leaders")
+
+
 def get_rep_tweets(content_df: pl.DataFrame) -> list[dict]:
     """获取代表性推文"""
+    import polars as pl
+
     tweets = []
     narratives = ['political_violence', 'memorial', 'consequences']
 
@@ -544,7 +660,7 @@ def get_rep_tweets(content_df: pl.DataFrame) -> list[dict]:
     return tweets
 
 
-def tweet_card(tweet: dict) -> rx.Component:
+def tweet_card(tweet: dict | rx.Var) -> rx.Component:
     """推文卡片"""
     return rx.box(
         rx.vstack(
@@ -553,7 +669,7 @@ def tweet_card(tweet: dict) -> rx.Component:
                 rx.badge(tweet['stance'], color_scheme="gray", size="1", variant="outline"),
                 spacing="2",
             ),
-            rx.text(f'"{tweet["text"]}"', font_size="0.9em", color="#555", line_height="1.5", font_style="italic"),
+            rx.text('"', tweet["text"], '"', font_size="0.9em", color="#555", line_height="1.5", font_style="italic"),
             spacing="2",
             align_items="flex_start",
         ),
@@ -566,35 +682,103 @@ def tweet_card(tweet: dict) -> rx.Component:
     )
 
 
-def report_page() -> rx.Component:
-    """报告页面"""
-    data = load_all_data()
-
+def build_report_payload(data: dict) -> dict:
+    """生成全部图表 HTML、KPI 与代表性推文（报告快照的内容，可 JSON 序列化）"""
     if "error" in data:
-        return rx.center(
-            rx.text(f"数据加载错误: {data['error']}", color="red.500", font_size="1.1em"),
+        return {"error": data["error"]}
+
+    charts = {
+        "emotion_line": create_emotion_line(data["emotion_evo"]),
+        "narrative_pie": create_narrative_pie(data["content_df"]),
+        "stance_bar": create_stance_bar(data["content_df"]),
+        "hourly_bar": create_hourly_bar(data["hourly_df"]),
+        "emotion_heat": create_emotion_heatmap(data["emotion_evo"]),
+        "narrative_area": create_narrative_area(data["narrative_evo"]),
+        "dual_axis": create_dual_axis(data["hourly_df"]),
+        "stance_radar": create_stance_radar(data["content_df"]),
+        "narrative_comparison": create_narrative_bar_comparison(data["content_df"]),
+        "engagement_scatter": create_engagement_scatter(data["content_df"]),
+        # 【优化新增】作者画像相关图表
+        "stance_improvement": create_stance_improvement_bar(data["content_df"]),
+        "influence_stance": create_author_influence_stance(data["author_prof"]),
+        "top_influencers_table": create_top_influencers_table(data["top_50"]),
+        "centrality_leaders": create_centrality_leaders(data["hourly_centrality"]),
+    }
+    return {
+        "charts": charts,
+        "rep_tweets": get_rep_tweets(data["content_df"]),
+        "has_author_prof": data["author_prof"] is not None,
+        "total_tweets": data["total_tweets"],
+        "total_sampled": data["total_sampled"],
+        "date_range": data["date_range"],
+    }
+
+
+class ReportState(rx.State):
+    """报告数据：每次打开页面时读取快照，后台重建完成后刷新即可看到新数据"""
+
+    loaded: bool = False
+    error: str = ""
+    charts: dict[str, str] = {}
+    rep_tweets: list[dict[str, str]] = []
+    has_author_prof: bool = False
+    total_tweets: str = ""
+    total_sampled: str = ""
+    date_range: str = ""
+
+    @rx.event
+    async def load(self):
+        import asyncio
+
+        from ..snapshot import get_report_payload
+
+        data = await asyncio.to_thread(get_report_payload)
+        self.loaded = True
+        self.error = data.get("error", "")
+        if self.error:
+            return
+        self.charts = data["charts"]
+        self.rep_tweets = data["rep_tweets"]
+        self.has_author_prof = data["has_author_prof"]
+        self.total_tweets = f"{data['total_tweets']:,}"
+        self.total_sampled = f"{data['total_sampled']:,}"
+        self.date_range = data["date_range"]
+
+
+def report_page() -> rx.Component:
+    """报告页面（数据由 ReportState.load 在页面加载时填充）"""
+    return rx.cond(
+        ReportState.error != "",
+        rx.center(
+            rx.text("数据加载错误: ", ReportState.error, color="red.500", font_size="1.1em"),
             min_height="100vh",
             background="#F3F4F6",
-        )
+        ),
+        rx.cond(
+            ReportState.loaded,
+            report_body(),
+            rx.center(rx.spinner(size="3"), min_height="100vh", background="#F9F9F9"),
+        ),
+    )
+
 
-    # 生成图表
-    emotion_line = create_emotion_line(data["emotion_evo"])
-    narrative_pie = create_narrative_pie(data["content_df"])
-    stance_bar = create_stance_bar(data["content_df"])
-    hourly_bar = create_hourly_bar(data["hourly_df"])
-    emotion_heat = create_emotion_heatmap(data["emotion_evo"])
-    narrative_area = create_narrative_area(data["narrative_evo"])
-    dual_axis = create_dual_axis(data["hourly_df"])
-    stance_radar = create_stance_radar(data["content_df"])
-    narrative_comparison = create_narrative_bar_comparison(data["content_df"])
-    engagement_scatter = create_engagement_scatter(data["content_df"])
-
-    # 【优化新增】作者画像相关图表
-    stance_improvement = create_stance_improvement_bar(data["content_df"])
-    influence_stance = create_author_influence_stance(data["author_prof"])
-    top_influencers_table = create_top_influencers_table(data["top_50"])
-
-    rep_tweets = get_rep_tweets(data["content_df"])
+def report_body() -> rx.Component:
+    """报告主体"""
+    charts = ReportState.charts
+    emotion_line = charts["emotion_line"]
+    narrative_pie = charts["narrative_pie"]
+    stance_bar = charts["stance_bar"]
+    hourly_bar = charts["hourly_bar"]
+    emotion_heat = charts["emotion_heat"]
+    narrative_area = charts["narrative_area"]
+    dual_axis = charts["dual_axis"]
+    stance_radar = charts["stance_radar"]
+    narrative_comparison = charts["narrative_comparison"]
+    engagement_scatter = charts["engagement_scatter"]
+    stance_improvement = charts["stance_improvement"]
+    influence_stance = charts["influence_stance"]
+    top_influencers_table = charts["top_influencers_table"]
+    centrality_leaders = charts["centrality_leaders"]
 
     return rx.box(
         rx.vstack(
@@ -604,7 +788,7 @@ def report_page() -> rx.Component:
                     rx.vstack(
                         rx.heading("Charlie Kirk 遇刺事件社交媒体舆论分析", size="8", color="#333333", font_weight="700"),
                         rx.text("2025 年 9 月 10 日遇刺事件后 72 小时公共（Twitter）话语演变研究", font_size="1.1em", color="#666666"),
-                        rx.text(f"数据来源: Twitter/X | {data['date_range']} | NLP 情感分析", font_size="0.9em", color="#666666"),
+                        rx.text("数据来源: Twitter/X | ", ReportState.date_range, " | NLP 情感分析", font_size="0.9em", color="#666666"),
                         spacing="1",
                         align_items="flex_start",
                     ),
@@ -622,8 +806,8 @@ def report_page() -> rx.Component:
 
             # ==================== KPI 卡片 ====================
             rx.grid(
-                kpi_card("📊", "总推文数", f"{data['total_tweets']:,}", COLORS['blue']),
-                kpi_card("🔍", "分析样本", f"{data['total_sampled']:,}", COLORS['orange']),
+                kpi_card("📊", "总推文数", ReportState.total_tweets, COLORS['blue']),
+                kpi_card("🔍", "分析样本", ReportState.total_sampled, COLORS['orange']),
                 kpi_card("⏱️", "时间跨度", "72 小时", COLORS['green']),
                 kpi_card("❤️", "情感维度", "6 维", COLORS['red']),
                 columns="4",
@@ -632,6 +816,9 @@ def report_page() -> rx.Component:
                 margin_bottom="1.5em",
             ),
 
+            # ==================== 实时推文流（设置 LIVE_DROP_DIR 时启用）====================
+            live_section() if LIVE_DROP_DIR else rx.fragment(),
+
             # ==================== 核心图表区（2x2 grid）====================
             rx.grid(
                 chart_box("情感演变趋势", emotion_line),
@@ -660,7 +847,7 @@ def report_page() -> rx.Component:
 
             # ==================== 【优化新增】作者画像分析区 ====================
             rx.cond(
-                data["author_prof"] is not None,
+                ReportState.has_author_prof,
                 rx.vstack(
                     # 图表区
                     rx.grid(
@@ -685,6 +872,17 @@ def report_page() -> rx.Component:
                 rx.box(),
             ),
 
+            # ==================== 回复网络中心性（滑动窗口）====================
+            rx.cond(
+                centrality_leaders != "",
+                rx.box(
+                    chart_box("回复网络 PageRank 领先账号（滑动窗口）", centrality_leaders),
+                    width="100%",
+                    margin_bottom="1.5em",
+                ),
+                rx.box(),
+            ),
+
             # ==================== Top 50 作者 & 代表性推文（并排）====================
             rx.grid(
                 # Top 10 高影响力作者
@@ -697,7 +895,7 @@ def report_page() -> rx.Component:
                 rx.box(
                     rx.vstack(
                         rx.text("代表性推文", font_size="1.2em", font_weight="600", color="#333", margin_bottom="0.8em"),
-                        *[tweet_card(t) for t in rep_tweets],
+                        rx.foreach(ReportState.rep_tweets, tweet_card),
                         spacing="0",
                         align_items="flex_start",
                     ),
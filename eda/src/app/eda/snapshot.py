@@ -0,0 +1,157 @@
+"""
+报告快照 - 预先生成全部图表 HTML 与 KPI，应用启动时直接读取
+
+构建（镜像构建或 Notebook 产出更新后执行，在 src/app 目录下）：
+
+    python -m eda.snapshot          # 数据未变化时跳过
+    python -m eda.snapshot --force  # 强制重建
+
+快照以各输入文件的 内容哈希（数据清单 parquet/_manifest.json）+ 大小 + 修改时间 为键，
+绕过 `materialize_parquet` 直接改写的文件同样会使快照失效：
+- 键一致：直接使用，启动时不导入 polars / plotly，也不读取 Parquet
+- 键不一致：先返回旧快照保证首屏，同时在后台线程重建，之后打开页面即读取新快照
+- 无快照：同步构建一次；构建在进程内串行，并发打开的页面等待同一次构建。
+  构建失败（数据缺失等）的结果按键缓存，数据不变时不再反复重建
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+# 数据目录
+PARQUET_DIR = Path(__file__).parent.parent.parent.parent / "src" / "notebooks" / "parquet"
+SNAPSHOT_PATH = PARQUET_DIR / "_report_snapshot.json.gz"
+MANIFEST_NAME = "_manifest.json"
+
+# 报告读取的数据集；图表代码变化时递增版本号使旧快照失效
+REPORT_INPUTS = [
+    "tweets_enriched.parquet",
+    "content_analysis.parquet",
+    "emotion_evolution.parquet",
+    "narrative_evolution.parquet",
+    "tweets_hourly.parquet",
+    "author_profiling.parquet",
+    "top_50_influencers.parquet",
+    "network_centrality_hourly.parquet",
+]
+SNAPSHOT_VERSION = 2
+
+_REBUILD_LOCK = threading.Lock()
+_REBUILD_THREAD: Optional[threading.Thread] = None
+# 串行化构建（页面同步构建与后台重建线程共用；可重入，检查与构建在同一临界区）
+_BUILD_LOCK = threading.RLock()
+# 数据键 → 构建失败的结果（含 "error"，不落盘）
+_FAILED: dict[str, dict] = {}
+
+logger = logging.getLogger(__name__)
+
+
+def data_key(parquet_dir: Path = PARQUET_DIR) -> str:
+    """由清单中的内容哈希与文件的 大小 + 修改时间 计算快照键"""
+    manifest_path = parquet_dir / MANIFEST_NAME
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8")) if manifest_path.exists() else {}
+    parts = [f"v{SNAPSHOT_VERSION}"]
+    for name in REPORT_INPUTS:
+        entry = manifest.get(name) or {}
+        path = parquet_dir / name
+        if path.exists():
+            # 清单只在经 materialize_parquet 写入时更新，直接改写文件后哈希会过期，
+            # 因此同时带上文件本身的 stat
+            stat = path.stat()
+            parts.append(f"{name}={entry.get('content_hash', '')}:{stat.st_size}:{stat.st_mtime_ns}")
+        else:
+            parts.append(f"{name}=missing")
+    return hashlib.blake2b("|".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def load_snapshot(path: Path = SNAPSHOT_PATH) -> Optional[dict]:
+    """读取快照，不存在或损坏时返回 None"""
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, EOFError, gzip.BadGzipFile, ValueError):  # 截断的 gzip 抛 EOFError
+        return None
+
+
+def build_snapshot(path: Path = SNAPSHOT_PATH) -> dict:
+    """读取数据、生成全部图表并原子写入快照（进程内串行）"""
+    from .pages.report import build_report_payload, load_all_data
+
+    with _BUILD_LOCK:
+        key = data_key(path.parent)  # 先取键：构建期间数据若再变化，下次启动会再重建
+        payload = build_report_payload(load_all_data())
+        snapshot = {"key": key, "built_at": time.time(), **payload}
+        if "error" in payload:
+            _FAILED[key] = snapshot
+            return snapshot
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # 进程号 + 线程号：其他进程（如 CLI 构建）同时写入时也不会共用临时文件
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with gzip.open(tmp, "wt", encoding="utf-8") as fh:
+                json.dump(snapshot, fh, ensure_ascii=False)
+            os.replace(tmp, path)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+        return snapshot
+
+
+def rebuild_in_background(path: Path = SNAPSHOT_PATH) -> None:
+    """后台重建快照（同一时间最多一个重建线程）"""
+    global _REBUILD_THREAD
+    with _REBUILD_LOCK:
+        if _REBUILD_THREAD is not None and _REBUILD_THREAD.is_alive():
+            return
+
+        def run() -> None:
+            try:
+                build_snapshot(path)
+            except Exception:  # 重建失败时继续使用旧快照
+                logger.exception("报告快照重建失败")
+
+        _REBUILD_THREAD = threading.Thread(target=run, daemon=True)
+        _REBUILD_THREAD.start()
+
+
+def get_report_payload(path: Path = SNAPSHOT_PATH) -> dict:
+    """页面使用的数据：优先快照，过期时后台重建，缺失时同步构建（并发请求只构建一次）"""
+    snapshot = load_snapshot(path)
+    if snapshot is None:
+        with _BUILD_LOCK:  # 等待正在进行的构建，完成后直接使用其结果
+            snapshot = load_snapshot(path)
+            if snapshot is not None:
+                return snapshot
+            # 数据未变化时上次构建失败的原因仍然成立，不再重建
+            return _FAILED.get(data_key(path.parent)) or build_snapshot(path)
+    if snapshot.get("key") != data_key(path.parent):
+        rebuild_in_background(path)
+    return snapshot
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="预生成报告快照（图表 HTML 与 KPI）")
+    parser.add_argument("--force", action="store_true", help="数据未变化时也重建")
+    args = parser.parse_args()
+
+    snapshot = load_snapshot()
+    if not args.force and snapshot is not None and snapshot.get("key") == data_key():
+        print(f"✅ 报告快照已是最新: {SNAPSHOT_PATH}")
+        return
+    start = time.perf_counter()
+    snapshot = build_snapshot()
+    if "error" in snapshot:
+        raise SystemExit(f"❌ 报告快照构建失败: {snapshot['error']}")
+    size_kb = SNAPSHOT_PATH.stat().st_size / 1024
+    print(f"✅ 报告快照已生成: {SNAPSHOT_PATH} ({size_kb:.0f} KB, {time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,4 +3,5 @@ Python Packages
 
 包含:
 - etl: ETL 数据加工模块
+- inference: 本地批处理推理服务
 """
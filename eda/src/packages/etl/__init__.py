@@ -2,11 +2,25 @@
 ETL (Extract, Transform, Load) Module
 
 数据加工管道:
-- io: 数据 I/O 层 (读取、写入、流式处理)
+- io: 数据 I/O 层 (读取、写入、流式处理、Parquet footer 目录索引)
 - analysis: 核心分析变换 (时间序列、网络分析、特征工程)
 - profiling: 数据质量分析 (缺失值、重复值、分布统计)
+- instrumentation: 阶段级性能埋点 (耗时、内存、行数、查询计划)
+- events: 事件数据集注册表 (config/events.json)
+- pipeline: 按事件编排的 ETL 作业与并行调度
+- budget: 内存预算下的外存执行 (分块、溢写、外部排序)
+- streaming: 实时接入 (投放目录追踪、增量小时聚合)
+- sampling: 单遍流式分层蓄水池抽样
+- profiles: 增量作者画像与 Top-K 影响力作者
+- topics: 在线增量主题建模与小时级主题趋势
+- ids: 全局只追加 ID 字典 (字符串 ID → Int32 编码)
+- text_features: 列式文本特征 (词数、可读性、hashtag / mention / URL / emoji)
+- temporal_network: 滑动窗口回复网络 (增量边更新、热启动 PageRank)
+- cascades: 回复 / 引用级联重建与级联指标 (规模、深度、广度、结构病毒性)
+- communities: 回复网络社区发现 (标签传播、Louvain 式模块度优化) 与社区立场 / 叙事构成
+- arrow_cache: 共享内存 Arrow 数据集层 (内存映射的 IPC 缓存、零拷贝视图、文本逐批切片)
 """
 
-from . import io, analysis, profiling
+from . import io, analysis, profiling, instrumentation, events, pipeline, budget, streaming, sampling, profiles, topics, ids, text_features, temporal_network, cascades, communities, arrow_cache
 
-__all__ = ["io", "analysis", "profiling"]
+__all__ = ["io", "analysis", "profiling", "instrumentation", "events", "pipeline", "budget", "streaming", "sampling", "profiles", "topics", "ids", "text_features", "temporal_network", "cascades", "communities", "arrow_cache"]
@@ -5,10 +5,13 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from datetime import datetime
 from typing import Optional
 
 import polars as pl
 
+from .instrumentation import instrumented
+
 
 @dataclass
 class TimeSeriesProfile:
@@ -21,6 +24,7 @@ class TimeSeriesProfile:
     anomalies: pl.DataFrame
 
 
+@instrumented("analysis.build_time_series")
 def build_time_series(df: pl.DataFrame, date_col: str, value_col: str) -> TimeSeriesProfile:
     """
     基于每日聚合构建时间序列指标。当前实现聚焦于骨架，后续在 Notebook 中扩展。
@@ -62,13 +66,18 @@ def build_time_series(df: pl.DataFrame, date_col: str, value_col: str) -> TimeSe
     return TimeSeriesProfile(daily_counts=daily, rolling_metrics=rolling, anomalies=anomalies)
 
 
-def prepare_network_projection(df: pl.DataFrame, source_col: str, target_col: str) -> pl.DataFrame:
+@instrumented("analysis.prepare_network_projection")
+def prepare_network_projection(
+    df: pl.DataFrame, source_col: str, target_col: str, by: Optional[list[str]] = None
+) -> pl.DataFrame:
     """
     构建回复/引用网络的边列表。保留基础权重供 NetworkX 等库使用。
+
+    `by` 为额外的分组键（如小时），每个分组各自计数，用于构建时间有序的边日志。
     """
     edges = (
         df.drop_nulls(subset=[source_col, target_col])
-        .group_by([source_col, target_col])
+        .group_by([*(by or []), source_col, target_col])
         .count()
         .rename({"count": "weight"})
         .filter(pl.col(source_col) != pl.col(target_col))
@@ -76,6 +85,7 @@ def prepare_network_projection(df: pl.DataFrame, source_col: str, target_col: st
     return edges
 
 
+@instrumented("analysis.normalize_boolean_columns")
 def normalize_boolean_columns(df: pl.DataFrame, columns: list[str]) -> pl.DataFrame:
     """
     将字符串形式的布尔列转换为 Polars Boolean。
@@ -95,6 +105,7 @@ def normalize_boolean_columns(df: pl.DataFrame, columns: list[str]) -> pl.DataFr
     return cleaned
 
 
+@instrumented("analysis.enrich_with_authors")
 def enrich_with_authors(
     tweets: pl.DataFrame,
     authors: pl.DataFrame,
@@ -108,3 +119,104 @@ def enrich_with_authors(
         raise ValueError(f"无法基于字段 {on} 进行合并，请确认数据列。")
     return tweets.join(authors, on=on, how="left", suffix=suffix)
 
+
+# 事件后时段划分：(上界小时数, 标签)，最后一档兜底
+TIME_WINDOWS: list[tuple[float, str]] = [(6, "0-6h"), (12, "6-12h"), (24, "12-24h"), (48, "24-48h")]
+TIME_WINDOW_FALLBACK = "48-72h"
+
+INTAKE_BOOL_COLUMNS = ["isReply", "author_isBlueVerified"]
+CREATED_AT_FORMAT = "%Y-%m-%d %H:%M:%S%#z"
+
+
+@instrumented("analysis.parse_intake_columns")
+def parse_intake_columns(
+    df: pl.DataFrame, created_at_format: str = CREATED_AT_FORMAT, strict: bool = True
+) -> pl.DataFrame:
+    """
+    接入阶段的类型规范：布尔列、`createdAt` 时间解析、回复对象 ID 转 Int64。
+
+    `strict=False` 时无法解析的值置为 null 而不是报错（实时接入逐批容错用）。
+    """
+    cleaned = normalize_boolean_columns(df, INTAKE_BOOL_COLUMNS)
+    exprs = []
+    if cleaned.schema.get("createdAt") == pl.Utf8:
+        exprs.append(pl.col("createdAt").str.to_datetime(created_at_format, strict=strict))
+    if "pseudo_inReplyToUsername" in cleaned.columns:
+        exprs.append(reply_target_expr(strict))
+    return cleaned.with_columns(exprs) if exprs else cleaned
+
+
+def reply_target_expr(strict: bool = True) -> pl.Expr:
+    """
+    `pseudo_inReplyToUsername` 的接入规范：空字符串视为缺失，其余转为 Int64 以便与作者 ID 对齐。
+    """
+    return (
+        pl.when(pl.col("pseudo_inReplyToUsername").cast(pl.Utf8) == "")
+        .then(None)
+        .otherwise(pl.col("pseudo_inReplyToUsername"))
+        .cast(pl.Int64, strict=strict)
+        .alias("pseudo_inReplyToUsername")
+    )
+
+
+def time_window_expr(delta_col: str = "event_time_delta_hours") -> pl.Expr:
+    """
+    根据距事件小时数生成时段标签表达式。
+    """
+    expr = pl.when(pl.col(delta_col) < TIME_WINDOWS[0][0]).then(pl.lit(TIME_WINDOWS[0][1]))
+    for upper, label in TIME_WINDOWS[1:]:
+        expr = expr.when(pl.col(delta_col) < upper).then(pl.lit(label))
+    return expr.otherwise(pl.lit(TIME_WINDOW_FALLBACK)).alias("time_window")
+
+
+@instrumented("analysis.add_event_time_fields")
+def add_event_time_fields(df: pl.DataFrame, event_timestamp: datetime, date_col: str = "createdAt") -> pl.DataFrame:
+    """
+    添加 `event_time_delta_hours`（距事件小时数）与 `time_window`（事件后时段）。
+    """
+    delta = (pl.col(date_col) - pl.lit(event_timestamp)).dt.total_microseconds() / 3_600_000_000
+    return df.with_columns(delta.alias("event_time_delta_hours")).with_columns(time_window_expr())
+
+
+@instrumented("analysis.join_author_metadata")
+def join_author_metadata(tweets: pl.DataFrame | pl.LazyFrame, authors: pl.DataFrame) -> pl.DataFrame | pl.LazyFrame:
+    """
+    将推文与作者元数据合并：作者表的 `obfuscated_userName`（形如 `@123`）
+    去掉前缀后转为 Int64，与推文的 `pseudo_author_userName` 对齐。
+
+    推文 ID 已由 `ids.IdDictionary` 编码时，作者表应先经 `encode_authors`
+    得到同一编码空间的 `obfuscated_userName_int`。推文为 LazyFrame 时返回 LazyFrame。
+    """
+    if "obfuscated_userName_int" in authors.columns:
+        keyed = authors
+    else:
+        keyed = authors.with_columns(
+            pl.col("obfuscated_userName").cast(pl.Utf8).str.strip_prefix("@").cast(pl.Int64).alias("obfuscated_userName_int")
+        )
+    if isinstance(tweets, pl.LazyFrame):
+        keyed = keyed.lazy()
+    return tweets.join(keyed, left_on="pseudo_author_userName", right_on="obfuscated_userName_int", how="left")
+
+
+@instrumented("analysis.hourly_activity")
+def hourly_activity(df: pl.DataFrame | pl.LazyFrame, date_col: str = "createdAt") -> pl.DataFrame | pl.LazyFrame:
+    """
+    小时级推文量与互动量聚合（与 02_temporal_evolution 的 `hourly_counts` 口径一致）。
+    传入 LazyFrame 时返回 LazyFrame，可交给 streaming 引擎执行。
+    """
+    return (
+        df.with_columns(
+            pl.col(date_col).dt.truncate("1h").alias("hour"),
+            pl.col("event_time_delta_hours").cast(pl.Int32).alias("hour_since_shooting"),
+        )
+        .group_by("hour")
+        .agg(
+            pl.len().alias("tweet_count"),
+            pl.col("retweetCount").sum().alias("total_retweets"),
+            pl.col("likeCount").sum().alias("total_likes"),
+            pl.col("replyCount").sum().alias("total_replies"),
+            (pl.col("retweetCount") + pl.col("likeCount") + pl.col("replyCount")).sum().alias("total_engagement"),
+            pl.col("hour_since_shooting").first().alias("hours_since_event"),
+        )
+        .sort("hour")
+    )
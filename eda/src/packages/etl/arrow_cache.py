@@ -0,0 +1,171 @@
+"""
+共享内存 Arrow 数据集层。
+
+报告与 Notebook 反复读取 tweets_enriched / content_analysis：每个消费者各自
+`pl.read_parquet` 解压解码一遍，报告再逐图表 `to_pandas()`，文本模型调用前又
+把整列 `to_list()` 成 Python 列表，同一份数据在内存里有多份拷贝。这里改为：
+
+- 缓存：Parquet 首次被读取时流式转写为无压缩的 Arrow IPC（Feather v2）文件，
+  位于同目录的 `_arrow/` 下；以数据集清单中的内容哈希加源文件的 大小 + 修改时间
+  判断是否过期（绕过清单直接改写源文件同样会使缓存失效）
+- 读取：IPC 文件经内存映射打开，`pa.Table` 的缓冲区直接指向页缓存，不解压、
+  不拷贝；同一进程内的消费者共享同一个 Table，多个进程共享同一份页缓存
+- 视图：Polars 通过 `pl.from_arrow(..., rechunk=False)` 零拷贝包装；图表直接取
+  列的 numpy 视图（`Series.to_numpy()`）而不是整表 `to_pandas()`；文本批处理用
+  `iter_text_batches` 逐批切片，只有当前批物化为 Python 字符串
+
+字符串列以 Arrow string_view 写入，与 Polars 内部表示一致，包装时同样不拷贝。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Iterator, Optional, Sequence
+
+import polars as pl
+import pyarrow as pa
+
+from . import io
+from .instrumentation import instrumented
+
+
+CACHE_DIRNAME = "_arrow"
+CACHED_DATASETS = ("tweets_enriched.parquet", "content_analysis.parquet")
+
+_LOCK = threading.Lock()
+# 源文件路径 → (源键, 内存映射的 Table)，进程内共享
+_TABLES: dict[Path, tuple[str, pa.Table]] = {}
+
+
+def cache_path(source: Path) -> Path:
+    """
+    `source` 对应的 IPC 缓存路径：<目录>/_arrow/<文件名去后缀>.arrow。
+    """
+    source = Path(source)
+    return source.parent / CACHE_DIRNAME / f"{source.stem}.arrow"
+
+
+def _meta_path(path: Path) -> Path:
+    return path.with_name(f"{path.name}.json")
+
+
+def _source_key(source: Path) -> str:
+    # 清单只在经 materialize_parquet 写入时更新，直接改写源文件后其中的哈希会过期，
+    # 因此始终同时带上源文件的 stat
+    entry = io.read_manifest(source.parent).get(source.name) or {}
+    stat = source.stat()
+    return f"{entry.get('content_hash', '')}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _cached_key(path: Path) -> Optional[str]:
+    meta = _meta_path(path)
+    if not path.exists() or not meta.exists():
+        return None
+    try:
+        return json.loads(meta.read_text(encoding="utf-8")).get("source_key")
+    except ValueError:
+        return None
+
+
+@instrumented("arrow_cache.refresh_cache")
+def refresh_cache(source: Path, force: bool = False) -> Path:
+    """
+    确保 `source` 的 IPC 缓存存在且与源一致，返回缓存路径。
+
+    转写走流式引擎（`sink_ipc`），不把整表读入内存；写入临时文件后原子替换，
+    已映射旧文件的读取端不受影响。
+    """
+    source = Path(source)
+    path = cache_path(source)
+    key = _source_key(source)
+    if not force and _cached_key(path) == key:
+        return path
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with io._manifest_lock(path.parent, path.name):
+        if not force and _cached_key(path) == key:  # 等锁期间已被其他进程重建
+            return path
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            # 内存映射要求无压缩
+            pl.scan_parquet(source).sink_ipc(tmp, compression=None)
+            os.replace(tmp, path)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+        meta = {"source": source.name, "source_key": key, "size_bytes": path.stat().st_size}
+        meta_tmp = _meta_path(path).with_name(f".{_meta_path(path).name}.{os.getpid()}.tmp")
+        meta_tmp.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+        os.replace(meta_tmp, _meta_path(path))
+    return path
+
+
+def refresh_all(directory: Path = io.PARQUET_DIR, names: Sequence[str] = CACHED_DATASETS) -> list[Path]:
+    """
+    为目录下的常用数据集预先生成缓存（镜像构建或 Notebook 产出更新后执行）。
+    """
+    directory = Path(directory)
+    return [refresh_cache(directory / name) for name in names if (directory / name).exists()]
+
+
+def open_table(source: Path) -> pa.Table:
+    """
+    以内存映射方式打开 `source` 的 IPC 缓存（缺失或过期时先重建）。
+
+    同一进程内对同一数据集的调用返回同一个 Table，源更新后下次调用自动换新。
+    """
+    source = Path(source).resolve()
+    key = _source_key(source)
+    with _LOCK:
+        cached = _TABLES.get(source)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        path = refresh_cache(source)
+        with pa.memory_map(str(path), "r") as mapped:
+            table = pa.ipc.open_file(mapped).read_all()
+        _TABLES[source] = (key, table)
+        return table
+
+
+def frame(source: Path, columns: Optional[Sequence[str]] = None) -> pl.DataFrame:
+    """
+    `source` 的 Polars 零拷贝视图；`columns` 只包装所需列。
+    """
+    table = open_table(source)
+    if columns is not None:
+        table = table.select(list(columns))
+    return pl.from_arrow(table, rechunk=False)
+
+
+def release(source: Optional[Path] = None) -> None:
+    """
+    释放进程内对映射的引用（`source` 为空时释放全部），仍被视图引用的缓冲区随视图释放。
+    """
+    with _LOCK:
+        if source is None:
+            _TABLES.clear()
+        else:
+            _TABLES.pop(Path(source).resolve(), None)
+
+
+def iter_text_batches(
+    data: pl.DataFrame | pa.Table,
+    column: str = "text",
+    batch_size: int = 128,
+    max_chars: Optional[int] = None,
+) -> Iterator[list[str]]:
+    """
+    逐批产出文本列表，供分词器 / 模型调用。
+
+    每批只切片（零拷贝）并物化当前批的字符串，不再一次性 `to_list()` 整列；
+    `max_chars` 在 Arrow 层截断过长文本，空值以空字符串代替以保持与行对齐。
+    """
+    series = (pl.from_arrow(data.select([column]), rechunk=False) if isinstance(data, pa.Table) else data)[column]
+    for offset in range(0, series.len(), batch_size):
+        batch = series.slice(offset, batch_size)
+        if max_chars is not None:
+            batch = batch.str.slice(0, max_chars)
+        yield batch.fill_null("").to_list()
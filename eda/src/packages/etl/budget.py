@@ -0,0 +1,298 @@
+"""
+内存预算下的外存（out-of-core）执行工具。
+
+设置预算后，ETL 作业不再一次性 collect 全量数据，而是：
+- 分块读取 CSV，逐块变换后溢写为临时 Parquet；块行数由预算与首批数据
+  估算的每行字节数推出（`plan_chunk_rows`）
+- 聚合类阶段对溢写结果走 Polars streaming 引擎
+- 需要全局有序的输出按小时分桶溢写，逐桶排序后顺序追加，实现外部排序；
+  超过排序段上限（`MemoryBudget.run_bytes`）的小时桶再按时间细分后逐段排序
+
+每个阶段都会记录进程峰值 RSS 并与预算对比，结果汇总为 `BudgetReport`。
+
+预算可通过 `MemoryBudget(limit_bytes=...)` 显式传入，或设置环境变量
+`ETL_MEMORY_BUDGET`（如 `4GB`、`512MiB`）。
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import re
+import shutil
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+import polars as pl
+
+from . import instrumentation
+
+
+MIN_CHUNK_ROWS = 1_000
+PROBE_ROWS = 10_000
+
+_SIZE_UNITS = {
+    "": 1,
+    "b": 1,
+    "k": 1000, "kb": 1000, "kib": 1 << 10,
+    "m": 1000**2, "mb": 1000**2, "mib": 1 << 20,
+    "g": 1000**3, "gb": 1000**3, "gib": 1 << 30,
+}
+
+
+def parse_size(text: str) -> int:
+    """
+    解析 `4GB` / `512MiB` / `1073741824` 形式的容量字符串为字节数。
+    """
+    match = re.fullmatch(r"\s*([\d.]+)\s*([a-zA-Z]*)\s*", text)
+    if not match or match.group(2).lower() not in _SIZE_UNITS:
+        raise ValueError(f"无法解析的内存预算: {text!r}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).lower()])
+
+
+@dataclass(frozen=True)
+class MemoryBudget:
+    """
+    内存预算设定。
+
+    参数
+    ----
+    limit_bytes:
+        进程峰值 RSS 上限。
+    chunk_fraction:
+        单个原始数据块允许占用的预算比例。变换过程中同时存在原始块、变换结果
+        与若干中间列，因此远小于 1。
+    run_fraction:
+        外部排序时单个排序段（读入内存一次排序的数据）允许占用的预算比例；
+        排序需要输入与输出两份，同样应小于 1/2。
+    chunk_rows:
+        显式指定分块行数；为空时由 `plan_chunk_rows` 按预算推算。
+    spill_dir:
+        溢写目录，默认使用系统临时目录。
+    """
+
+    limit_bytes: int
+    chunk_fraction: float = 0.1
+    run_fraction: float = 0.25
+    chunk_rows: Optional[int] = None
+    spill_dir: Optional[Path] = None
+
+    @property
+    def chunk_bytes(self) -> int:
+        return int(self.limit_bytes * self.chunk_fraction)
+
+    @property
+    def run_bytes(self) -> int:
+        return int(self.limit_bytes * self.run_fraction)
+
+    def rows_for(self, bytes_per_row: float) -> int:
+        """
+        每行约 `bytes_per_row` 字节时，单块可容纳的行数。
+        """
+        if self.chunk_rows is not None:
+            return self.chunk_rows
+        return max(MIN_CHUNK_ROWS, int(self.chunk_bytes / max(bytes_per_row, 1.0)))
+
+    @classmethod
+    def from_env(cls) -> Optional["MemoryBudget"]:
+        value = os.environ.get("ETL_MEMORY_BUDGET")
+        return cls(limit_bytes=parse_size(value)) if value else None
+
+
+@dataclass
+class StageUsage:
+    """
+    单个阶段的峰值内存与预算对比。
+    """
+
+    stage: str
+    peak_rss_bytes: int
+    limit_bytes: int
+
+    @property
+    def ratio(self) -> float:
+        return self.peak_rss_bytes / self.limit_bytes if self.limit_bytes else 0.0
+
+    @property
+    def within_budget(self) -> bool:
+        return self.peak_rss_bytes <= self.limit_bytes
+
+
+@dataclass
+class BudgetReport:
+    """
+    一次作业内各阶段的内存使用汇总。
+    """
+
+    limit_bytes: int
+    stages: list[StageUsage] = field(default_factory=list)
+
+    @property
+    def within_budget(self) -> bool:
+        return all(s.within_budget for s in self.stages)
+
+    def to_frame(self) -> pl.DataFrame:
+        return pl.DataFrame(
+            [
+                {
+                    "stage": s.stage,
+                    "peak_rss_mb": s.peak_rss_bytes / 1024 / 1024,
+                    "limit_mb": s.limit_bytes / 1024 / 1024,
+                    "ratio": s.ratio,
+                    "within_budget": s.within_budget,
+                }
+                for s in self.stages
+            ]
+        )
+
+
+@contextmanager
+def tracked(report: BudgetReport, name: str) -> Iterator[dict[str, Any]]:
+    """
+    记录代码块的峰值 RSS 并写入 `report`；埋点开启时同时产出阶段记录。
+    """
+    with instrumentation.stage(name, budget_bytes=report.limit_bytes) as info:
+        with instrumentation.PeakSampler(interval=0.01) as sampler:
+            yield info
+    report.stages.append(StageUsage(stage=name, peak_rss_bytes=sampler.peak, limit_bytes=report.limit_bytes))
+
+
+@contextmanager
+def spill_directory(budget: MemoryBudget, prefix: str = "etl-spill-") -> Iterator[Path]:
+    """
+    创建作业专属的溢写目录，退出时清理。
+    """
+    if budget.spill_dir is not None:
+        budget.spill_dir.mkdir(parents=True, exist_ok=True)
+    path = Path(tempfile.mkdtemp(prefix=prefix, dir=budget.spill_dir))
+    try:
+        yield path
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def plan_chunk_rows(
+    path: Path,
+    budget: MemoryBudget,
+    dtypes: Optional[dict[str, pl.PolarsDataType]] = None,
+    probe_rows: int = PROBE_ROWS,
+) -> int:
+    """
+    读取文件开头 `probe_rows` 行估算每行内存占用，返回预算允许的分块行数。
+    """
+    if budget.chunk_rows is not None:
+        return budget.chunk_rows
+    probe = pl.read_csv(path, schema_overrides=dtypes, ignore_errors=True, n_rows=probe_rows)
+    return budget.rows_for(probe.estimated_size() / max(probe.height, 1))
+
+
+def iter_csv_chunks(
+    path: Path,
+    chunk_rows: int,
+    dtypes: Optional[dict[str, pl.PolarsDataType]] = None,
+) -> Iterator[pl.DataFrame]:
+    """
+    按块读取 CSV。schema 只在首块推断一次，保证各块列类型一致。
+    """
+    reader = pl.read_csv_batched(path, schema_overrides=dtypes, ignore_errors=True, batch_size=chunk_rows)
+    while True:
+        batches = reader.next_batches(1)
+        if not batches:
+            break
+        yield from batches
+
+
+def collect_streaming(lf: pl.LazyFrame) -> pl.DataFrame:
+    """
+    使用 streaming 引擎 collect，兼容旧版 Polars 的 `streaming=True` 参数。
+    """
+    try:
+        return lf.collect(engine="streaming")
+    except TypeError:
+        return lf.collect(streaming=True)
+
+
+def spill_by_hour(df: pl.DataFrame, directory: Path, part: int, key: str = "createdAt") -> None:
+    """
+    将一块数据按 `key` 的小时分桶溢写到 `directory/<bucket>/part-<n>.parquet`。
+    """
+    bucket_col = "__spill_bucket"
+    keyed = df.with_columns(pl.col(key).dt.truncate("1h").dt.strftime("%Y%m%dT%H").fill_null("null").alias(bucket_col))
+    for (bucket,), group in keyed.group_by(bucket_col):
+        bucket_dir = directory / str(bucket)
+        bucket_dir.mkdir(parents=True, exist_ok=True)
+        group.drop(bucket_col).write_parquet(bucket_dir / f"part-{part:05d}.parquet", compression="lz4")
+
+
+def merge_hour_buckets(
+    directory: Path,
+    output_path: Path,
+    key: str = "createdAt",
+    row_group_size: Optional[int] = None,
+    max_run_bytes: Optional[int] = None,
+) -> int:
+    """
+    外部排序的合并阶段：按小时桶顺序逐桶读取、排序并追加为输出文件的 row group。
+
+    `max_run_bytes` 为空时整桶读入排序，峰值内存约为最大单个小时桶的大小；
+    否则按 footer 中的未压缩大小估算桶的内存占用，超过上限的桶按时间等分为
+    若干段逐段读取排序，峰值内存约为 `max_run_bytes`。返回写出的总行数。
+    """
+    import pyarrow.parquet as pq
+
+    buckets = sorted((p for p in directory.iterdir() if p.is_dir()), key=lambda p: (p.name == "null", p.name))
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    writer: Optional[pq.ParquetWriter] = None
+    rows = 0
+    try:
+        for bucket in buckets:
+            files = sorted(bucket.glob("*.parquet"))
+            for run in _sorted_runs(files, key, max_run_bytes, sort=bucket.name != "null"):
+                table = run.to_arrow()
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, table.schema, compression="zstd", write_statistics=True)
+                writer.write_table(table.cast(writer.schema), row_group_size=row_group_size)
+                rows += table.num_rows
+            shutil.rmtree(bucket, ignore_errors=True)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def _uncompressed_bytes(files: list[Path]) -> int:
+    import pyarrow.parquet as pq
+
+    total = 0
+    for file in files:
+        metadata = pq.read_metadata(file)
+        total += sum(metadata.row_group(i).total_byte_size for i in range(metadata.num_row_groups))
+    return total
+
+
+def _sorted_runs(files: list[Path], key: str, max_run_bytes: Optional[int], sort: bool = True) -> Iterator[pl.DataFrame]:
+    # 一个小时桶的有序分段；键为空的桶无需排序，逐文件输出
+    if not sort:
+        for file in files:
+            yield pl.read_parquet(file)
+        return
+    size = _uncompressed_bytes(files) if max_run_bytes else 0
+    if not max_run_bytes or size <= max_run_bytes:
+        yield pl.read_parquet(files).sort(key)
+        return
+
+    lf = pl.scan_parquet(files)
+    lo, hi = lf.select(pl.col(key).min().alias("lo"), pl.col(key).max().alias("hi")).collect().row(0)
+    pieces = math.ceil(size / max_run_bytes)
+    step = (hi - lo) / pieces
+    for i in range(pieces):
+        start = lo + step * i
+        in_run = pl.col(key) >= start if i else pl.lit(True)
+        if i < pieces - 1:
+            in_run = in_run & (pl.col(key) < start + step)
+        run = lf.filter(in_run).collect()
+        if run.height:
+            yield run.sort(key)
@@ -0,0 +1,295 @@
+"""
+回复 / 引用级联（对话树）重建。
+
+现有网络只有作者之间的回复边，没有对话结构。这里按推文的父推文 ID
+（回复对象、被引用推文，优先取回复）把推文连成树，并计算每个根的指标：
+
+- size: 级联内推文数（含根）
+- depth: 最大深度（根为 0）
+- max_breadth: 单一深度上的最多推文数
+- time_to_<N>_hours: 从根发布到第 N 条回复 / 引用的小时数
+- structural_virality: 树上所有节点对的平均最短路径长度（Goel et al. 2016），
+  由 Wiener 指数 Σ 子树大小 × (n − 子树大小) 求得
+
+计算全部在整数数组上完成：推文映射为连续下标后，用指针倍增（pointer jumping）
+在 O(log 深度) 轮向量化操作内求出每条推文的根与深度，再按深度逐层自底向上
+累加子树大小。不存在逐推文的递归。
+
+父推文不在数据集中时保留为“虚拟根”（`root_observed = False`），回复同一条
+外部推文的对话仍归入同一级联；此时时间指标以级联内最早的推文为起点。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+import polars as pl
+
+from . import io
+from .ids import CODE_DTYPE, IdDictionary, is_encoded, normalize_key
+from .instrumentation import instrumented
+
+
+ID_COL = "pseudo_id"
+# 按优先级排列：同时存在时取回复对象
+PARENT_COLUMNS = ["pseudo_inReplyToId", "quoteId"]
+ENGAGEMENT_COLUMNS = ["retweetCount", "likeCount", "replyCount"]
+TIME_TO_N = (10, 100)
+
+
+def _resolve_keys(
+    df: pl.DataFrame, id_col: str, parent_cols: list[str], ids: Optional[IdDictionary]
+) -> pl.DataFrame:
+    # 推文 ID 与父推文 ID 统一为同一类型：推文 ID 已编码时把父推文 ID 也编码为 Int32
+    # （不在数据集中的父推文同样分配编码），否则统一规范为字符串。
+    # 编码 / 解码必须使用数据集写入时的字典，换一个字典得到的编码互不相容，因此不做默认
+    columns = [id_col, *parent_cols]
+    if is_encoded(df[id_col]):
+        pending = {c: "tweet" for c in parent_cols if not is_encoded(df[c])}
+        if not pending:
+            return df
+        return _require_ids(ids, columns).encode(df, pending)
+    if any(is_encoded(df[c]) for c in parent_cols):
+        df = _require_ids(ids, columns).decode(df, {c: "tweet" for c in parent_cols})
+    return df.with_columns(normalize_key(pl.col(c)).alias(c) for c in columns)
+
+
+def _require_ids(ids: Optional[IdDictionary], columns: Sequence[str]) -> IdDictionary:
+    if ids is None:
+        raise ValueError(
+            f"ID 列 {list(columns)} 编码状态不一致，需要传入数据集编码时使用的 IdDictionary"
+            "（如 IdDictionary(event.id_dir)）"
+        )
+    return ids
+
+
+def _pointer_jump(parent: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    指针倍增：返回每个节点的根与深度。parent 中 -1 表示根。
+    """
+    n = parent.size
+    nodes = np.arange(n)
+    root = np.where(parent >= 0, parent, nodes)
+    depth = (parent >= 0).astype(np.int64)
+    for _ in range(max(int(np.ceil(np.log2(max(n, 2)))) + 1, 1)):
+        jumped = root[root]
+        if np.array_equal(jumped, root):
+            break
+        depth = depth + depth[root]
+        root = jumped
+    return root, depth
+
+
+@instrumented("cascades.build_cascade_tree")
+def build_cascade_tree(
+    df: pl.DataFrame,
+    id_col: str = ID_COL,
+    parent_cols: Optional[Sequence[str]] = None,
+    date_col: str = "createdAt",
+    ids: Optional[IdDictionary] = None,
+) -> pl.DataFrame:
+    """
+    每条推文（含虚拟根）一行：`id_col`, `parent`, `root`, `depth`, `subtree_size`,
+    `date_col`, `observed`，以及输入中存在的互动列。
+
+    推文 ID 与父推文 ID 编码状态不一致时需要传入数据集编码时使用的字典 `ids`。
+    """
+    parent_cols = [c for c in (parent_cols or PARENT_COLUMNS) if c in df.columns]
+    if not parent_cols:
+        raise ValueError(f"缺少父推文 ID 列（需要 {PARENT_COLUMNS} 之一）")
+    extra = [c for c in ENGAGEMENT_COLUMNS if c in df.columns]
+    tweets = (
+        _resolve_keys(df.select(id_col, *parent_cols, date_col, *extra), id_col, parent_cols, ids)
+        .drop_nulls(id_col)
+        .unique(id_col, keep="first", maintain_order=True)
+        .with_columns(pl.coalesce(parent_cols).alias("parent"))
+        .with_columns(
+            pl.when(pl.col("parent") != pl.col(id_col)).then(pl.col("parent")).alias("parent"),
+            pl.lit(True).alias("observed"),
+        )
+    )
+
+    # 不在数据集中的父推文作为虚拟根
+    external = (
+        tweets.select(pl.col("parent").alias(id_col)).drop_nulls().unique()
+        .join(tweets.select(id_col), on=id_col, how="anti")
+    )
+    nodes = pl.concat([tweets.drop(parent_cols), external], how="diagonal").with_columns(
+        pl.col("observed").fill_null(False)
+    ).with_row_index("idx")
+    index = nodes.select(pl.col(id_col).alias("parent"), pl.col("idx").alias("parent_idx"))
+    nodes = nodes.join(index, on="parent", how="left", maintain_order="left")
+
+    parent = nodes["parent_idx"].fill_null(-1).to_numpy().astype(np.int64)
+    # 回复早于父推文的边不可能成立，直接切断（也排除了大部分环）
+    known = nodes[date_col].is_not_null().to_numpy()
+    times = nodes[date_col].to_physical().fill_null(0).to_numpy()
+    child = np.flatnonzero(parent >= 0)
+    upstream = parent[child]
+    parent[child[known[child] & known[upstream] & (times[upstream] > times[child])]] = -1
+
+    root, depth = _pointer_jump(parent)
+    # 时间戳相同的推文之间仍可能成环：倍增足够多轮后，环内及其下游节点的
+    # “根”都落在环上，在这些位置断开后重算
+    cyclic = parent[root] >= 0
+    if cyclic.any():
+        parent[np.unique(root[cyclic])] = -1
+        root, depth = _pointer_jump(parent)
+
+    # 自底向上逐层累加子树大小
+    subtree = np.ones(parent.size, dtype=np.int64)
+    order = np.argsort(-depth, kind="stable")
+    for level in np.split(order, np.flatnonzero(np.diff(depth[order])) + 1):
+        if level.size and depth[level[0]] > 0:
+            np.add.at(subtree, parent[level], subtree[level])
+
+    return nodes.with_columns(
+        pl.Series("parent_idx", parent),
+        pl.Series("root_idx", root),
+        pl.Series("depth", depth, dtype=pl.Int32),
+        pl.Series("subtree_size", subtree),
+    ).select(
+        id_col,
+        pl.col(id_col).gather(pl.when(pl.col("parent_idx") >= 0).then(pl.col("parent_idx"))).alias("parent"),
+        pl.col(id_col).gather(pl.col("root_idx")).alias("root"),
+        "depth",
+        "subtree_size",
+        date_col,
+        "observed",
+        *extra,
+    )
+
+
+@instrumented("cascades.cascade_metrics")
+def cascade_metrics(
+    tree: pl.DataFrame,
+    id_col: str = ID_COL,
+    date_col: str = "createdAt",
+    time_to_n: Sequence[int] = TIME_TO_N,
+    min_size: int = 2,
+) -> pl.DataFrame:
+    """
+    由 `build_cascade_tree` 的结果计算每个根的级联指标，只保留 size ≥ `min_size` 的级联。
+    """
+    roots = tree.filter(pl.col("depth") == 0).select(
+        pl.col(id_col).alias("root"),
+        pl.col("observed").alias("root_observed"),
+        pl.col(date_col).alias("root_created_at"),
+    )
+    # 非根节点的边贡献 s × (n − s)，求和即 Wiener 指数
+    sizes = tree.group_by("root").agg(pl.len().cast(pl.Int64).alias("size"))
+    wiener = (
+        tree.filter(pl.col("depth") > 0)
+        .join(sizes, on="root")
+        .group_by("root")
+        .agg((pl.col("subtree_size") * (pl.col("size") - pl.col("subtree_size"))).sum().alias("wiener_index"))
+    )
+    breadth = tree.group_by("root", "depth").agg(pl.len().alias("n")).group_by("root").agg(
+        pl.col("n").max().alias("max_breadth")
+    )
+    engagement = [c for c in ENGAGEMENT_COLUMNS if c in tree.columns]
+    stats = tree.group_by("root").agg(
+        pl.col("depth").max().alias("depth"),
+        pl.col(date_col).min().alias("first_seen"),
+        pl.col(date_col).max().alias("last_seen"),
+        *([pl.sum_horizontal(engagement).sum().alias("total_engagement")] if engagement else []),
+    )
+
+    cascades = (
+        roots.join(sizes, on="root")
+        .filter(pl.col("size") >= min_size)
+        .join(stats, on="root")
+        .join(breadth, on="root")
+        .join(wiener, on="root", how="left")
+        .with_columns(
+            pl.coalesce("root_created_at", "first_seen").alias("started_at"),
+            (2 * pl.col("wiener_index").fill_null(0) / (pl.col("size") * (pl.col("size") - 1)))
+            .alias("structural_virality"),
+        )
+    )
+
+    # 第 N 条回复 / 引用（不含根）按发布时间排序
+    replies = (
+        tree.filter(pl.col("depth") > 0)
+        .join(cascades.select("root", "started_at"), on="root")
+        .sort("root", date_col)
+        .with_columns(pl.int_range(1, pl.len() + 1).over("root").alias("reply_rank"))
+    )
+    elapsed = (pl.col(date_col) - pl.col("started_at")).dt.total_seconds() / 3600
+    for n in time_to_n:
+        reached = replies.filter(pl.col("reply_rank") == n).select("root", elapsed.alias(f"time_to_{n}_hours"))
+        cascades = cascades.join(reached, on="root", how="left")
+
+    return cascades.with_columns(
+        ((pl.col("last_seen") - pl.col("started_at")).dt.total_seconds() / 3600).alias("duration_hours"),
+    ).select(
+        "root", "root_observed", "started_at", "size", "depth", "max_breadth", "structural_virality",
+        *[f"time_to_{n}_hours" for n in time_to_n], "duration_hours",
+        *(["total_engagement"] if engagement else []),
+    ).sort("size", descending=True)
+
+
+@dataclass
+class CascadeStageResult:
+    """
+    `run_cascade_stage` 的输出路径与规模。
+    """
+
+    cascades: Path
+    membership: Path
+    n_cascades: int
+    n_tweets: int
+    summary: pl.DataFrame = field(repr=False, default_factory=pl.DataFrame)
+
+
+@instrumented("cascades.run_cascade_stage")
+def run_cascade_stage(
+    source: Path,
+    output_dir: Path,
+    id_col: str = ID_COL,
+    parent_cols: Optional[Sequence[str]] = None,
+    ids: Optional[IdDictionary] = None,
+    time_to_n: Sequence[int] = TIME_TO_N,
+    min_size: int = 2,
+) -> CascadeStageResult:
+    """
+    从 `source`（如 tweets_enriched.parquet）重建级联，输出：
+
+    - cascades.parquet: 每个根一行的级联指标
+    - cascade_membership.parquet: 属于这些级联的推文及其根、父推文、深度，
+      可按 `id_col` 与推文表合并做互动分析
+
+    `source` 中推文 ID 与父推文 ID 的编码状态不一致时（部分为 Int32 编码），
+    必须传入写入 `source` 时使用的字典 `ids`（如 `IdDictionary(event.id_dir)`），
+    否则在读取数据前报错。
+    """
+    lf = pl.scan_parquet(source)
+    schema = lf.collect_schema()
+    available = schema.names()
+    parent_cols = [c for c in (parent_cols or PARENT_COLUMNS) if c in available]
+    extra = [c for c in ENGAGEMENT_COLUMNS if c in available]
+    if ids is None and len({schema[c] == CODE_DTYPE for c in (id_col, *parent_cols)}) > 1:
+        _require_ids(ids, [id_col, *parent_cols])
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    df = lf.select(id_col, *parent_cols, "createdAt", *extra).collect()
+
+    tree = build_cascade_tree(df, id_col, parent_cols, ids=ids)
+    cascades = cascade_metrics(tree, id_col, time_to_n=time_to_n, min_size=min_size)
+    membership = tree.join(cascades.select("root"), on="root", how="semi").select(
+        id_col, "root", "parent", "depth", "observed"
+    )
+
+    paths = {
+        "cascades": output_dir / "cascades.parquet",
+        "membership": output_dir / "cascade_membership.parquet",
+    }
+    io.materialize_parquet(cascades.lazy(), paths["cascades"])
+    io.materialize_parquet(membership.lazy(), paths["membership"])
+    return CascadeStageResult(
+        **paths, n_cascades=cascades.height, n_tweets=int(membership["observed"].sum()), summary=cascades
+    )
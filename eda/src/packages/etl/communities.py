@@ -0,0 +1,391 @@
+"""
+回复网络的社区发现（回音室结构）。
+
+NetworkX 的社区算法在逐节点 Python 循环上运行，全量回复网络上跑不完。这里在
+整数下标的稀疏邻接（对称化后的边数组 src / dst / weight）上实现两种算法，
+每一轮都是对全部节点的一次向量化更新（按 节点 × n + 社区 的整数键排序聚合）：
+
+- 标签传播：节点采用邻居中权重最大的标签
+- Louvain 式模块度优化：节点移动到模块度增益最大的邻居社区；一层收敛后把社区
+  收缩为节点、边权重求和，在收缩图上重复，直到社区不再合并
+
+两者都是同步更新，为避免两个单节点社区互相交换而振荡，只允许移向编号更小的
+一方。Louvain 每轮只让随机一部分（默认一半）有正增益的节点移动，否则大量节点
+按过期的社区总度数同时并入同一社区，模块度明显偏低；每轮检查模块度，下降则
+撤销重试，提升小于 `tol` 时结束本层。
+
+社区划分可与 `author_profiling` 合并，并按社区汇总立场构成与叙事构成。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import polars as pl
+
+from . import io
+from .analysis import prepare_network_projection
+from .instrumentation import instrumented
+from .profiles import AUTHOR_KEY, STANCES
+
+
+SOURCE_COL = "pseudo_author_userName"
+TARGET_COL = "pseudo_inReplyToUsername"
+METHODS = ("louvain", "label_propagation")
+
+
+@dataclass
+class SparseGraph:
+    """
+    无向加权图：每条边以 (u, v) 与 (v, u) 两个方向存储，自环只存一次。
+    """
+
+    nodes: pl.Series
+    src: np.ndarray
+    dst: np.ndarray
+    weight: np.ndarray
+
+    @property
+    def n_nodes(self) -> int:
+        return self.nodes.len()
+
+    @property
+    def n_edges(self) -> int:
+        return int(np.count_nonzero(self.src < self.dst))
+
+    def strength(self) -> np.ndarray:
+        return np.bincount(self.src, weights=self.weight, minlength=self.n_nodes)
+
+
+@instrumented("communities.build_sparse_graph")
+def build_sparse_graph(
+    edges: pl.DataFrame,
+    source_col: str = SOURCE_COL,
+    target_col: str = TARGET_COL,
+    weight_col: str = "weight",
+) -> SparseGraph:
+    """
+    由 `prepare_network_projection` 的有向边列表构建对称化的整数邻接，
+    u → v 与 v → u 的权重相加。
+    """
+    nodes = pl.concat([edges[source_col], edges[target_col]]).unique().sort()
+    index = nodes.to_frame("node").with_row_index("idx")
+    coded = (
+        edges.join(index.rename({"node": source_col, "idx": "u"}), on=source_col)
+        .join(index.rename({"node": target_col, "idx": "v"}), on=target_col)
+        .select("u", "v", pl.col(weight_col).cast(pl.Float64).alias("w"))
+    )
+    both = (
+        pl.concat([coded, coded.select(pl.col("v").alias("u"), pl.col("u").alias("v"), "w")])
+        .group_by("u", "v")
+        .agg(pl.col("w").sum())
+        .sort("u", "v")
+    )
+    return SparseGraph(
+        nodes=nodes,
+        src=both["u"].to_numpy().astype(np.int64),
+        dst=both["v"].to_numpy().astype(np.int64),
+        weight=both["w"].to_numpy(),
+    )
+
+
+def modularity(graph: SparseGraph, labels: np.ndarray, resolution: float = 1.0) -> float:
+    """
+    Q = Σ_c [ in_c / 2m − γ (tot_c / 2m)² ]。
+    """
+    m2 = graph.weight.sum()
+    if m2 == 0:
+        return 0.0
+    internal = graph.weight[labels[graph.src] == labels[graph.dst]].sum()
+    tot = np.bincount(labels, weights=graph.strength())
+    return float(internal / m2 - resolution * np.square(tot / m2).sum())
+
+
+def _neighbor_weights(graph: SparseGraph, labels: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # 每个节点到各邻居社区的边权重之和（不含自环），按 (节点, 社区) 排序。
+    # 键编码为 节点 × n + 社区 后排序去重，比哈希分组快
+    n = graph.n_nodes
+    off_diagonal = graph.src != graph.dst
+    keys = graph.src[off_diagonal] * np.int64(n) + labels[graph.dst[off_diagonal]]
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    k_in = np.bincount(inverse, weights=graph.weight[off_diagonal], minlength=unique_keys.size)
+    return unique_keys // n, unique_keys % n, k_in
+
+
+def _best_moves(
+    node: np.ndarray,
+    community: np.ndarray,
+    score: np.ndarray,
+    labels: np.ndarray,
+    own_default: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    每个节点得分最高的邻居社区（并列取编号最小者），返回得分高于留在当前社区的
+    (节点, 目标社区)。与当前社区没有边的节点，留下的得分为 `own_default`。
+    """
+    if node.size == 0:
+        return node, node
+    starts = np.flatnonzero(np.r_[True, node[1:] != node[:-1]])
+    group_node = node[starts]
+    group_max = np.maximum.reduceat(score, starts)
+    is_max = np.flatnonzero(score == np.repeat(group_max, np.diff(np.r_[starts, node.size])))
+    best = community[is_max[np.r_[True, node[is_max][1:] != node[is_max][:-1]]]]
+
+    own_score = own_default.copy()
+    own = community == labels[node]
+    own_score[node[own]] = score[own]
+    current = labels[group_node]
+    move = (best != current) & (group_max > own_score[group_node] + 1e-12)
+
+    # 同步更新时两个单节点社区会互相交换而振荡：两者都是单节点时只允许移向编号更小的一方
+    size = np.bincount(labels, minlength=labels.size)
+    swap = (size[current] == 1) & (size[best] == 1) & (best > current)
+    move &= ~swap
+    return group_node[move], best[move]
+
+
+@instrumented("communities.label_propagation")
+def label_propagation(graph: SparseGraph, max_iter: int = 100) -> np.ndarray:
+    """
+    加权标签传播，返回每个节点的社区编号。
+    """
+    labels = np.arange(graph.n_nodes, dtype=np.int64)
+    zeros = np.zeros(graph.n_nodes)
+    for _ in range(max_iter):
+        node, community, k_in = _neighbor_weights(graph, labels)
+        nodes, targets = _best_moves(node, community, k_in, labels, zeros)
+        if nodes.size == 0:
+            break
+        labels[nodes] = targets
+    return np.unique(labels, return_inverse=True)[1]
+
+
+def _local_moving(
+    graph: SparseGraph,
+    resolution: float,
+    max_sweeps: int,
+    tol: float,
+    rng: np.random.Generator,
+    move_fraction: float,
+) -> np.ndarray:
+    k = graph.strength()
+    m2 = graph.weight.sum()
+    labels = np.arange(graph.n_nodes, dtype=np.int64)
+    quality = modularity(graph, labels, resolution)
+    for _ in range(max_sweeps):
+        tot = np.bincount(labels, weights=k, minlength=graph.n_nodes)
+        node, community, k_in = _neighbor_weights(graph, labels)
+        # 增益 ∝ k_i,c − γ k_i (tot_c − [c 为当前社区] k_i) / 2m
+        tot_c = tot[community] - np.where(community == labels[node], k[node], 0.0)
+        score = k_in - resolution * k[node] * tot_c / m2
+        alone = -resolution * k * (tot[labels] - k) / m2
+        nodes, targets = _best_moves(node, community, score, labels, alone)
+        if nodes.size == 0:
+            break
+        chosen = rng.random(nodes.size) < move_fraction
+        chosen[rng.integers(nodes.size)] = True
+        nodes, targets = nodes[chosen], targets[chosen]
+        previous = labels[nodes]
+        labels[nodes] = targets
+        # 同步移动互相影响，本轮模块度下降时撤销，换一批节点重试
+        updated = modularity(graph, labels, resolution)
+        if updated < quality:
+            labels[nodes] = previous
+            continue
+        if updated - quality < tol:
+            break
+        quality = updated
+    return np.unique(labels, return_inverse=True)[1]
+
+
+def _aggregate(graph: SparseGraph, labels: np.ndarray) -> SparseGraph:
+    # 社区收缩为节点，社区内部的边权重成为自环
+    merged = (
+        pl.DataFrame({"u": labels[graph.src], "v": labels[graph.dst], "w": graph.weight})
+        .group_by("u", "v")
+        .agg(pl.col("w").sum())
+    )
+    n = int(labels.max()) + 1
+    return SparseGraph(
+        nodes=pl.Series("node", np.arange(n)),
+        src=merged["u"].to_numpy().astype(np.int64),
+        dst=merged["v"].to_numpy().astype(np.int64),
+        weight=merged["w"].to_numpy(),
+    )
+
+
+@instrumented("communities.louvain")
+def louvain(
+    graph: SparseGraph,
+    resolution: float = 1.0,
+    max_levels: int = 10,
+    max_sweeps: int = 50,
+    tol: float = 1e-6,
+    move_fraction: float = 0.5,
+    seed: int = 42,
+) -> np.ndarray:
+    """
+    Louvain 式多层模块度优化，返回每个原始节点的社区编号。
+    """
+    rng = np.random.default_rng(seed)
+    membership = np.arange(graph.n_nodes, dtype=np.int64)
+    level_graph = graph
+    for _ in range(max_levels):
+        labels = _local_moving(level_graph, resolution, max_sweeps, tol, rng, move_fraction)
+        if labels.max(initial=-1) + 1 == level_graph.n_nodes:
+            break
+        membership = labels[membership]
+        level_graph = _aggregate(level_graph, labels)
+    return membership
+
+
+@instrumented("communities.detect_communities")
+def detect_communities(
+    edges: pl.DataFrame,
+    source_col: str = SOURCE_COL,
+    target_col: str = TARGET_COL,
+    method: str = "louvain",
+    resolution: float = 1.0,
+    seed: int = 42,
+) -> tuple[pl.DataFrame, float]:
+    """
+    对有向边列表做社区发现，返回 (`node`, `community`, `community_size`) 表与模块度。
+    社区按规模降序编号（0 为最大社区）。
+    """
+    if method not in METHODS:
+        raise ValueError(f"不支持的社区发现方法: {method}")
+    graph = build_sparse_graph(edges, source_col, target_col)
+    if method == "louvain":
+        labels = louvain(graph, resolution=resolution, seed=seed)
+    else:
+        labels = label_propagation(graph)
+    score = modularity(graph, labels, resolution)
+
+    sizes = np.bincount(labels)
+    rank = np.empty_like(sizes)
+    rank[np.argsort(-sizes, kind="stable")] = np.arange(sizes.size)
+    partition = pl.DataFrame(
+        {
+            "node": graph.nodes,
+            "community": pl.Series(rank[labels], dtype=pl.Int32),
+            "community_size": pl.Series(sizes[labels], dtype=pl.Int64),
+        }
+    )
+    return partition, score
+
+
+def join_communities(profiles: pl.DataFrame, partition: pl.DataFrame) -> pl.DataFrame:
+    """
+    为 `author_profiling` 追加 `community` / `community_size`（不在回复网络中的作者为 null）。
+    """
+    return profiles.join(
+        partition.rename({"node": AUTHOR_KEY}), on=AUTHOR_KEY, how="left"
+    )
+
+
+@instrumented("communities.community_composition")
+def community_composition(
+    partition: pl.DataFrame,
+    profiles: Optional[pl.DataFrame] = None,
+    content: Optional[pl.DataFrame] = None,
+    min_size: int = 3,
+) -> pl.DataFrame:
+    """
+    按社区汇总构成（只保留规模 ≥ `min_size` 的社区）：
+
+    - 立场构成：社区内已画像作者的 `tweet_stance_mode` 占比（`stance_<立场>`）
+    - 叙事构成：社区成员推文的 `primary_narrative` 占比（`narrative_<叙事>`）
+    """
+    summary = (
+        partition.filter(pl.col("community_size") >= min_size)
+        .group_by("community")
+        .agg(pl.len().alias("size"))
+    )
+    members = partition.select(pl.col("node").alias(AUTHOR_KEY), "community")
+
+    if profiles is not None and profiles.height:
+        stance = (
+            members.join(profiles.select(AUTHOR_KEY, "tweet_stance_mode"), on=AUTHOR_KEY)
+            .group_by("community")
+            .agg(
+                pl.len().alias("profiled_authors"),
+                *[(pl.col("tweet_stance_mode") == s).mean().alias(f"stance_{s}") for s in STANCES],
+            )
+        )
+        summary = summary.join(stance, on="community", how="left")
+
+    if content is not None and "primary_narrative" in content.columns:
+        narrative = (
+            members.join(content.select(AUTHOR_KEY, "primary_narrative"), on=AUTHOR_KEY)
+            .drop_nulls("primary_narrative")
+            .group_by("community", "primary_narrative")
+            .agg(pl.len().alias("n"))
+            .with_columns((pl.col("n") / pl.col("n").sum().over("community")).alias("share"))
+            .pivot("primary_narrative", index="community", values="share")
+            .with_columns(pl.exclude("community").fill_null(0.0))
+        )
+        narrative = narrative.rename({c: f"narrative_{c}" for c in narrative.columns if c != "community"})
+        summary = summary.join(narrative, on="community", how="left")
+
+    return summary.sort("community")
+
+
+@dataclass
+class CommunityStageResult:
+    """
+    `run_community_stage` 的输出路径与规模。
+    """
+
+    partition: Path
+    summary: Path
+    profiles: Optional[Path]
+    n_communities: int
+    modularity: float
+    composition: pl.DataFrame = field(repr=False, default_factory=pl.DataFrame)
+
+
+@instrumented("communities.run_community_stage")
+def run_community_stage(
+    source: Path,
+    output_dir: Path,
+    method: str = "louvain",
+    profiles_path: Optional[Path] = None,
+    content_path: Optional[Path] = None,
+    resolution: float = 1.0,
+    seed: int = 42,
+) -> CommunityStageResult:
+    """
+    从 `source`（如 tweets_enriched.parquet）构建回复网络并发现社区，输出：
+
+    - network_communities.parquet: 节点 → 社区
+    - community_summary.parquet: 每个社区的规模、立场构成与叙事构成
+    - author_communities.parquet: `author_profiling` 追加社区列（提供画像时）
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    tweets = pl.scan_parquet(source).select(SOURCE_COL, TARGET_COL).collect()
+    edges = prepare_network_projection(tweets, SOURCE_COL, TARGET_COL)
+    partition, score = detect_communities(edges, method=method, resolution=resolution, seed=seed)
+
+    profiles = pl.read_parquet(profiles_path) if profiles_path and Path(profiles_path).exists() else None
+    content = pl.read_parquet(content_path) if content_path and Path(content_path).exists() else None
+    composition = community_composition(partition, profiles, content)
+
+    paths = {
+        "partition": output_dir / "network_communities.parquet",
+        "summary": output_dir / "community_summary.parquet",
+        "profiles": output_dir / "author_communities.parquet" if profiles is not None else None,
+    }
+    io.materialize_parquet(partition.lazy(), paths["partition"])
+    io.materialize_parquet(composition.lazy(), paths["summary"])
+    if profiles is not None:
+        io.materialize_parquet(join_communities(profiles, partition).lazy(), paths["profiles"])
+    return CommunityStageResult(
+        **paths,
+        n_communities=int(partition["community"].n_unique()),
+        modularity=score,
+        composition=composition,
+    )
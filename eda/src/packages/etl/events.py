@@ -0,0 +1,110 @@
+"""
+事件数据集注册表。
+
+每个被追踪的事件在 `config/events.json` 中登记一项：
+
+    {
+      "<event-name>": {
+        "title": "...",
+        "data_dir": "__data/<dataset-dir>",       # 相对项目根目录
+        "raw_tweets": "<tweets>.csv",             # 相对 data_dir
+        "raw_authors": "<authors>.csv",           # 相对 data_dir，可省略
+        "event_timestamp": "2025-09-10T20:00:00+00:00",
+        "created_at_format": "%Y-%m-%d %H:%M:%S%#z"   # 可省略
+      }
+    }
+
+各事件的产出默认写入 `PARQUET_DIR / "events" / <event-name>`，互不覆盖；
+ID 字典统一位于 `ids.ID_DIR`（`PARQUET_DIR / "_ids"`），由所有事件以及 Notebook、
+报告共用，编码可跨事件合并、解码时无需知道数据来自哪个事件。
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from .analysis import CREATED_AT_FORMAT
+from .ids import ID_DIR
+from .io import PARQUET_DIR, PROJECT_ROOT
+
+
+EVENTS_CONFIG = PROJECT_ROOT / "config" / "events.json"
+EVENTS_OUTPUT_DIR = PARQUET_DIR / "events"
+
+
+@dataclass(frozen=True)
+class EventDataset:
+    """
+    单个事件的数据来源与输出位置。
+    """
+
+    name: str
+    title: str
+    raw_tweets: Path
+    raw_authors: Optional[Path]
+    event_timestamp: datetime
+    created_at_format: str = CREATED_AT_FORMAT
+    output_root: Path = EVENTS_OUTPUT_DIR
+    id_dir: Path = ID_DIR
+
+    @property
+    def output_dir(self) -> Path:
+        return self.output_root / self.name
+
+    def output_path(self, dataset: str) -> Path:
+        """
+        事件命名空间下的数据集路径，如 `output_path("tweets_enriched")`。
+        """
+        return self.output_dir / f"{dataset}.parquet"
+
+
+def _parse_event(name: str, spec: dict, output_root: Path, id_dir: Path) -> EventDataset:
+    missing = [key for key in ("data_dir", "raw_tweets", "event_timestamp") if key not in spec]
+    if missing:
+        raise ValueError(f"事件 {name} 缺少配置项: {missing}")
+
+    data_dir = PROJECT_ROOT / spec["data_dir"]
+    event_ts = datetime.fromisoformat(spec["event_timestamp"])
+    if event_ts.tzinfo is None:
+        raise ValueError(f"事件 {name} 的 event_timestamp 必须带时区: {spec['event_timestamp']}")
+
+    return EventDataset(
+        name=name,
+        title=spec.get("title", name),
+        raw_tweets=data_dir / spec["raw_tweets"],
+        raw_authors=data_dir / spec["raw_authors"] if spec.get("raw_authors") else None,
+        event_timestamp=event_ts,
+        created_at_format=spec.get("created_at_format", CREATED_AT_FORMAT),
+        output_root=output_root,
+        id_dir=id_dir,
+    )
+
+
+def load_events(
+    config_path: Path = EVENTS_CONFIG,
+    output_root: Path = EVENTS_OUTPUT_DIR,
+    id_dir: Path = ID_DIR,
+) -> dict[str, EventDataset]:
+    """
+    读取事件注册表，返回 `{name: EventDataset}`。
+
+    `id_dir` 仅在隔离运行（如临时目录中的试跑）时覆盖，正常情况下保持全局字典。
+    """
+    if not config_path.exists():
+        raise FileNotFoundError(f"未找到事件配置文件: {config_path}")
+    specs = json.loads(config_path.read_text(encoding="utf-8"))
+    return {name: _parse_event(name, spec, output_root, id_dir) for name, spec in specs.items()}
+
+
+def get_event(name: str, config_path: Path = EVENTS_CONFIG) -> EventDataset:
+    """
+    按名称获取单个事件定义。
+    """
+    events = load_events(config_path)
+    if name not in events:
+        raise KeyError(f"未注册的事件: {name}（可选: {sorted(events)}）")
+    return events[name]
@@ -0,0 +1,237 @@
+"""
+全局 ID 字典：字符串 ID → 连续的 Int32 编码。
+
+`pseudo_author_userName`、`pseudo_inReplyToUsername`、`pseudo_id`、`author_id`
+在接入阶段编码为 Int32，后续的合并、分组、网络构建都在整数上进行，
+只在展示结果时解码回原始 ID。
+
+- 命名空间：作者类 ID（发帖作者、回复对象、作者表的 `obfuscated_userName`）
+  共用 `user`，保证回复边与作者表能直接按编码合并；推文 ID 为 `tweet`，
+  原始作者 ID 为 `author`
+- 只追加：编码一经分配永不改变。每次新增写一个 `part-<起始编码>.parquet`
+  分片（仅一列 `key`，编码 = 起始编码 + 行号），跨进程以文件锁串行化
+- 键规范化：统一转为字符串并去掉 `@` 前缀，`123`、`"123"`、`"@123"` 视为同一 ID
+- 查找：每个命名空间缓存一份按 key 排序的字典，编码一块数据只需对块内的键做二分
+  查找（O(块大小 · log 字典大小)），不随字典增长重建哈希表；分块处理前可用
+  `reserve` 一次性登记全部键，整次运行只写一个分片
+"""
+
+from __future__ import annotations
+
+import fcntl
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+import polars as pl
+
+from .instrumentation import instrumented
+from .io import PARQUET_DIR
+
+
+ID_DIR = PARQUET_DIR / "_ids"
+CODE_DTYPE = pl.Int32
+MAX_CODE = 2**31 - 1
+
+# 列名 → 命名空间
+DEFAULT_ID_COLUMNS: dict[str, str] = {
+    "pseudo_author_userName": "user",
+    "pseudo_inReplyToUsername": "user",
+    "pseudo_id": "tweet",
+    "author_id": "author",
+}
+
+
+def normalize_key(expr: pl.Expr) -> pl.Expr:
+    """
+    ID 的规范字符串形式；空字符串视为缺失。
+    """
+    key = expr.cast(pl.Utf8).str.strip_prefix("@")
+    return pl.when(key == "").then(None).otherwise(key)
+
+
+def is_encoded(series: pl.Series) -> bool:
+    """
+    已编码的 ID 列为 Int32（原始 ID 为字符串或 Int64）。
+    """
+    return series.dtype == CODE_DTYPE
+
+
+class IdDictionary:
+    """
+    持久化的只追加 ID 字典。
+
+    参数
+    ----
+    directory:
+        字典根目录，每个命名空间一个子目录。多个事件 / 进程共用同一目录。
+    """
+
+    def __init__(self, directory: Path = ID_DIR) -> None:
+        self.directory = Path(directory)
+        self._tables: dict[str, pl.DataFrame] = {}
+        self._sorted: dict[str, pl.DataFrame] = {}
+        self._parts: dict[str, list[str]] = {}
+
+    # ------------------------------------------------------------------
+    # 存储
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _lock(self, namespace: str) -> Iterator[None]:
+        ns_dir = self.directory / namespace
+        ns_dir.mkdir(parents=True, exist_ok=True)
+        with open(ns_dir / ".lock", "w") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _refresh(self, namespace: str) -> pl.DataFrame:
+        # 只读取本进程尚未加载的分片（其他进程可能已追加）
+        ns_dir = self.directory / namespace
+        parts = sorted(p.name for p in ns_dir.glob("part-*.parquet")) if ns_dir.exists() else []
+        known = self._parts.get(namespace, [])
+        table = self._tables.get(namespace)
+        if table is None or parts[: len(known)] != known:
+            table, known = pl.DataFrame(schema={"key": pl.Utf8, "code": CODE_DTYPE}), []
+            self._sorted.pop(namespace, None)
+        frames = []
+        for name in parts[len(known):]:
+            start = int(name.removeprefix("part-").removesuffix(".parquet"))
+            frames.append(
+                pl.read_parquet(ns_dir / name).with_row_index("code", offset=start).select(
+                    "key", pl.col("code").cast(CODE_DTYPE)
+                )
+            )
+        if frames:
+            added = pl.concat(frames)
+            table = pl.concat([table, added])
+            if namespace in self._sorted:  # 已排序的查找表只需线性归并新增部分
+                self._sorted[namespace] = self._sorted[namespace].merge_sorted(added.sort("key"), key="key")
+        self._tables[namespace] = table
+        self._parts[namespace] = parts
+        return table
+
+    def table(self, namespace: str) -> pl.DataFrame:
+        """
+        命名空间的完整字典（`key`, `code`），编码连续且从 0 开始。
+        """
+        if namespace not in self._tables:
+            return self._refresh(namespace)
+        return self._tables[namespace]
+
+    def size(self, namespace: str) -> int:
+        return self.table(namespace).height
+
+    def _lookup(self, namespace: str, keys: pl.Series) -> pl.Series:
+        # 在按 key 排序的字典上二分查找；不存在的键（及 null）得到 null
+        ordered = self._sorted.get(namespace)
+        if ordered is None:
+            ordered = self._sorted[namespace] = self.table(namespace).sort("key")
+        if ordered.height == 0:
+            return pl.Series(keys.name, [None] * keys.len(), dtype=CODE_DTYPE)
+        pos = ordered["key"].search_sorted(keys.fill_null(""), side="left").clip(upper_bound=ordered.height - 1)
+        return (
+            pl.DataFrame({"key": keys, "found": ordered["key"].gather(pos), "code": ordered["code"].gather(pos)})
+            .select(pl.when(pl.col("key") == pl.col("found")).then(pl.col("code")).alias(keys.name))
+            .to_series()
+        )
+
+    def _insert(self, namespace: str, keys: pl.Series) -> None:
+        unique = keys.drop_nulls().unique(maintain_order=True)
+        if self._lookup(namespace, unique).null_count() == 0:
+            return  # 全部已登记：不加锁、不刷新
+        with self._lock(namespace):
+            self._refresh(namespace)  # 其他进程可能已登记了部分键
+            new = unique.filter(self._lookup(namespace, unique).is_null()).to_frame("key")
+            if new.height == 0:
+                return
+            table = self.table(namespace)
+            start = table.height
+            if start + new.height > MAX_CODE:
+                raise ValueError(f"ID 字典 {namespace} 超出 Int32 编码范围")
+            ns_dir = self.directory / namespace
+            name = f"part-{start:010d}.parquet"
+            tmp = ns_dir / f".{name}.{os.getpid()}.tmp"
+            new.write_parquet(tmp)
+            os.replace(tmp, ns_dir / name)
+            self._refresh(namespace)
+
+    @instrumented("ids.reserve")
+    def reserve(self, lf: pl.LazyFrame, columns: Optional[dict[str, str]] = None) -> dict[str, int]:
+        """
+        一次性登记 `lf` 中全部 ID 列的键（streaming 引擎去重，不物化整表），
+        返回各命名空间新增的编码数。
+
+        分块编码前调用：之后各块的 `encode` 只做查找，不再逐块写字典分片。
+        键的出现顺序决定编码，与逐块编码得到的编码一致。
+        """
+        columns = columns or DEFAULT_ID_COLUMNS
+        available = lf.collect_schema()
+        by_namespace: dict[str, list[str]] = {}
+        for col, namespace in columns.items():
+            if col in available and available[col] != CODE_DTYPE:
+                by_namespace.setdefault(namespace, []).append(col)
+        added = {}
+        for namespace, cols in by_namespace.items():
+            keys = (
+                pl.concat([lf.select(normalize_key(pl.col(c)).alias("key")) for c in cols])
+                .unique(maintain_order=True)
+                .collect(engine="streaming")["key"]
+            )
+            before = self.size(namespace)
+            self._insert(namespace, keys)
+            added[namespace] = self.size(namespace) - before
+        return added
+
+    # ------------------------------------------------------------------
+    # 编码 / 解码
+    # ------------------------------------------------------------------
+
+    @instrumented("ids.encode")
+    def encode(
+        self,
+        df: pl.DataFrame,
+        columns: Optional[dict[str, str]] = None,
+        insert: bool = True,
+    ) -> pl.DataFrame:
+        """
+        将 ID 列替换为 Int32 编码（已编码的列跳过）。
+
+        `insert=False` 时只查找已有编码，字典中不存在的 ID 编码为 null。
+        """
+        columns = columns or DEFAULT_ID_COLUMNS
+        for col, namespace in columns.items():
+            if col not in df.columns or is_encoded(df[col]):
+                continue
+            keys = df.select(normalize_key(pl.col(col)).alias("key"))["key"]
+            if insert:
+                self._insert(namespace, keys)
+            df = df.with_columns(self._lookup(namespace, keys).alias(col))
+        return df
+
+    @instrumented("ids.decode")
+    def decode(self, df: pl.DataFrame, columns: Optional[dict[str, str]] = None) -> pl.DataFrame:
+        """
+        将 Int32 编码还原为原始 ID 字符串（未编码的列跳过）。
+        """
+        columns = columns or DEFAULT_ID_COLUMNS
+        for col, namespace in columns.items():
+            if col not in df.columns or not is_encoded(df[col]):
+                continue
+            keys = self.table(namespace)["key"]
+            if df[col].max() is not None and df[col].max() >= keys.len():
+                keys = self._refresh(namespace)["key"]
+            df = df.with_columns(keys.gather(df[col]).alias(col))
+        return df
+
+    def encode_authors(self, authors: pl.DataFrame, col: str = "obfuscated_userName") -> pl.DataFrame:
+        """
+        为作者表添加 `obfuscated_userName_int`（`user` 命名空间的编码），
+        供 `analysis.join_author_metadata` 与已编码的推文合并。
+        """
+        encoded = self.encode(authors.select(pl.col(col).alias("__key")), {"__key": "user"})
+        return authors.with_columns(encoded["__key"].alias(f"{col}_int"))
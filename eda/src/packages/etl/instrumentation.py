@@ -0,0 +1,377 @@
+"""
+ETL 阶段级性能埋点。
+
+默认关闭，开启后对被装饰的 io / analysis / profiling 函数逐次记录：
+- 墙钟时间与 CPU 时间
+- 调用期间的峰值 RSS 内存
+- 输入 / 输出行数（DataFrame 直接取 height，LazyFrame 不触发计算）
+- LazyFrame 的优化后查询计划（`LazyFrame.explain()`）
+
+记录以 JSON Lines 追加到 `etl_stages.jsonl`，同时按阶段累计（次数、耗时之和、
+峰值等）并写为 Prometheus textfile，供 node_exporter 的 textfile collector 采集。
+主进程写 `etl.prom`；进程池工作进程各写 `etl.<pid>.prom` 并带 `pid` 标签，
+互不覆盖，计数器不会因其他进程的写入而回退。内存中只保留最近的
+`max_records` 条明细，长时间运行的进程（实时接入、报告服务）内存不随调用次数增长。
+
+开启方式：
+- 代码中调用 `enable(metrics_dir)`
+- 或设置环境变量 `ETL_METRICS_DIR`，模块导入时自动开启
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import multiprocessing
+import os
+import resource
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+import polars as pl
+
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+JSONL_NAME = "etl_stages.jsonl"
+PROM_NAME = "etl.prom"
+MAX_RECORDS = 10_000
+
+
+@dataclass
+class StageRecord:
+    """
+    单次阶段调用的度量结果。
+    """
+
+    stage: str
+    started_at: float
+    wall_seconds: float
+    cpu_seconds: float
+    peak_rss_bytes: int
+    rss_delta_bytes: int
+    rows_in: Optional[int]
+    rows_out: Optional[int]
+    plan: Optional[str] = None
+    error: Optional[str] = None
+    extra: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class _State:
+    enabled: bool = False
+    metrics_dir: Optional[Path] = None
+    capture_plan: bool = True
+    sample_interval: float = 0.01
+    records: deque[StageRecord] = field(default_factory=lambda: deque(maxlen=MAX_RECORDS))
+    # 阶段名 → 累计指标，Prometheus 输出只依赖这里，与明细条数无关
+    aggregates: dict[str, dict[str, float]] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+_STATE = _State()
+_ACTIVE = threading.local()
+# 串行化 textfile 写入：并发线程各自渲染时，较旧的快照不能覆盖较新的
+_WRITE_LOCK = threading.Lock()
+
+
+def enable(
+    metrics_dir: Optional[Path] = None,
+    capture_plan: bool = True,
+    sample_interval: float = 0.01,
+    max_records: int = MAX_RECORDS,
+) -> None:
+    """
+    开启埋点。`metrics_dir` 为空时只在内存中保留记录，不落盘。
+
+    `max_records` 为内存中保留的明细条数上限（更早的明细仍在 JSONL 中）。
+    """
+    _STATE.enabled = True
+    if _STATE.records.maxlen != max_records:
+        with _STATE.lock:
+            _STATE.records = deque(_STATE.records, maxlen=max_records)
+    _STATE.metrics_dir = Path(metrics_dir) if metrics_dir is not None else None
+    _STATE.capture_plan = capture_plan
+    _STATE.sample_interval = sample_interval
+    if _STATE.metrics_dir is not None:
+        _STATE.metrics_dir.mkdir(parents=True, exist_ok=True)
+
+
+def disable() -> None:
+    """
+    关闭埋点，已有记录保留。
+    """
+    _STATE.enabled = False
+
+
+def is_enabled() -> bool:
+    return _STATE.enabled
+
+
+def records() -> list[StageRecord]:
+    """
+    返回本进程内最近采集的记录副本（最多 `max_records` 条）。
+    """
+    with _STATE.lock:
+        return list(_STATE.records)
+
+
+def reset() -> None:
+    """
+    清空内存中的记录与累计指标（不影响已落盘的文件）。
+    """
+    with _STATE.lock:
+        _STATE.records.clear()
+        _STATE.aggregates.clear()
+
+
+def records_frame() -> pl.DataFrame:
+    """
+    将记录转为 DataFrame，便于在 Notebook 中排查慢阶段。
+    """
+    rows = [{k: v for k, v in asdict(r).items() if k not in ("plan", "extra")} for r in records()]
+    return pl.DataFrame(rows) if rows else pl.DataFrame()
+
+
+def active_stages() -> list[str]:
+    """
+    当前线程正在执行的阶段名，由外到内（埋点关闭时为空），供输出登记产出阶段。
+    """
+    return list(getattr(_ACTIVE, "stages", []))
+
+
+def current_rss_bytes() -> int:
+    """
+    读取当前进程 RSS。Linux 下读取 /proc，其他平台退化为 ru_maxrss。
+    """
+    try:
+        with open("/proc/self/statm", "rb") as fh:
+            pages = int(fh.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS 返回字节，Linux 返回 KB
+        return usage if os.uname().sysname == "Darwin" else usage * 1024
+
+
+class PeakSampler:
+    """
+    后台线程周期采样 RSS，记录调用期间的峰值。
+    Polars 的分配发生在 Rust 侧，tracemalloc 无法感知，因此采用 RSS 采样。
+    """
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.peak = current_rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss_bytes())
+
+    def __enter__(self) -> "PeakSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss_bytes())
+
+
+def _row_count(obj: Any) -> Optional[int]:
+    if isinstance(obj, pl.DataFrame):
+        return obj.height
+    if isinstance(obj, pl.Series):
+        return obj.len()
+    return None
+
+
+def _explain(obj: Any) -> Optional[str]:
+    if not isinstance(obj, pl.LazyFrame):
+        return None
+    try:
+        return obj.explain(optimized=True)
+    except Exception as exc:  # 计划获取失败不应影响业务
+        return f"<explain failed: {exc}>"
+
+
+def _append_jsonl(record: StageRecord) -> None:
+    if _STATE.metrics_dir is None:
+        return
+    path = _STATE.metrics_dir / JSONL_NAME
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write(json.dumps(asdict(record), ensure_ascii=False, default=str) + "\n")
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _accumulate(agg: dict[str, dict[str, float]], r: StageRecord) -> None:
+    a = agg.setdefault(
+        r.stage,
+        {"calls": 0, "errors": 0, "wall": 0.0, "cpu": 0.0, "rows_out": 0, "peak": 0, "last_wall": 0.0, "last_ts": 0.0},
+    )
+    a["calls"] += 1
+    a["errors"] += 1 if r.error else 0
+    a["wall"] += r.wall_seconds
+    a["cpu"] += r.cpu_seconds
+    a["rows_out"] += r.rows_out or 0
+    a["peak"] = max(a["peak"], r.peak_rss_bytes)
+    a["last_wall"] = r.wall_seconds
+    a["last_ts"] = r.started_at + r.wall_seconds
+
+
+def _is_worker() -> bool:
+    return multiprocessing.parent_process() is not None
+
+
+def render_prometheus(
+    stage_records: Optional[list[StageRecord]] = None, labels: Optional[dict[str, str]] = None
+) -> str:
+    """
+    Prometheus 文本暴露格式。`stage_records` 为空时使用本进程的累计指标；
+    `labels` 为附加到每个序列的标签（如工作进程的 `pid`）。
+    """
+    if stage_records is None:
+        with _STATE.lock:
+            agg = {stage: dict(values) for stage, values in _STATE.aggregates.items()}
+    else:
+        agg = {}
+        for r in stage_records:
+            _accumulate(agg, r)
+    extra = "".join(f',{k}="{_escape_label(v)}"' for k, v in (labels or {}).items())
+
+    metrics = [
+        ("etl_stage_calls_total", "counter", "Number of stage invocations.", "calls"),
+        ("etl_stage_errors_total", "counter", "Number of failed stage invocations.", "errors"),
+        ("etl_stage_wall_seconds_total", "counter", "Cumulative wall-clock seconds per stage.", "wall"),
+        ("etl_stage_cpu_seconds_total", "counter", "Cumulative CPU seconds per stage.", "cpu"),
+        ("etl_stage_rows_out_total", "counter", "Cumulative output rows per stage.", "rows_out"),
+        ("etl_stage_peak_rss_bytes", "gauge", "Highest process RSS observed during the stage.", "peak"),
+        ("etl_stage_last_wall_seconds", "gauge", "Wall-clock seconds of the most recent invocation.", "last_wall"),
+        ("etl_stage_last_completed_timestamp_seconds", "gauge", "Unix time the most recent invocation finished.", "last_ts"),
+    ]
+    lines: list[str] = []
+    for name, kind, help_text, key in metrics:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for stage in sorted(agg):
+            lines.append(f'{name}{{stage="{_escape_label(stage)}"{extra}}} {agg[stage][key]}')
+    return "\n".join(lines) + "\n"
+
+
+def _write_prometheus() -> None:
+    if _STATE.metrics_dir is None:
+        return
+    # 工作进程写各自的文件并带 pid 标签，避免与主进程 / 其他工作进程互相覆盖
+    worker = _is_worker()
+    path = _STATE.metrics_dir / (f"etl.{os.getpid()}.prom" if worker else PROM_NAME)
+    tmp = path.with_name(f".{path.name}.tmp")
+    with _WRITE_LOCK:
+        tmp.write_text(render_prometheus(labels={"pid": str(os.getpid())} if worker else None), encoding="utf-8")
+        # textfile collector 要求原子替换，避免读到半截文件
+        os.replace(tmp, path)
+
+
+def _emit(record: StageRecord) -> None:
+    with _STATE.lock:
+        _STATE.records.append(record)
+        _accumulate(_STATE.aggregates, record)
+    _append_jsonl(record)
+    _write_prometheus()
+
+
+@contextmanager
+def stage(name: str, rows_in: Optional[int] = None, **extra: Any) -> Iterator[dict[str, Any]]:
+    """
+    以上下文管理器形式记录任意代码块，适合 Notebook 中的非函数步骤。
+
+    产出的字典可写入 `rows_out` / `plan` 等字段补充结果信息：
+
+        with instrumentation.stage("intake.collect") as m:
+            df = raw_lf.collect()
+            m["rows_out"] = df.height
+    """
+    if not _STATE.enabled:
+        yield {}
+        return
+
+    info: dict[str, Any] = {}
+    error: Optional[str] = None
+    rss_before = current_rss_bytes()
+    wall0, cpu0, started = time.perf_counter(), time.process_time(), time.time()
+    sampler = PeakSampler(_STATE.sample_interval)
+    active = _ACTIVE.__dict__.setdefault("stages", [])
+    active.append(name)
+    try:
+        with sampler:
+            yield info
+    except BaseException as exc:
+        error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        active.pop()
+        _emit(
+            StageRecord(
+                stage=name,
+                started_at=started,
+                wall_seconds=time.perf_counter() - wall0,
+                cpu_seconds=time.process_time() - cpu0,
+                peak_rss_bytes=sampler.peak,
+                rss_delta_bytes=sampler.peak - rss_before,
+                rows_in=rows_in,
+                rows_out=info.pop("rows_out", None),
+                plan=info.pop("plan", None),
+                error=error,
+                extra={**extra, **info},
+            )
+        )
+
+
+def instrumented(name: str) -> Callable[[F], F]:
+    """
+    函数装饰器：埋点关闭时直接透传，开销仅为一次布尔判断。
+
+    输入行数取第一个 DataFrame 参数；若输入或输出为 LazyFrame，
+    且开启了 `capture_plan`，则记录其优化后的查询计划。
+    """
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _STATE.enabled:
+                return func(*args, **kwargs)
+
+            frames = [a for a in (*args, *kwargs.values()) if isinstance(a, (pl.DataFrame, pl.LazyFrame))]
+            rows_in = next((_row_count(a) for a in frames if isinstance(a, pl.DataFrame)), None)
+            with stage(name, rows_in=rows_in) as info:
+                result = func(*args, **kwargs)
+                info["rows_out"] = _row_count(result)
+                if _STATE.capture_plan:
+                    info["plan"] = _explain(result) or next((_explain(a) for a in frames), None)
+            return result
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def _reset_in_child() -> None:
+    # fork 出的工作进程继承了父进程的明细与累计值，清空后只统计自身，避免重复计数
+    _STATE.records.clear()
+    _STATE.aggregates.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_in_child)
+
+if os.environ.get("ETL_METRICS_DIR"):
+    enable(Path(os.environ["ETL_METRICS_DIR"]))
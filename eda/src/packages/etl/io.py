@@ -9,11 +9,20 @@
 
 from __future__ import annotations
 
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
 from pathlib import Path
-from typing import Iterable, Iterator, Optional
+from typing import Any, Iterable, Iterator, Optional
 
 import polars as pl
 
+from .instrumentation import active_stages, instrumented
+
 
 # 路径定义：io.py 在 src/packages/etl/，需要回到项目根目录
 # src/packages/etl/io.py -> parent -> src/packages/ -> parent -> src/ -> parent -> eda/
@@ -23,8 +32,27 @@ RAW_TWEETS = DATA_DIR / "for_export_charlie_kirk.csv"
 RAW_AUTHORS = DATA_DIR / "well_known_authors_charlie_kirk.csv"
 PARQUET_DIR = PROJECT_ROOT / "src" / "notebooks" / "parquet"
 
+# 数据集清单：与 Parquet 输出同目录，记录 schema / 行数 / key 范围 / 内容哈希
+MANIFEST_NAME = "_manifest.json"
+# Parquet 目录索引：逐文件缓存 footer（schema、row group、列统计），见 `ParquetCatalog`
+CATALOG_NAME = "_catalog.json"
+DEFAULT_ROW_GROUP_SIZE = 128_000
+
+# 原始推文中需要按字符串读入的列，避免类型推断在大文件中途失败
+RAW_TWEET_DTYPES: dict[str, pl.PolarsDataType] = {
+    "created_at": pl.Utf8,
+    "author_id": pl.Utf8,
+    "lang": pl.Utf8,
+    "isReply": pl.Utf8,
+    "author_isBlueVerified": pl.Utf8,
+}
 
-def scan_raw_tweets(dtypes: Optional[dict[str, pl.PolarsDataType]] = None) -> pl.LazyFrame:
+
+@instrumented("io.scan_raw_tweets")
+def scan_raw_tweets(
+    dtypes: Optional[dict[str, pl.PolarsDataType]] = None,
+    path: Path = RAW_TWEETS,
+) -> pl.LazyFrame:
     """
     使用 Polars scan_csv 流式加载原始推文数据。
 
@@ -32,61 +60,576 @@ def scan_raw_tweets(dtypes: Optional[dict[str, pl.PolarsDataType]] = None) -> pl
     ----
     dtypes:
         可选的列类型映射，用于覆盖默认推断。
+    path:
+        原始推文 CSV，默认为当前事件数据集（见 `events` 注册表）。
     """
-    if not RAW_TWEETS.exists():
-        raise FileNotFoundError(f"未找到原始推文文件: {RAW_TWEETS}")
+    if not path.exists():
+        raise FileNotFoundError(f"未找到原始推文文件: {path}")
 
-    default_dtypes = {
-        "created_at": pl.Utf8,
-        "author_id": pl.Utf8,
-        "lang": pl.Utf8,
-        "isReply": pl.Utf8,
-        "author_isBlueVerified": pl.Utf8,
-    }
-    schema = {**default_dtypes, **(dtypes or {})}
-    return pl.scan_csv(RAW_TWEETS, dtypes=schema, ignore_errors=True)
+    schema = {**RAW_TWEET_DTYPES, **(dtypes or {})}
+    return pl.scan_csv(path, dtypes=schema, ignore_errors=True)
 
 
-def read_well_known_authors() -> pl.DataFrame:
+@instrumented("io.read_well_known_authors")
+def read_well_known_authors(path: Path = RAW_AUTHORS) -> pl.DataFrame:
     """
     读取知名作者信息表，并进行基础清洗（去除重复、规范字段名）。
     """
-    if not RAW_AUTHORS.exists():
-        raise FileNotFoundError(f"未找到作者元数据文件: {RAW_AUTHORS}")
+    if not path.exists():
+        raise FileNotFoundError(f"未找到作者元数据文件: {path}")
 
-    df = pl.read_csv(RAW_AUTHORS, ignore_errors=True)
+    df = pl.read_csv(path, ignore_errors=True)
     df = df.unique(subset=["author_userName"], maintain_order=True)
     return df.rename({col: col.strip() for col in df.columns})
 
 
-def materialize_parquet(lf: pl.LazyFrame, output_path: Path, partitions: Optional[list[str]] = None) -> None:
+@instrumented("io.materialize_parquet")
+def materialize_parquet(
+    lf: pl.LazyFrame,
+    output_path: Path,
+    partitions: Optional[list[str]] = None,
+    sort_by: Optional[str | list[str]] = None,
+    row_group_size: Optional[int] = DEFAULT_ROW_GROUP_SIZE,
+    manifest: bool = True,
+    stage: Optional[str] = None,
+) -> None:
     """
     将 LazyFrame 实体化为 Parquet 文件，可选按字段分区。
+
+    参数
+    ----
+    sort_by:
+        排序键（如 `createdAt`）。按键有序写入后，每个 row group 的 min/max
+        区间互不重叠，读取端的谓词下推可以整组跳过。首个键同时作为清单中
+        记录 min/max 的 key。
+    row_group_size:
+        目标 row group 行数，兼顾统计粒度与元数据体积。
+    manifest:
+        是否在输出目录的 `_manifest.json` 中登记本数据集。
+    stage:
+        产出阶段名，登记到清单；为空时取正在执行的埋点阶段。
+
+    写入先落到同目录的临时路径，完成后通过 rename 原子替换目标，
+    读取端不会看到写了一半的文件。
     """
+    output_path = Path(output_path)
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    if partitions:
-        lf.sink_parquet(output_path, compression="zstd", partition_by=partitions)
+    sort_keys = [sort_by] if isinstance(sort_by, str) else list(sort_by or [])
+    if sort_keys:
+        lf = lf.sort(sort_keys)
+
+    tmp_path = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
+    try:
+        # 分区与单文件共用同一组写出参数（完整统计 + row group 行数）
+        target = pl.PartitionByKey(tmp_path, by=partitions) if partitions else tmp_path
+        lf.sink_parquet(
+            target,
+            compression="zstd",
+            statistics="full",
+            row_group_size=row_group_size,
+            mkdir=True,
+        )
+        _atomic_replace(tmp_path, output_path)
+    finally:
+        _remove_path(tmp_path)
+
+    if manifest:
+        record_manifest_entry(output_path, key=sort_keys[0] if sort_keys else None, stage=stage)
+
+
+def publish_dataset(source: Path, directory: Path = PARQUET_DIR, key: Optional[str] = None) -> Path:
+    """
+    将事件命名空间下的数据集复制到 `directory`（默认 `PARQUET_DIR`），供按固定路径
+    读取的下游 Notebook 与报告使用。先复制到同目录临时路径再原子替换，并登记清单。
+    """
+    source = Path(source)
+    target = Path(directory) / source.name
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    try:
+        if source.is_dir():
+            shutil.copytree(source, tmp_path)
+        else:
+            shutil.copyfile(source, tmp_path)
+        _atomic_replace(tmp_path, target)
+    finally:
+        _remove_path(tmp_path)
+    record_manifest_entry(target, key=key)
+    return target
+
+
+def _remove_path(path: Path) -> None:
+    if path.is_dir():
+        shutil.rmtree(path, ignore_errors=True)
+    elif path.exists():
+        path.unlink()
+
+
+def _atomic_replace(src: Path, dst: Path) -> None:
+    """
+    用 src 替换 dst。单文件直接 os.replace；分区目录无法原子覆盖非空目录，
+    先将旧目录挪开再换入新目录，窗口期仅为两次 rename。
+    """
+    if src.is_dir() and dst.exists():
+        backup = dst.with_name(f".{dst.name}.{os.getpid()}.old")
+        os.replace(dst, backup)
+        os.replace(src, dst)
+        _remove_path(backup)
     else:
-        lf.sink_parquet(output_path, compression="zstd")
+        os.replace(src, dst)
+
+
+def _dataset_files(path: Path) -> list[Path]:
+    return sorted(path.glob("**/*.parquet")) if path.is_dir() else [path]
 
 
-def iter_batches(path: Path, batch_size: int = 100_000) -> Iterator[pl.DataFrame]:
+def content_hash(path: Path, chunk_size: int = 1 << 20) -> str:
     """
-    以指定批大小迭代读取 Parquet 数据。
+    计算数据集内容哈希（分区目录按相对路径有序拼接）。
+
+    需要完整读取每个文件的全部字节，开销与数据集大小成正比（顺序读，不解码）。
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for file in _dataset_files(path):
+        if path.is_dir():
+            digest.update(str(file.relative_to(path)).encode())
+        with open(file, "rb") as fh:
+            for chunk in iter(lambda: fh.read(chunk_size), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
 
-    说明：Polars 当前尚未在 Python API 中暴露原生的 streaming batch 读取接口，
-    因此这里采用 collect 后再切片的方式作为占位实现。若数据规模导致内存压力，
-    建议切换为 `pyarrow.parquet.ParquetFile.iter_batches` 等底层方案。
+@contextmanager
+def _manifest_lock(directory: Path, name: str = MANIFEST_NAME) -> Iterator[None]:
+    # 多进程同时写同一目录时串行化清单 / 索引的读-改-写
+    with open(directory / f"{name}.lock", "w") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def read_manifest(directory: Path = PARQUET_DIR) -> dict[str, dict[str, Any]]:
+    """
+    读取目录下的数据集清单，键为相对该目录的数据集路径。
+    """
+    path = Path(directory) / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _producing_stage() -> Optional[str]:
+    # 最内层的非 io 阶段，即调用 materialize_parquet 的业务阶段
+    return next((name for name in reversed(active_stages()) if not name.startswith("io.")), None)
+
+
+def _footer_key_range(files: list[Path], key: str) -> Optional[tuple[Any, Any]]:
+    # 由各 row group footer 中 key 列的 min / max 合并出整体范围；任一含非空值的
+    # row group 缺少统计（未写统计、key 为 hive 分区列等）时返回 None，由调用方回退到扫描
+    import pyarrow.parquet as pq
+
+    lo = hi = None
+    for file in files:
+        metadata = pq.read_metadata(file)
+        for i in range(metadata.num_row_groups):
+            row_group = metadata.row_group(i)
+            column = next(
+                (row_group.column(j) for j in range(row_group.num_columns)
+                 if row_group.column(j).path_in_schema == key),
+                None,
+            )
+            stats = column.statistics if column is not None else None
+            if stats is not None and stats.has_null_count and stats.null_count == row_group.num_rows:
+                continue
+            if stats is None or not stats.has_min_max:
+                return None
+            lo = stats.min if lo is None else min(lo, stats.min)
+            hi = stats.max if hi is None else max(hi, stats.max)
+    return lo, hi
+
+
+def record_manifest_entry(
+    output_path: Path, key: Optional[str] = None, stage: Optional[str] = None
+) -> dict[str, Any]:
+    """
+    统计已写入数据集的 schema、行数、key 的 min/max 与内容哈希，并登记到清单。
+
+    schema、行数与 key 的 min/max 取自 Parquet footer（行数与 row group 统计），
+    不读取数据页；只有 footer 缺少 key 的统计时才回退为扫描该列。
+    内容哈希（`content_hash`）仍需顺序读取全部字节，写入大数据集时这是主要开销。
+    """
+    import pyarrow.parquet as pq
+
+    output_path = Path(output_path)
+    directory = output_path.parent
+    files = _dataset_files(output_path)
+    scan = pl.scan_parquet(files)
+    schema = scan.collect_schema()
+
+    stats: dict[str, Any] = {"row_count": sum(pq.read_metadata(f).num_rows for f in files)}
+    if key is not None and key in schema:
+        key_range = _footer_key_range(files, key)
+        if key_range is None:
+            key_range = scan.select(pl.col(key).min().alias("min"), pl.col(key).max().alias("max")).collect().row(0)
+        stats["key_min"], stats["key_max"] = key_range
+
+    entry = {
+        "path": output_path.name,
+        "files": [str(f.relative_to(directory)) for f in files],
+        "schema": {name: str(dtype) for name, dtype in schema.items()},
+        "row_count": stats["row_count"],
+        "key": key if "key_min" in stats else None,
+        "key_min": _json_scalar(stats.get("key_min")),
+        "key_max": _json_scalar(stats.get("key_max")),
+        "size_bytes": sum(f.stat().st_size for f in files),
+        "content_hash": content_hash(output_path),
+        "stage": stage or _producing_stage(),
+        "written_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+    with _manifest_lock(directory):
+        manifest = read_manifest(directory)
+        manifest[output_path.name] = entry
+        tmp = directory / f".{MANIFEST_NAME}.{os.getpid()}.tmp"
+        tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, directory / MANIFEST_NAME)
+    return entry
+
+
+def _json_scalar(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def scan_dataset(
+    path: Path,
+    key_min: Any = None,
+    key_max: Any = None,
+) -> pl.LazyFrame:
+    """
+    依据清单规划扫描：key 区间与清单记录的 [key_min, key_max] 无交集时
+    直接返回空 LazyFrame（不读取任何数据页），否则附加区间过滤交给谓词下推。
     """
-    df = pl.read_parquet(path)
-    for batch in df.iter_slices(n_rows=batch_size):
-        yield batch
+    path = Path(path)
+    entry = read_manifest(path.parent).get(path.name)
+    if entry is None:
+        return pl.scan_parquet(path if path.is_file() else _dataset_files(path))
+
+    files = [path.parent / f for f in entry["files"]]
+    key = entry.get("key")
+    if key is None or (key_min is None and key_max is None):
+        return pl.scan_parquet(files)
+
+    lo, hi = _json_scalar(key_min), _json_scalar(key_max)
+    entry_min, entry_max = entry["key_min"], entry["key_max"]
+    try:
+        disjoint = (lo is not None and entry_max is not None and lo > entry_max) or (
+            hi is not None and entry_min is not None and hi < entry_min
+        )
+    except TypeError:
+        disjoint = False
+
+    lf = pl.scan_parquet(files)
+    if disjoint:
+        return lf.head(0)
+    if key_min is not None:
+        lf = lf.filter(pl.col(key) >= key_min)
+    if key_max is not None:
+        lf = lf.filter(pl.col(key) <= key_max)
+    return lf
+
+
+def iter_batches(path: Path, batch_size: int = 100_000, columns: Optional[list[str]] = None) -> Iterator[pl.DataFrame]:
+    """
+    以指定批大小迭代读取 Parquet 数据（文件或分区目录）。
+
+    基于 `pyarrow.parquet.ParquetFile.iter_batches` 逐 row group 解码，
+    内存占用与批大小而非文件大小成正比；`columns` 可进一步裁剪读取的列。
+    """
+    import pyarrow.parquet as pq
+
+    for file in _dataset_files(Path(path)):
+        parquet_file = pq.ParquetFile(file)
+        for record_batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+            yield pl.from_arrow(record_batch)
+
+
+def _catalog_scalar(value: Any) -> Any:
+    # footer 统计值转为 JSON；bytes / Decimal 等无法可靠比较的类型不参与裁剪
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return None
+
+
+def _comparable(stored: Any, bound: Any) -> Any:
+    # 将索引中的统计值还原为与查询边界同类、可比较的值
+    if isinstance(stored, str) and isinstance(bound, datetime):
+        value = datetime.fromisoformat(stored)
+        if value.tzinfo is None and bound.tzinfo is not None:
+            return value.replace(tzinfo=timezone.utc)
+        if value.tzinfo is not None and bound.tzinfo is None:
+            return value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+    if isinstance(stored, str) and isinstance(bound, date):
+        return date.fromisoformat(stored[:10])
+    if isinstance(stored, str) and isinstance(bound, (int, float)) and not isinstance(bound, bool):
+        return float(stored)
+    return stored
+
+
+def _may_overlap(stats: Optional[dict[str, Any]], num_rows: int, lo: Any, hi: Any) -> bool:
+    """
+    row group 的 [min, max] 是否可能与 [lo, hi] 相交；空 row group 不相交，
+    缺少统计或类型不可比较时保守地返回 True。
+    """
+    if num_rows == 0:
+        return False
+    if stats is None:
+        return True
+    if stats.get("null_count") == num_rows:
+        return False
+    try:
+        if lo is not None and stats.get("max") is not None and _comparable(stats["max"], lo) < lo:
+            return False
+        if hi is not None and stats.get("min") is not None and _comparable(stats["min"], hi) > hi:
+            return False
+    except (TypeError, ValueError):
+        return True
+    return True
+
+
+class ParquetCatalog:
+    """
+    目录下全部 Parquet 文件的 footer 索引，持久化为 `_catalog.json`。
+
+    每个文件记录 schema、行数、大小、修改时间、所属数据集与产出阶段（取自
+    数据集清单），以及逐 row group 的行数和每列 min / max / null 数。
+    `refresh` 只重新读取 mtime 或大小变化过的文件的 footer，数千个分区文件
+    也只需一次目录遍历加 stat；查询完全在索引上完成，不打开数据文件。
+
+    以 `.` 或 `_` 开头的文件 / 目录（临时文件、`_ids` 等内部状态）不纳入索引。
+    """
+
+    def __init__(self, directory: Path = PARQUET_DIR) -> None:
+        self.directory = Path(directory)
+        self.path = self.directory / CATALOG_NAME
+        self.entries: dict[str, dict[str, Any]] = {}
+        self._loaded_mtime: Optional[int] = None
+
+    # ------------------------------------------------------------------
+    # 索引维护
+    # ------------------------------------------------------------------
+
+    def _load(self) -> None:
+        # 其他进程刷新过索引时重新读取
+        if not self.path.exists():
+            return
+        mtime = self.path.stat().st_mtime_ns
+        if mtime != self._loaded_mtime:
+            self.entries = json.loads(self.path.read_text(encoding="utf-8"))
+            self._loaded_mtime = mtime
+
+    def _scan_files(self) -> list[Path]:
+        if not self.directory.exists():
+            return []
+        return sorted(
+            f for f in self.directory.glob("**/*.parquet")
+            if not any(part.startswith((".", "_")) for part in f.relative_to(self.directory).parts)
+        )
+
+    def _datasets(self) -> dict[Path, tuple[str, Optional[str]]]:
+        # 文件 → (数据集名, 产出阶段)，来自各级目录的数据集清单
+        owners: dict[Path, tuple[str, Optional[str]]] = {}
+        for manifest_path in self.directory.glob(f"**/{MANIFEST_NAME}"):
+            for name, entry in read_manifest(manifest_path.parent).items():
+                for f in entry.get("files", []):
+                    owners[manifest_path.parent / f] = (name, entry.get("stage"))
+        return owners
+
+    def _index_file(
+        self, file: Path, stat: os.stat_result, owner: Optional[tuple[str, Optional[str]]]
+    ) -> dict[str, Any]:
+        import pyarrow.parquet as pq
+
+        metadata = pq.read_metadata(file)
+        row_groups = []
+        for i in range(metadata.num_row_groups):
+            row_group = metadata.row_group(i)
+            columns = {}
+            for j in range(row_group.num_columns):
+                column = row_group.column(j)
+                stats = column.statistics
+                has_min_max = stats is not None and stats.has_min_max
+                columns[column.path_in_schema] = {
+                    "min": _catalog_scalar(stats.min) if has_min_max else None,
+                    "max": _catalog_scalar(stats.max) if has_min_max else None,
+                    "null_count": stats.null_count if stats is not None and stats.has_null_count else None,
+                }
+            row_groups.append({"num_rows": row_group.num_rows, "columns": columns})
+
+        relative = file.relative_to(self.directory)
+        return {
+            "path": relative.as_posix(),
+            "dataset": owner[0] if owner else relative.parts[0],
+            "stage": owner[1] if owner else None,
+            "schema": {name: str(dtype) for name, dtype in pl.read_parquet_schema(file).items()},
+            # hive 分区目录（key=value）中的分区值，文件内不含这些列
+            "partitions": dict(part.split("=", 1) for part in relative.parent.parts if "=" in part),
+            "num_rows": metadata.num_rows,
+            "size_bytes": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "row_groups": row_groups,
+        }
+
+    @instrumented("io.catalog_refresh")
+    def refresh(self) -> int:
+        """
+        增量刷新索引，返回重新读取 footer 的文件数。
+        """
+        if not self.directory.exists():
+            return 0
+        with _manifest_lock(self.directory, CATALOG_NAME):
+            self._load()
+            files = self._scan_files()
+            current = {f.relative_to(self.directory).as_posix(): f for f in files}
+            removed = [key for key in self.entries if key not in current]
+            owners: Optional[dict[Path, tuple[str, Optional[str]]]] = None
+            indexed = 0
+            for key, file in current.items():
+                try:
+                    stat = file.stat()
+                except FileNotFoundError:
+                    continue
+                entry = self.entries.get(key)
+                if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size_bytes"] == stat.st_size:
+                    continue
+                owners = self._datasets() if owners is None else owners
+                self.entries[key] = self._index_file(file, stat, owners.get(file))
+                indexed += 1
+            for key in removed:
+                del self.entries[key]
+
+            if indexed or removed or not self.path.exists():
+                tmp = self.directory / f".{CATALOG_NAME}.{os.getpid()}.tmp"
+                tmp.write_text(json.dumps(self.entries, ensure_ascii=False, sort_keys=True), encoding="utf-8")
+                os.replace(tmp, self.path)
+                self._loaded_mtime = self.path.stat().st_mtime_ns
+        return indexed
+
+    # ------------------------------------------------------------------
+    # 查询（只读索引）
+    # ------------------------------------------------------------------
+
+    def _entries(self, dataset: Optional[str] = None) -> list[dict[str, Any]]:
+        return [e for _, e in sorted(self.entries.items()) if dataset is None or e["dataset"] == dataset]
+
+    def files(self, dataset: Optional[str] = None) -> list[Path]:
+        return [self.directory / e["path"] for e in self._entries(dataset)]
+
+    def frame(self) -> pl.DataFrame:
+        """
+        每个文件一行的概览（数据集、阶段、行数、row group 数、大小、列数、修改时间）。
+        """
+        rows = [
+            {
+                "path": e["path"],
+                "dataset": e["dataset"],
+                "stage": e["stage"],
+                "num_rows": e["num_rows"],
+                "num_row_groups": len(e["row_groups"]),
+                "size_bytes": e["size_bytes"],
+                "num_columns": len(e["schema"]),
+                "modified_at": datetime.fromtimestamp(e["mtime_ns"] / 1e9, tz=timezone.utc),
+            }
+            for e in self._entries()
+        ]
+        return pl.DataFrame(rows, infer_schema_length=None) if rows else pl.DataFrame()
+
+    def find(
+        self,
+        column: Optional[str] = None,
+        lo: Any = None,
+        hi: Any = None,
+        columns: Optional[list[str]] = None,
+        dataset: Optional[str] = None,
+    ) -> dict[Path, list[int]]:
+        """
+        返回含有 `columns` 全部列、且 `column` 可能落在 [lo, hi] 内的文件及其 row group 下标。
+
+        例如 `find("createdAt", datetime(...), datetime(...), columns=["text"])`
+        回答“哪些文件 / row group 含有 X–Y 小时内、带 text 列的数据”。
+        """
+        required = set(columns or []) | ({column} if column else set())
+        matches: dict[Path, list[int]] = {}
+        for entry in self._entries(dataset):
+            if not required <= set(entry["schema"]) | set(entry["partitions"]):
+                continue
+            partition = entry["partitions"].get(column)
+            groups = [
+                i for i, rg in enumerate(entry["row_groups"])
+                if column is None or _may_overlap(
+                    {"min": partition, "max": partition} if partition is not None else rg["columns"].get(column),
+                    rg["num_rows"], lo, hi,
+                )
+            ]
+            if groups:
+                matches[self.directory / entry["path"]] = groups
+        return matches
+
+    def scan(
+        self,
+        column: str,
+        lo: Any = None,
+        hi: Any = None,
+        columns: Optional[list[str]] = None,
+        dataset: Optional[str] = None,
+    ) -> pl.LazyFrame:
+        """
+        按索引裁剪文件后扫描，并附加区间过滤（row group 级裁剪交给谓词下推）。
+        """
+        files = list(self.find(column, lo, hi, columns, dataset))
+        if not files:
+            candidates = self.files(dataset)
+            if not candidates:
+                raise FileNotFoundError(f"索引中没有数据集: {dataset}")
+            return pl.scan_parquet(candidates[0]).head(0)
+        lf = pl.scan_parquet(files)
+        if lo is not None:
+            lf = lf.filter(pl.col(column) >= lo)
+        if hi is not None:
+            lf = lf.filter(pl.col(column) <= hi)
+        return lf.select(columns) if columns else lf
+
+
+_CATALOGS: dict[Path, ParquetCatalog] = {}
+
+
+def catalog(directory: Path = PARQUET_DIR, refresh: bool = True) -> ParquetCatalog:
+    """
+    目录的共享索引实例（进程内缓存），默认先做一次增量刷新。
+    """
+    directory = Path(directory)
+    instance = _CATALOGS.setdefault(directory, ParquetCatalog(directory))
+    if refresh:
+        instance.refresh()
+    else:
+        instance._load()
+    return instance
 
 
 def list_parquet_files() -> Iterable[Path]:
     """
     列出缓存的 Parquet 文件，方便在 Notebook 中快速浏览。
+
+    递归列出 `PARQUET_DIR` 下的全部数据文件（含分区目录与事件子目录，以及未登记到
+    清单的文件；`.` / `_` 开头的内部目录除外）。读取 footer 索引（增量刷新），不打开数据文件；
+    需要 schema / 行数 / 时间范围时直接使用 `catalog()`。
     """
     if not PARQUET_DIR.exists():
         return []
-    return sorted(PARQUET_DIR.glob("**/*.parquet"))
+    return catalog(PARQUET_DIR).files()
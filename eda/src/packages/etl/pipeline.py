@@ -0,0 +1,242 @@
+"""
+按事件编排的 ETL 作业。
+
+单个事件的作业依次执行：
+- intake: 读取原始 CSV，类型规范，ID 列编码为 Int32（`ids`），添加事件时间字段
+- enrichment: 作者 bio 立场预标注并与作者元数据合并 → `tweets_enriched`
+- aggregation: 小时级推文量 / 互动量 → `tweets_hourly`
+
+传入 `MemoryBudget`（或设置 `ETL_MEMORY_BUDGET`）时改走外存路径：分块读取、
+逐块变换并溢写临时 Parquet，聚合走 streaming 引擎，各阶段峰值内存
+记录在 `EventRunResult.budget_report` 中。
+
+`run_events` 将多个事件作为相互隔离的作业提交到进程池并行执行，
+单个事件失败不会影响其他事件：
+
+    from src import events, pipeline
+    results = pipeline.run_events(events.load_events().values(), max_workers=4)
+    pipeline.summarize_runs(results)
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+import polars as pl
+
+from . import analysis, budget, io, text_features
+from .budget import BudgetReport, MemoryBudget
+from .events import EventDataset, load_events
+from .ids import IdDictionary
+
+
+@dataclass
+class EventRunResult:
+    """
+    单个事件作业的执行结果。
+    """
+
+    event: str
+    outputs: dict[str, Path] = field(default_factory=dict)
+    rows: dict[str, int] = field(default_factory=dict)
+    seconds: float = 0.0
+    error: Optional[str] = None
+    budget_report: Optional[BudgetReport] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def run_intake(event: EventDataset, ids: Optional[IdDictionary] = None) -> pl.DataFrame:
+    """
+    读取并规范化事件的原始推文，ID 列编码为 Int32。
+    """
+    ids = ids or IdDictionary(event.id_dir)
+    raw = io.scan_raw_tweets(path=event.raw_tweets).collect()
+    cleaned = ids.encode(analysis.parse_intake_columns(raw, created_at_format=event.created_at_format))
+    return analysis.add_event_time_fields(cleaned, event.event_timestamp)
+
+
+def iter_intake_chunks(event: EventDataset, chunk_rows: int, ids: Optional[IdDictionary] = None) -> Iterator[pl.DataFrame]:
+    """
+    外存路径的 intake：按 `chunk_rows` 分块读取原始推文，逐块规范化并编码 ID。
+
+    块行数通常取 `budget.plan_chunk_rows` 按内存预算推算的值。开始前先以 streaming
+    引擎扫描 ID 列，把全部键一次登记进字典（`IdDictionary.reserve`），逐块编码时
+    只做查找，整次运行只写一个字典分片。
+    """
+    ids = ids or IdDictionary(event.id_dir)
+    lf = io.scan_raw_tweets(path=event.raw_tweets)
+    if "pseudo_inReplyToUsername" in lf.collect_schema():
+        # 与 parse_intake_columns 相同的规范，登记的键与逐块编码时一致
+        lf = lf.with_columns(analysis.reply_target_expr(strict=False))
+    ids.reserve(lf)
+    for chunk in budget.iter_csv_chunks(event.raw_tweets, chunk_rows, dtypes=io.RAW_TWEET_DTYPES):
+        yield ids.encode(analysis.parse_intake_columns(chunk, created_at_format=event.created_at_format))
+
+
+def _load_authors(event: EventDataset, ids: IdDictionary) -> Optional[pl.DataFrame]:
+    if event.raw_authors is None:
+        return None
+    authors = text_features.annotate_author_stance(io.read_well_known_authors(path=event.raw_authors))
+    return ids.encode_authors(authors)
+
+
+def run_enrichment(event: EventDataset, tweets: pl.DataFrame, ids: Optional[IdDictionary] = None) -> pl.DataFrame:
+    """
+    合并作者元数据；未配置作者表的事件原样返回。
+    """
+    authors = _load_authors(event, ids or IdDictionary(event.id_dir))
+    if authors is None:
+        return tweets
+    return analysis.join_author_metadata(tweets, authors)
+
+
+def _run_event_budgeted(event: EventDataset, limits: MemoryBudget, result: EventRunResult) -> None:
+    """
+    外存路径：intake + enrichment 逐块执行并按小时分桶溢写，
+    再经外部排序合并为有序的 `tweets_enriched`，最后以 streaming 引擎聚合。
+    """
+    report = result.budget_report = BudgetReport(limit_bytes=limits.limit_bytes)
+    ids = IdDictionary(event.id_dir)
+    authors = _load_authors(event, ids)
+
+    enriched_path = event.output_path("tweets_enriched")
+    hourly_path = event.output_path("tweets_hourly")
+    with budget.spill_directory(limits, prefix=f"etl-{event.name}-") as spill:
+        with budget.tracked(report, "budget.intake_chunks") as info:
+            rows = 0
+            info["chunk_rows"] = chunk_rows = budget.plan_chunk_rows(event.raw_tweets, limits, dtypes=io.RAW_TWEET_DTYPES)
+            for part, chunk in enumerate(iter_intake_chunks(event, chunk_rows, ids)):
+                chunk = analysis.add_event_time_fields(chunk, event.event_timestamp)
+                if authors is not None:
+                    chunk = analysis.join_author_metadata(chunk, authors)
+                budget.spill_by_hour(chunk, spill, part)
+                rows += chunk.height
+            info["rows_out"] = rows
+        if rows == 0:
+            raise ValueError(f"事件 {event.name} 的原始推文为空: {event.raw_tweets}")
+
+        with budget.tracked(report, "budget.sort_enriched") as info:
+            enriched_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = enriched_path.with_name(f".{enriched_path.name}.{os.getpid()}.tmp")
+            info["rows_out"] = budget.merge_hour_buckets(
+                spill,
+                tmp_path,
+                key="createdAt",
+                row_group_size=io.DEFAULT_ROW_GROUP_SIZE,
+                max_run_bytes=limits.run_bytes,
+            )
+            os.replace(tmp_path, enriched_path)
+            io.record_manifest_entry(enriched_path, key="createdAt")
+
+    with budget.tracked(report, "budget.hourly") as info:
+        hourly = budget.collect_streaming(analysis.hourly_activity(pl.scan_parquet(enriched_path)))
+        io.materialize_parquet(hourly.lazy(), hourly_path, sort_by="hour")
+        info["rows_out"] = hourly.height
+
+    result.outputs = {"tweets_enriched": enriched_path, "tweets_hourly": hourly_path}
+    result.rows = {"tweets_enriched": rows, "tweets_hourly": hourly.height}
+
+
+def _run_event_in_memory(event: EventDataset, result: EventRunResult) -> None:
+    ids = IdDictionary(event.id_dir)
+    enriched = run_enrichment(event, run_intake(event, ids), ids)
+    hourly = analysis.hourly_activity(enriched)
+    for name, df, sort_key in (
+        ("tweets_enriched", enriched, "createdAt"),
+        ("tweets_hourly", hourly, "hour"),
+    ):
+        path = event.output_path(name)
+        io.materialize_parquet(df.lazy(), path, sort_by=sort_key)
+        result.outputs[name] = path
+        result.rows[name] = df.height
+
+
+def run_event(event: EventDataset, limits: Optional[MemoryBudget] = None) -> EventRunResult:
+    """
+    执行单个事件的完整作业，产出写入事件命名空间目录。
+
+    `limits` 为空时读取 `ETL_MEMORY_BUDGET`；仍为空则一次性在内存中处理。
+    """
+    result = EventRunResult(event=event.name)
+    limits = limits or MemoryBudget.from_env()
+    start = time.perf_counter()
+    try:
+        if limits is not None:
+            _run_event_budgeted(event, limits, result)
+        else:
+            _run_event_in_memory(event, result)
+    except Exception:
+        result.error = traceback.format_exc()
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def run_events(
+    events: Optional[Iterable[EventDataset]] = None,
+    max_workers: int = 2,
+    limits: Optional[MemoryBudget] = None,
+) -> list[EventRunResult]:
+    """
+    并行执行多个事件作业。
+
+    参数
+    ----
+    events:
+        待执行的事件，默认取注册表中的全部事件。
+    max_workers:
+        进程池上限。每个作业内部 Polars 已使用多线程，
+        worker 数应按内存而非 CPU 核数设定。
+    limits:
+        单个作业的内存预算；多个 worker 并行时总占用约为 worker 数 × 预算。
+
+    使用 spawn 方式启动子进程：Polars 持有线程池，fork 后的子进程可能死锁。
+    """
+    events = list(events if events is not None else load_events().values())
+    if not events:
+        return []
+    if max_workers <= 1 or len(events) == 1:
+        return [run_event(event, limits) for event in events]
+
+    ctx = multiprocessing.get_context("spawn")
+    results: list[EventRunResult] = []
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(events)), mp_context=ctx) as pool:
+        futures = {pool.submit(run_event, event, limits): event for event in events}
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except Exception:
+                # 子进程异常退出（如被 OOM kill）时 run_event 内部来不及捕获
+                results.append(EventRunResult(event=futures[future].name, error=traceback.format_exc()))
+    order = {event.name: i for i, event in enumerate(events)}
+    return sorted(results, key=lambda r: order[r.event])
+
+
+def summarize_runs(results: Iterable[EventRunResult]) -> pl.DataFrame:
+    """
+    将作业结果整理为表格，便于在 Notebook 中查看。
+    """
+    return pl.DataFrame(
+        [
+            {
+                "event": r.event,
+                "ok": r.ok,
+                "seconds": r.seconds,
+                "tweets": r.rows.get("tweets_enriched"),
+                "hours": r.rows.get("tweets_hourly"),
+                "within_budget": r.budget_report.within_budget if r.budget_report else None,
+                "error": r.error.strip().splitlines()[-1] if r.error else None,
+            }
+            for r in results
+        ]
+    )
+
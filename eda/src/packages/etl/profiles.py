@@ -0,0 +1,267 @@
+"""
+增量作者画像库。
+
+每位作者维护一份可合并的状态：
+- 推文数、转发 / 点赞总量、立场置信度之和与计数（均可直接相加）
+- 推文立场投票直方图（conservative / liberal / neutral），众数由直方图得出
+- 最新 followers 与 bio 立场（按 `createdAt` 取最新的非空值）
+
+新批次只需按作者聚合本批（O(batch)），再逐作者合并进状态字典；
+同时维护按 followers 或互动量排序的 Top-K 堆，报告读取 Top-K 无需全表排序。
+
+状态以 Parquet 持久化（`author_state.parquet`），派生出的画像表与
+Top-K 表与 03_author_profiling 的输出列保持一致。
+"""
+
+from __future__ import annotations
+
+import heapq
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+import polars as pl
+
+from .instrumentation import instrumented
+
+
+AUTHOR_KEY = "pseudo_author_userName"
+STANCES = ["conservative", "liberal", "neutral"]
+STATE_FILE = "author_state.parquet"
+
+_SUM_FIELDS = ["tweet_count", "total_retweets", "total_likes", "confidence_sum", "confidence_n"] + [
+    f"votes_{s}" for s in STANCES
+]
+
+
+def influence_tier_expr(col: str = "followers") -> pl.Expr:
+    """
+    影响力分层（与 03_author_profiling 一致）。
+    """
+    return (
+        pl.when(pl.col(col) >= 1_000_000).then(pl.lit("Mega (1M+)"))
+        .when(pl.col(col) >= 100_000).then(pl.lit("High (100K-1M)"))
+        .when(pl.col(col) >= 10_000).then(pl.lit("Medium (10K-100K)"))
+        .otherwise(pl.lit("Low (<10K)"))
+        .alias("influence_tier")
+    )
+
+
+def stance_consistency_expr() -> pl.Expr:
+    """
+    bio 立场与推文立场众数的一致性标签。
+    """
+    return (
+        pl.when((pl.col("bio_stance") == pl.col("tweet_stance_mode")) & (pl.col("bio_stance") != "neutral"))
+        .then(pl.lit("一致"))
+        .when(pl.col("bio_stance") == "neutral")
+        .then(pl.lit("bio无立场"))
+        .otherwise(pl.lit("不一致"))
+        .alias("stance_consistency")
+    )
+
+
+class AuthorProfileStore:
+    """
+    可持久化、可增量更新的作者画像。
+
+    参数
+    ----
+    directory:
+        状态与输出文件所在目录。
+    top_k:
+        Top-K 堆容量。
+    rank_by:
+        Top-K 排序依据：`followers` 或 `engagement`（转发 + 点赞）。
+    resume:
+        是否从 `directory` 中已持久化的状态继续；全量重建时应设为 False，
+        否则同一批推文会被重复计数。
+    """
+
+    def __init__(
+        self, directory: Path, top_k: int = 50, rank_by: str = "followers", resume: bool = True
+    ) -> None:
+        if rank_by not in ("followers", "engagement"):
+            raise ValueError(f"不支持的排序依据: {rank_by}")
+        self.directory = Path(directory)
+        self.top_k = top_k
+        self.rank_by = rank_by
+        self.state: dict[Any, dict[str, Any]] = {}
+        # 状态列的类型（来自已持久化状态或批聚合结果），物化时按此构造，不做推断
+        self._schema: dict[str, pl.DataType] = {}
+        self._heap: list[tuple[float, Any]] = []
+        self._in_heap: dict[Any, float] = {}
+        self._heap_dirty = False
+
+        state_path = self.directory / STATE_FILE
+        if resume and state_path.exists():
+            persisted = pl.read_parquet(state_path)
+            self._merge_schema(persisted.schema)
+            for row in persisted.iter_rows(named=True):
+                self.state[row.pop(AUTHOR_KEY)] = row
+            self._rebuild_heap()
+
+    # ------------------------------------------------------------------
+    # Top-K 维护
+    # ------------------------------------------------------------------
+
+    def _score(self, entry: dict[str, Any]) -> Optional[float]:
+        if self.rank_by == "followers":
+            return entry["followers"]
+        return entry["total_retweets"] + entry["total_likes"]
+
+    def _rebuild_heap(self) -> None:
+        scored = ((self._score(e), a) for a, e in self.state.items())
+        self._heap = heapq.nlargest(self.top_k, ((s, a) for s, a in scored if s is not None), key=lambda x: x[0])
+        heapq.heapify(self._heap)
+        self._in_heap = {a: s for s, a in self._heap}
+        self._heap_dirty = False
+
+    def _offer(self, author: Any) -> None:
+        score = self._score(self.state[author])
+        if score is None:
+            return
+        previous = self._in_heap.get(author)
+        if previous is not None:
+            if score < previous:
+                # 堆内成员分数下降，堆外作者可能应当顶替，读取时再重建
+                self._heap_dirty = True
+            self._heap = [(score if a == author else s, a) for s, a in self._heap]
+            heapq.heapify(self._heap)
+            self._in_heap[author] = score
+        elif len(self._heap) < self.top_k:
+            heapq.heappush(self._heap, (score, author))
+            self._in_heap[author] = score
+        elif score > self._heap[0][0]:
+            _, evicted = heapq.heapreplace(self._heap, (score, author))
+            del self._in_heap[evicted]
+            self._in_heap[author] = score
+
+    # ------------------------------------------------------------------
+    # 增量更新
+    # ------------------------------------------------------------------
+
+    def _merge_schema(self, schema: pl.Schema) -> None:
+        # 批内全为空的列聚合为 Null 类型，之后的批次出现非空值时补上真实类型
+        for name, dtype in schema.items():
+            if self._schema.get(name, pl.Null) == pl.Null:
+                self._schema[name] = dtype
+
+    @staticmethod
+    def aggregate_batch(batch: pl.DataFrame) -> pl.DataFrame:
+        """
+        将一批已完成立场分类的推文聚合为每位作者的部分状态。
+        """
+        if "createdAt" in batch.columns:
+            batch = batch.sort("createdAt")
+            last_seen = pl.col("createdAt").max()
+        else:
+            last_seen = pl.lit(None)
+        followers = pl.col("author_followers").drop_nulls()
+        return batch.group_by(AUTHOR_KEY).agg(
+            pl.len().alias("tweet_count"),
+            pl.col("retweetCount").sum().alias("total_retweets"),
+            pl.col("likeCount").sum().alias("total_likes"),
+            pl.col("stance_confidence").sum().alias("confidence_sum"),
+            pl.col("stance_confidence").count().alias("confidence_n"),
+            *[(pl.col("political_stance") == s).sum().alias(f"votes_{s}") for s in STANCES],
+            followers.last().alias("followers"),
+            pl.col("author_stance_prelabel").drop_nulls().last().alias("bio_stance"),
+            pl.col("author_stance_confidence").drop_nulls().last().alias("bio_confidence"),
+            last_seen.alias("last_seen"),
+        )
+
+    @instrumented("profiles.update")
+    def update(self, batch: pl.DataFrame) -> int:
+        """
+        合并一批推文（只计入 `political_stance` 非空的行），返回受影响作者数。
+        """
+        analyzed = batch.filter(pl.col("political_stance").is_not_null())
+        if analyzed.height == 0:
+            return 0
+        partial = self.aggregate_batch(analyzed)
+        self._merge_schema(partial.schema)
+        for row in partial.iter_rows(named=True):
+            author = row.pop(AUTHOR_KEY)
+            current = self.state.get(author)
+            if current is None:
+                self.state[author] = row
+            else:
+                for f in _SUM_FIELDS:
+                    current[f] = (current[f] or 0) + (row[f] or 0)
+                newer = current["last_seen"] is None or (
+                    row["last_seen"] is not None and row["last_seen"] >= current["last_seen"]
+                )
+                for f in ("followers", "bio_stance", "bio_confidence"):
+                    if row[f] is not None and (newer or current[f] is None):
+                        current[f] = row[f]
+                if newer:
+                    current["last_seen"] = row["last_seen"]
+            self._offer(author)
+        return partial.height
+
+    def update_many(self, batches: Iterable[pl.DataFrame]) -> int:
+        return sum(self.update(batch) for batch in batches)
+
+    # ------------------------------------------------------------------
+    # 读取
+    # ------------------------------------------------------------------
+
+    def _state_frame(self, authors: Optional[Iterable[Any]] = None) -> pl.DataFrame:
+        keys = list(self.state) if authors is None else list(authors)
+        if not keys:
+            return pl.DataFrame()
+        # 多数作者不在知名作者表中，followers / bio 等字段大量为空，按前若干行推断类型会
+        # 在遇到首个非空值时失败，也会丢失作者 ID 的 Int32 编码类型
+        return pl.DataFrame([{AUTHOR_KEY: a, **self.state[a]} for a in keys], schema=self._schema)
+
+    @staticmethod
+    def _derive(state: pl.DataFrame) -> pl.DataFrame:
+        votes = [pl.col(f"votes_{s}") for s in STANCES]
+        # 平票时按 STANCES 顺序取第一个
+        mode = pl.when(votes[0] >= pl.max_horizontal(votes)).then(pl.lit(STANCES[0]))
+        for stance, vote in zip(STANCES[1:], votes[1:]):
+            mode = mode.when(vote >= pl.max_horizontal(votes)).then(pl.lit(stance))
+        return (
+            state.with_columns(
+                mode.alias("tweet_stance_mode"),
+                (pl.col("confidence_sum") / pl.col("confidence_n")).alias("avg_stance_confidence"),
+            )
+            .filter(pl.col("followers").is_not_null())
+            .with_columns(influence_tier_expr(), stance_consistency_expr())
+            .select(
+                AUTHOR_KEY, "tweet_count", "followers", "bio_stance", "bio_confidence",
+                "tweet_stance_mode", "avg_stance_confidence", "total_retweets", "total_likes",
+                "influence_tier", "stance_consistency",
+            )
+        )
+
+    def profiles(self) -> pl.DataFrame:
+        """
+        完整作者画像表（O(作者数)，用于落盘或离线分析）。
+        """
+        state = self._state_frame()
+        return self._derive(state) if state.height else state
+
+    def top(self, k: Optional[int] = None) -> pl.DataFrame:
+        """
+        Top-K 作者画像，按排序依据降序。只物化堆内作者。
+        """
+        if self._heap_dirty:
+            self._rebuild_heap()
+        ranked = sorted(self._heap, key=lambda x: x[0], reverse=True)[: k or self.top_k]
+        state = self._state_frame(a for _, a in ranked)
+        return self._derive(state) if state.height else state
+
+    def save(self, profile_name: str = "author_profiling", top_name: str = "top_50_influencers") -> None:
+        """
+        持久化状态，并写出画像表与 Top-K 表。
+        """
+        from .io import materialize_parquet
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        state = self._state_frame()
+        if state.height == 0:
+            return
+        materialize_parquet(state.lazy(), self.directory / STATE_FILE, manifest=False)
+        materialize_parquet(self._derive(state).lazy(), self.directory / f"{profile_name}.parquet")
+        materialize_parquet(self.top().lazy(), self.directory / f"{top_name}.parquet")
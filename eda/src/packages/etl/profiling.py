@@ -8,15 +8,26 @@ from typing import Iterable
 
 import polars as pl
 
+from .instrumentation import instrumented
 
-def missingness_summary(df: pl.DataFrame, key_columns: Iterable[str]) -> pl.DataFrame:
+
+@instrumented("profiling.missingness_summary")
+def missingness_summary(df: pl.DataFrame | pl.LazyFrame, key_columns: Iterable[str]) -> pl.DataFrame:
     """
     统计各列缺失率与缺失计数。
+
+    传入 LazyFrame 时以一次 streaming 聚合得到各列缺失数，不物化整表。
     """
-    total = df.height
+    if isinstance(df, pl.LazyFrame):
+        counts = df.select(pl.len().alias("__rows"), pl.all().null_count()).collect(engine="streaming")
+        total = counts["__rows"][0]
+        nulls_by_col = counts.drop("__rows").row(0, named=True)
+    else:
+        total = df.height
+        nulls_by_col = {col: df[col].null_count() for col in df.columns}
+    key_columns = set(key_columns)
     stats = []
-    for col in df.columns:
-        nulls = df[col].null_count()
+    for col, nulls in nulls_by_col.items():
         stats.append(
             {
                 "column": col,
@@ -28,14 +39,20 @@ def missingness_summary(df: pl.DataFrame, key_columns: Iterable[str]) -> pl.Data
     return pl.DataFrame(stats).sort("null_ratio", descending=True)
 
 
-def duplicate_check(df: pl.DataFrame, subset: Iterable[str]) -> pl.DataFrame:
+@instrumented("profiling.duplicate_check")
+def duplicate_check(df: pl.DataFrame | pl.LazyFrame, subset: Iterable[str]) -> pl.DataFrame:
     """
-    基于指定键检查是否存在重复行。
+    基于指定键检查是否存在重复行（LazyFrame 走 streaming 引擎）。
     """
-    dupes = df.group_by(subset).count().filter(pl.col("count") > 1)
-    return dupes.sort("count", descending=True)
+    dupes = (
+        df.group_by(list(subset)).agg(pl.len().alias("count"))
+        .filter(pl.col("count") > 1)
+        .sort("count", descending=True)
+    )
+    return dupes.collect(engine="streaming") if isinstance(dupes, pl.LazyFrame) else dupes
 
 
+@instrumented("profiling.engagement_distribution")
 def engagement_distribution(df: pl.DataFrame, engagement_cols: list[str]) -> pl.DataFrame:
     """
     计算互动指标的分布统计。
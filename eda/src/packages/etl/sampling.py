@@ -0,0 +1,179 @@
+"""
+单遍流式分层抽样。
+
+按分层键（如 `time_window` × `lang` × `author_isBlueVerified`）为每层维护一个
+容量为 k 的蓄水池，数据按批流过一次即可得到样本，内存上限约为
+「层数 × k + 单批大小」，无需先 collect 全量语料。
+
+抽样键采用“哈希最小 k 个”（bottom-k）：每行的随机键由 `key_col` 的哈希
+与种子决定，因此在同一种子（及同一 Polars 版本）下，结果与批大小、
+批次顺序无关，可完全复现。
+`key_col` 为已编码的 ID 列（Int32，见 `ids`）时先解码回原始 ID 再哈希，
+否则样本会随字典的插入顺序变化。
+未提供 `key_col` 时退化为按种子生成的随机数（结果依赖批次顺序）。
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+import polars as pl
+
+from .ids import DEFAULT_ID_COLUMNS, IdDictionary, is_encoded
+from .instrumentation import instrumented
+
+
+_KEY = "__sample_key"
+_STRATUM = "__stratum"
+
+
+class StratifiedReservoir:
+    """
+    分层蓄水池抽样器。
+
+    参数
+    ----
+    strata:
+        分层列。
+    per_stratum:
+        每层保留的最大行数。
+    seed:
+        随机种子。
+    key_col:
+        用于生成抽样键的唯一标识列（如 `pseudo_id`）。
+    ids:
+        `key_col` 已编码时用于解码的 ID 字典，默认使用全局字典。
+    """
+
+    def __init__(
+        self,
+        strata: list[str],
+        per_stratum: int,
+        seed: int = 42,
+        key_col: Optional[str] = None,
+        ids: Optional[IdDictionary] = None,
+    ) -> None:
+        self.strata = strata
+        self.per_stratum = per_stratum
+        self.seed = seed
+        self.key_col = key_col
+        self.ids = ids
+        self._rng = np.random.default_rng(seed)
+        self._reservoir: Optional[pl.DataFrame] = None
+        self._seen: Optional[pl.DataFrame] = None
+
+    def _with_keys(self, batch: pl.DataFrame) -> pl.DataFrame:
+        if self.key_col is not None:
+            source = batch[self.key_col]
+            namespace = DEFAULT_ID_COLUMNS.get(self.key_col)
+            if namespace is not None and is_encoded(source):
+                # 按原始 ID 哈希，使样本与字典编码顺序无关
+                self.ids = self.ids or IdDictionary()
+                source = self.ids.decode(source.to_frame(), {self.key_col: namespace})[self.key_col]
+            return batch.with_columns(source.cast(pl.Utf8).hash(seed=self.seed).alias(_KEY))
+        keys = self._rng.integers(0, np.iinfo(np.uint64).max, size=batch.height, dtype=np.uint64)
+        return batch.with_columns(pl.Series(_KEY, keys))
+
+    def update(self, batch: pl.DataFrame) -> None:
+        """
+        合并一批数据：每层只保留抽样键最小的 `per_stratum` 行。
+        """
+        if batch.height == 0:
+            return
+        # 分层列可能含空值，统一映射为层哈希再做计数与关联
+        batch = batch.with_columns(pl.struct(self.strata).hash().alias(_STRATUM))
+        counts = batch.group_by(_STRATUM).agg(pl.len().alias("seen"))
+        self._seen = (
+            counts
+            if self._seen is None
+            else pl.concat([self._seen, counts]).group_by(_STRATUM).agg(pl.col("seen").sum())
+        )
+
+        candidates = self._with_keys(batch)
+        if self._reservoir is not None:
+            candidates = pl.concat([self._reservoir, candidates], how="diagonal_relaxed")
+        self._reservoir = (
+            candidates.sort(_KEY).group_by(_STRATUM, maintain_order=True).head(self.per_stratum)
+        )
+
+    def result(self, sort_by: Optional[str] = None) -> pl.DataFrame:
+        """
+        返回样本，附 `sample_weight`（该层总行数 / 该层样本数），
+        可用于把样本统计量还原为总体估计。
+        """
+        if self._reservoir is None:
+            return pl.DataFrame()
+        sample = (
+            self._reservoir.join(self._seen, on=_STRATUM, how="left")
+            .with_columns((pl.col("seen") / pl.len().over(_STRATUM)).alias("sample_weight"))
+            .drop(_KEY, _STRATUM, "seen")
+        )
+        return sample.sort(sort_by) if sort_by else sample
+
+    def strata_summary(self) -> pl.DataFrame:
+        """
+        各层的总行数与样本数。
+        """
+        if self._reservoir is None:
+            return pl.DataFrame()
+        return (
+            self._reservoir.group_by(_STRATUM)
+            .agg(*[pl.col(c).first() for c in self.strata], pl.len().alias("sampled"))
+            .join(self._seen, on=_STRATUM, how="left")
+            .select(*self.strata, "seen", "sampled")
+            .sort(self.strata, nulls_last=True)
+        )
+
+
+@instrumented("sampling.stratified_sample")
+def stratified_sample(
+    batches: Iterable[pl.DataFrame],
+    strata: list[str],
+    per_stratum: int,
+    seed: int = 42,
+    key_col: Optional[str] = None,
+    prepare: Optional[Callable[[pl.DataFrame], pl.DataFrame]] = None,
+    sort_by: Optional[str] = None,
+    ids: Optional[IdDictionary] = None,
+) -> pl.DataFrame:
+    """
+    对批次流做单遍分层抽样。
+
+    `prepare` 在每批上执行（如过滤英文长文本、派生 `time_window`），
+    使分层列可以在流式过程中计算，而不必先物化全量数据。
+    """
+    reservoir = StratifiedReservoir(strata, per_stratum, seed=seed, key_col=key_col, ids=ids)
+    for batch in batches:
+        reservoir.update(prepare(batch) if prepare is not None else batch)
+    return reservoir.result(sort_by=sort_by)
+
+
+def sample_parquet(
+    path: Path,
+    strata: list[str],
+    per_stratum: int,
+    seed: int = 42,
+    key_col: Optional[str] = "pseudo_id",
+    batch_size: int = 100_000,
+    columns: Optional[list[str]] = None,
+    prepare: Optional[Callable[[pl.DataFrame], pl.DataFrame]] = None,
+    sort_by: Optional[str] = None,
+    ids: Optional[IdDictionary] = None,
+) -> pl.DataFrame:
+    """
+    基于 `io.iter_batches` 对 Parquet 数据集分层抽样。
+    """
+    from .io import iter_batches
+
+    return stratified_sample(
+        iter_batches(path, batch_size=batch_size, columns=columns),
+        strata,
+        per_stratum,
+        seed=seed,
+        key_col=key_col,
+        prepare=prepare,
+        sort_by=sort_by,
+        ids=ids,
+    )
@@ -0,0 +1,399 @@
+"""
+实时接入：追踪投放目录中不断追加的 CSV / JSONL，按微批增量更新。
+
+- `DropDirectoryTailer`: 记录每个文件的已读字节偏移，只读取新增的完整行
+- `IncrementalHourly`: 小时级聚合的可合并状态，每批只更新涉及的小时
+- `LiveIngestor`: 串联接入规范化（布尔列、时间解析、ID 编码、作者合并）与增量聚合，
+  并以版本号对外提供增量，供 Reflex 后端状态按需拉取
+
+无法规范化的记录（如 `createdAt` 无法解析）写入拒收文件后照常提交偏移，
+不会卡住所在文件；整批反复失败时同样在有限次重试后整批拒收。
+
+全量重算只发生在启动时的首批（读取目录中已有内容），此后均为增量。
+"""
+
+from __future__ import annotations
+
+import io as _io
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+
+import polars as pl
+
+from . import analysis
+from .ids import IdDictionary
+from .io import RAW_TWEET_DTYPES
+
+
+HOURLY_SUM_COLUMNS = ["tweet_count", "total_retweets", "total_likes", "total_replies", "total_engagement"]
+
+
+def _complete_csv_prefix(data: bytes) -> int:
+    """
+    返回 data 中最后一个“记录边界”换行符之后的位置。
+    引号内的换行（推文正文可含换行）不视为记录边界。
+    """
+    end, quotes, pos = 0, 0, 0
+    for segment in data.split(b"\n")[:-1]:
+        quotes += segment.count(b'"')
+        pos += len(segment) + 1
+        if quotes % 2 == 0:
+            end = pos
+    return end
+
+
+def _read_ndjson_lines(data: bytes) -> pl.DataFrame:
+    """
+    解析 JSONL；含无法解析的行时逐行解析，坏行以原文保留在 `_malformed` 列
+    （其余列为空），交由接入端拒收而不是让整批失败。
+    """
+    try:
+        return pl.read_ndjson(_io.BytesIO(data), ignore_errors=True)
+    except pl.exceptions.ComputeError:
+        pass
+    rows = []
+    for line in data.splitlines():
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        rows.append(record if isinstance(record, dict) else {"_malformed": line.decode("utf-8", "replace")})
+    return pl.from_dicts(rows, infer_schema_length=None) if rows else pl.DataFrame()
+
+
+class DropDirectoryTailer:
+    """
+    追踪目录内的追加写文件（`*.csv` / `*.jsonl`）。
+
+    `poll` 只返回待提交的偏移量，调用方处理完（规范化、落盘、聚合）后再
+    `commit`；处理失败时偏移不前进，下次轮询重新读取这些记录。偏移量可持久化
+    到 `checkpoint`，重启后从最后一次提交继续。
+    """
+
+    def __init__(self, directory: Path, checkpoint: Optional[Path] = None) -> None:
+        self.directory = Path(directory)
+        self.checkpoint = checkpoint
+        self.offsets: dict[str, int] = {}
+        self.meta: dict[str, Any] = {}
+        self.headers: dict[str, bytes] = {}
+        if checkpoint is not None and checkpoint.exists():
+            state = json.loads(checkpoint.read_text(encoding="utf-8"))
+            if "offsets" in state:
+                self.offsets = state.pop("offsets")
+                self.meta = state
+            else:  # 旧格式：只有 文件名 → 偏移
+                self.offsets = state
+
+    def _save(self) -> None:
+        if self.checkpoint is None:
+            return
+        tmp = self.checkpoint.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"offsets": self.offsets, **self.meta}), encoding="utf-8")
+        tmp.replace(self.checkpoint)
+
+    def commit(self, pending: dict[str, int], **meta: Any) -> None:
+        """
+        提交 `poll` 返回的偏移量并写入检查点；`meta` 与偏移一同原子保存。
+        """
+        self.offsets.update(pending)
+        self.meta.update(meta)
+        self._save()
+
+    def _read_new(self, path: Path) -> Optional[tuple[pl.DataFrame, int]]:
+        key = path.name
+        offset = self.offsets.get(key, 0)
+        if path.stat().st_size <= offset:
+            return None
+        with open(path, "rb") as fh:
+            if path.suffix == ".csv":
+                if key not in self.headers:
+                    header = fh.readline()
+                    if not header.endswith(b"\n"):  # 表头尚未写完整
+                        return None
+                    self.headers[key] = header
+                # 偏移从不落在表头之内：只有表头时不会提交偏移，下次仍从 0 读起
+                offset = max(offset, len(self.headers[key]))
+            fh.seek(offset)
+            data = fh.read()
+
+        if path.suffix == ".csv":
+            end = _complete_csv_prefix(data)
+            if end == 0:
+                return None
+            df = pl.read_csv(
+                _io.BytesIO(self.headers[key] + data[:end]),
+                schema_overrides=RAW_TWEET_DTYPES,
+                ignore_errors=True,
+            )
+        else:
+            end = data.rfind(b"\n") + 1
+            if end == 0:
+                return None
+            df = _read_ndjson_lines(data[:end])
+            # 与 CSV 一致的原始列类型，保证后续规范化 / ID 编码的输入相同
+            df = df.with_columns(
+                pl.col(col).cast(dtype, strict=False) for col, dtype in RAW_TWEET_DTYPES.items() if col in df.columns
+            )
+        return df, offset + end
+
+    def poll(self) -> tuple[list[pl.DataFrame], dict[str, int]]:
+        """
+        读取自上次提交以来各文件新增的完整记录，返回 (数据, 待提交偏移)。
+
+        不修改已提交的偏移；未 `commit` 时重复调用会再次读到同样的记录。
+        """
+        if not self.directory.exists():
+            return [], {}
+        frames, pending = [], {}
+        for path in sorted(self.directory.iterdir()):
+            if path.suffix not in (".csv", ".jsonl") or not path.is_file():
+                continue
+            read = self._read_new(path)
+            if read is None:
+                continue
+            df, pending[path.name] = read
+            if df.height:
+                frames.append(df)
+        return frames, pending
+
+
+class IncrementalHourly:
+    """
+    小时级聚合状态。各指标均为可加和量，新批次只需与已有小时合并；
+    每个小时记录最后更新的版本号，用于计算增量。
+    """
+
+    def __init__(self) -> None:
+        self.rows: dict[datetime, dict[str, Any]] = {}
+        self.updated: dict[datetime, int] = {}
+        self.version = 0
+
+    def update(self, batch: pl.DataFrame) -> pl.DataFrame:
+        """
+        合并一批已规范化的推文，返回本批涉及小时的最新聚合值。
+        """
+        partial = analysis.hourly_activity(batch)
+        self.version += 1
+        for row in partial.iter_rows(named=True):
+            hour = row["hour"]
+            current = self.rows.get(hour)
+            if current is None:
+                self.rows[hour] = dict(row)
+            else:
+                for col in HOURLY_SUM_COLUMNS:
+                    current[col] += row[col] or 0
+            self.updated[hour] = self.version
+        return self._frame(hour for hour in partial["hour"])
+
+    def changes_since(self, version: int) -> tuple[int, pl.DataFrame]:
+        """
+        返回 (当前版本, 版本 `version` 之后更新过的小时)。
+        """
+        return self.version, self._frame(h for h, v in self.updated.items() if v > version)
+
+    def snapshot(self) -> pl.DataFrame:
+        return self._frame(self.rows)
+
+    def _frame(self, hours) -> pl.DataFrame:
+        rows = [self.rows[h] for h in sorted(set(hours))]
+        return pl.DataFrame(rows) if rows else pl.DataFrame()
+
+
+@dataclass
+class LiveUpdate:
+    """
+    一次轮询的结果。
+    """
+
+    version: int
+    rows: int
+    delta: pl.DataFrame
+
+
+class LiveIngestor:
+    """
+    实时接入管道：轮询投放目录 → 接入规范化 → 作者合并 → 增量小时聚合。
+
+    参数
+    ----
+    drop_dir:
+        追加写入的 CSV / JSONL 目录。
+    event_timestamp:
+        事件时间，用于 `event_time_delta_hours` / `time_window`。
+    authors:
+        已做立场预标注的作者表（`text_features.annotate_author_stance` 的输出），可为空。
+    sink_dir:
+        若提供，每个微批规范化后的明细写为一个 Parquet 分片；
+        重启时据此恢复小时聚合状态（配合 `checkpoint` 避免重复读取）。
+        拒收的记录写入 `sink_dir / "_rejects"`。
+    ids:
+        与批处理管道共用的 ID 字典（通常为 `IdDictionary(event.id_dir)`）；提供时
+        ID 列与作者表均按同一编码空间编码，分片可与批处理产出直接合并。
+    max_attempts:
+        同一批记录连续处理失败的最大次数，超过后整批拒收并提交偏移。
+
+    每批先规范化、写分片、合并进小时聚合，最后才提交偏移；检查点同时记录最后
+    一个已提交的分片。任一步失败或进程在提交前退出，这批记录都会在下次轮询时
+    重新读取，提交前写出的分片在恢复时丢弃，因此既不丢也不重复计数。
+    `createdAt` 无法解析的行不参与这一重试，直接拒收。
+    """
+
+    def __init__(
+        self,
+        drop_dir: Path,
+        event_timestamp: datetime,
+        authors: Optional[pl.DataFrame] = None,
+        sink_dir: Optional[Path] = None,
+        checkpoint: Optional[Path] = None,
+        created_at_format: str = analysis.CREATED_AT_FORMAT,
+        ids: Optional[IdDictionary] = None,
+        max_attempts: int = 3,
+    ) -> None:
+        self.tailer = DropDirectoryTailer(drop_dir, checkpoint=checkpoint)
+        self.event_timestamp = event_timestamp
+        self.ids = ids
+        if ids is not None and authors is not None and "obfuscated_userName_int" not in authors.columns:
+            authors = ids.encode_authors(authors)
+        self.authors = authors
+        self.sink_dir = sink_dir
+        self.created_at_format = created_at_format
+        self.max_attempts = max_attempts
+        self.hourly = IncrementalHourly()
+        self.total_rows = 0
+        self.rejected_rows = 0
+        self.last_error: Optional[str] = None
+        self._attempts = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if sink_dir is not None and checkpoint is not None and checkpoint.exists():
+            self._restore()
+
+    def _restore(self) -> None:
+        parts = sorted(self.sink_dir.glob("part-*.parquet")) if self.sink_dir.exists() else []
+        last_part = self.tailer.meta.get("last_part")
+        if last_part is not None:
+            # 检查点之后写出的分片对应未提交的偏移，会被重新读取
+            for orphan in [p for p in parts if p.name > last_part]:
+                orphan.unlink()
+            parts = [p for p in parts if p.name <= last_part]
+        if parts:
+            cols = ["createdAt", "event_time_delta_hours", "retweetCount", "likeCount", "replyCount"]
+            restored = pl.scan_parquet(parts).select(cols).collect()
+            self.hourly.update(restored)
+            self.total_rows = restored.height
+
+    def _normalize(self, batch: pl.DataFrame) -> tuple[pl.DataFrame, pl.DataFrame]:
+        # 返回 (规范化后的记录, 拒收的原始记录)；时间无法解析的行无法计入任何小时
+        if "createdAt" not in batch.columns:
+            return batch.head(0), batch
+        parsed = analysis.parse_intake_columns(batch, created_at_format=self.created_at_format, strict=False)
+        bad = parsed["createdAt"].is_null()
+        rejected, parsed = batch.filter(bad), parsed.filter(~bad)
+        if self.ids is not None:
+            parsed = self.ids.encode(parsed)
+        parsed = analysis.add_event_time_fields(parsed, self.event_timestamp)
+        if self.authors is not None:
+            parsed = analysis.join_author_metadata(parsed, self.authors)
+        return parsed, rejected
+
+    def _reject(self, rows: pl.DataFrame, reason: str) -> None:
+        self.rejected_rows += rows.height
+        if self.sink_dir is None or rows.height == 0:
+            return
+        reject_dir = self.sink_dir / "_rejects"
+        reject_dir.mkdir(parents=True, exist_ok=True)
+        path = reject_dir / f"rejects-{time.time_ns()}.parquet"
+        tmp = path.with_name(f".{path.name}.tmp")
+        # 原始列统一存为字符串，不同批次的拒收文件可直接合并查看
+        rows.select(pl.all().cast(pl.Utf8)).with_columns(pl.lit(reason).alias("_reject_reason")).write_parquet(tmp)
+        os.replace(tmp, path)
+
+    def poll_once(self) -> LiveUpdate:
+        """
+        处理一次目录中的新增记录；无新数据时返回空增量。
+        """
+        with self._lock:
+            frames, pending = self.tailer.poll()
+            if not frames:
+                if pending:  # 只推进了表头或空行
+                    self.tailer.commit(pending)
+                return LiveUpdate(self.hourly.version, 0, pl.DataFrame())
+            raw = pl.concat(frames, how="diagonal_relaxed")
+            try:
+                update = self._process(raw, pending)
+            except Exception as exc:
+                self._attempts += 1
+                if self._attempts < self.max_attempts:
+                    raise
+                # 同一批反复失败：整批拒收并提交偏移，后续追加的记录不再被它阻塞
+                self._attempts = 0
+                self.last_error = f"{type(exc).__name__}: {exc}"
+                self._reject(raw, self.last_error)
+                self.tailer.commit(pending)
+                return LiveUpdate(self.hourly.version, 0, pl.DataFrame())
+            self._attempts = 0
+            return update
+
+    def _process(self, raw: pl.DataFrame, pending: dict[str, int]) -> LiveUpdate:
+        batch, rejected = self._normalize(raw)
+        if batch.height == 0:
+            self._reject(rejected, "createdAt 无法解析")
+            self.tailer.commit(pending)
+            return LiveUpdate(self.hourly.version, 0, pl.DataFrame())
+        part, meta = None, {}
+        if self.sink_dir is not None:
+            self.sink_dir.mkdir(parents=True, exist_ok=True)
+            part = self.sink_dir / f"part-{time.time_ns()}.parquet"
+            tmp = part.with_name(f".{part.name}.tmp")
+            batch.write_parquet(tmp)
+            os.replace(tmp, part)
+            meta["last_part"] = part.name
+        try:
+            delta = self.hourly.update(batch)
+        except Exception:
+            if part is not None:  # 这批会重新读取，分片不能留到下次提交之后
+                part.unlink()
+            raise
+        self.total_rows += batch.height
+        # 拒收文件在本批其余步骤成功后才写，避免重试时重复写出
+        self._reject(rejected, "createdAt 无法解析")
+        self.tailer.commit(pending, **meta)
+        return LiveUpdate(self.hourly.version, batch.height, delta)
+
+    def changes_since(self, version: int) -> tuple[int, pl.DataFrame]:
+        with self._lock:
+            return self.hourly.changes_since(version)
+
+    def start(self, interval: float = 5.0) -> None:
+        """
+        在后台线程中按 `interval` 秒轮询。
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def loop() -> None:
+            while not self._stop.is_set():
+                try:
+                    self.poll_once()
+                    self.last_error = None
+                except Exception as exc:  # 单批失败不应终止实时接入，重试次数由 poll_once 限制
+                    self.last_error = f"{type(exc).__name__}: {exc}"
+                self._stop.wait(interval)
+
+        self._thread = threading.Thread(target=loop, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
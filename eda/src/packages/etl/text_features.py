@@ -0,0 +1,230 @@
+"""
+推文文本特征（全量、列式）。
+
+legacy 03_content_semantics 在 1 万条样本上用 Python 列表推导计算词数与
+`textstat.flesch_reading_ease`；这里全部改为 Polars 表达式，可在 LazyFrame /
+streaming 引擎上对全量推文执行：
+
+- 字符数、词数（按空白切分，与 `len(text.split())` 一致）、句子数
+- 音节数近似（元音组计数，去掉词尾不发音的 e，每词至少 1 个音节）
+  与由此计算的 Flesch Reading Ease
+- hashtag / mention / URL / emoji 数量
+- 作者 bio 立场预标注（`annotate_author_stance`，替代 00_data_intake 的逐作者循环）
+
+无法向量化的逐条函数（如精确的 `textstat` 计算）走 `parallel_map_column`，
+按块分发到 spawn 进程池。
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import polars as pl
+
+from . import io
+from .instrumentation import instrumented
+
+
+TEXT_FEATURE_COLUMNS = [
+    "char_count",
+    "word_count",
+    "sentence_count",
+    "syllable_count",
+    "readability",
+    "hashtag_count",
+    "mention_count",
+    "url_count",
+    "emoji_count",
+]
+
+URL_PATTERN = r"https?://\S+"
+HASHTAG_PATTERN = r"#\w+"
+MENTION_PATTERN = r"@\w+"
+# 国旗由两个区域指示符组成，按一个 emoji 计
+EMOJI_PATTERN = r"\p{Extended_Pictographic}"
+FLAG_PATTERN = r"\p{Regional_Indicator}"
+
+
+def _prose(text: pl.Expr) -> pl.Expr:
+    # 可读性只针对正文：去掉 URL、mention、hashtag 后转小写
+    return (
+        text.str.replace_all(URL_PATTERN, " ")
+        .str.replace_all(MENTION_PATTERN, " ")
+        .str.replace_all(HASHTAG_PATTERN, " ")
+        .str.to_lowercase()
+    )
+
+
+def word_count_expr(text: pl.Expr) -> pl.Expr:
+    return text.str.count_matches(r"\S+").fill_null(0)
+
+
+def sentence_count_expr(text: pl.Expr) -> pl.Expr:
+    """
+    句末标点序列数，至少为 1（与 textstat 的口径相近）。
+    """
+    return pl.max_horizontal(_prose(text).str.count_matches(r"[.!?]+(\s|$)").fill_null(0), pl.lit(1)).cast(pl.UInt32)
+
+
+def syllable_count_expr(text: pl.Expr) -> pl.Expr:
+    """
+    音节数近似：元音组数 − 词尾不发音的 e（make / there，排除 able 这类辅音 + le），
+    且不少于字母词数。
+    """
+    prose = _prose(text)
+    vowel_groups = prose.str.count_matches(r"[aeiouy]+")
+    silent_e = prose.str.count_matches(r"[aeiouy](?:[^aeiouy\W]|[^aeiouy\W][^aeiouyl\W])e\b")
+    alpha_words = prose.str.count_matches(r"[a-z]+(?:'[a-z]+)*")
+    return pl.max_horizontal(vowel_groups - silent_e, alpha_words).fill_null(0)
+
+
+def readability_expr(words: pl.Expr, sentences: pl.Expr, syllables: pl.Expr) -> pl.Expr:
+    """
+    Flesch Reading Ease = 206.835 − 1.015 × 词/句 − 84.6 × 音节/词；空文本为 null。
+    """
+    return (
+        pl.when(words > 0)
+        .then(206.835 - 1.015 * (words / sentences) - 84.6 * (syllables / words))
+        .otherwise(None)
+    )
+
+
+def text_feature_exprs(text_col: str = "text") -> list[pl.Expr]:
+    """
+    全部文本特征表达式，可直接用于 `with_columns` / `select`。
+    """
+    text = pl.col(text_col)
+    # 可读性的词数只计正文词，缩写（can't）算一个词
+    prose_words = _prose(text).str.count_matches(r"[a-z]+(?:'[a-z]+)*").fill_null(0)
+    sentences = sentence_count_expr(text)
+    syllables = syllable_count_expr(text)
+    return [
+        text.str.len_chars().fill_null(0).alias("char_count"),
+        word_count_expr(text).alias("word_count"),
+        sentences.alias("sentence_count"),
+        syllables.alias("syllable_count"),
+        readability_expr(prose_words, sentences, syllables).alias("readability"),
+        text.str.count_matches(HASHTAG_PATTERN).fill_null(0).alias("hashtag_count"),
+        text.str.count_matches(MENTION_PATTERN).fill_null(0).alias("mention_count"),
+        text.str.count_matches(URL_PATTERN).fill_null(0).alias("url_count"),
+        (
+            text.str.count_matches(EMOJI_PATTERN).fill_null(0)
+            + text.str.count_matches(FLAG_PATTERN).fill_null(0) // 2
+        ).alias("emoji_count"),
+    ]
+
+
+@instrumented("text_features.add_text_features")
+def add_text_features(df: pl.DataFrame | pl.LazyFrame, text_col: str = "text") -> pl.DataFrame | pl.LazyFrame:
+    """
+    追加文本特征列；传入 LazyFrame 时返回 LazyFrame。
+    """
+    return df.with_columns(text_feature_exprs(text_col))
+
+
+# 作者 bio 立场信号词
+BIO_STANCE_KEYWORDS: dict[str, list[str]] = {
+    "conservative": [
+        r"\bmaga\b", r"\btrump\b", r"\bconservative\b", r"\bpatriot\b",
+        r"\bamerica first\b", r"\b2a\b", r"\bpro-life\b", r"\bpro life\b",
+        r"\bread\w* maga\b", r"\bgod\b.*\bcountry\b", r"\brepublican\b",
+        r"\bright\w* wing\b", r"\btea party\b", r"\bliberty\b.*\bfreedom\b",
+        r"\b#maga\b", r"\b#trump\b", r"\b#americafirst\b",
+    ],
+    "liberal": [
+        r"\bresist\b", r"\bprogressive\b", r"\bliberal\b", r"\bdemocrat\b",
+        r"\bblm\b", r"\bblack lives matter\b", r"\bclimate action\b",
+        r"\blgbtq\+?\b", r"\bshe/her\b", r"\bhe/him\b", r"\bthey/them\b",
+        r"\bdei\b", r"\bequity\b", r"\binclusion\b", r"\banti[- ]trump\b",
+        r"\b#resist\b", r"\b#blm\b", r"\b#metoo\b", r"\bleft\w* activist\b",
+    ],
+}
+
+
+@instrumented("text_features.annotate_author_stance")
+def annotate_author_stance(authors: pl.DataFrame, bio_col: str = "author_profile_bio_description") -> pl.DataFrame:
+    """
+    基于 bio 关键词为作者添加立场预标注 `author_stance_prelabel` 与置信度
+    `author_stance_confidence`（每命中一个信号词 +0.2，上限 1.0）。
+
+    与 00_data_intake 中逐行 Python 实现的判定规则一致，改为列式正则匹配。
+    """
+    bio = pl.col(bio_col).cast(pl.Utf8).str.to_lowercase()
+    hits = {
+        stance: pl.sum_horizontal(bio.str.contains(p).fill_null(False).cast(pl.Int32) for p in patterns)
+        for stance, patterns in BIO_STANCE_KEYWORDS.items()
+    }
+    cons, lib = hits["conservative"], hits["liberal"]
+    return authors.with_columns(
+        pl.when(cons > lib).then(pl.lit("conservative"))
+        .when(lib > cons).then(pl.lit("liberal"))
+        .otherwise(pl.lit("neutral"))
+        .alias("author_stance_prelabel"),
+        pl.when(cons != lib)
+        .then(pl.min_horizontal(pl.max_horizontal(cons, lib) * 0.2, pl.lit(1.0)))
+        .otherwise(pl.lit(0.0))
+        .alias("author_stance_confidence"),
+    )
+
+
+@instrumented("text_features.run_text_feature_stage")
+def run_text_feature_stage(
+    source: Path,
+    output_path: Path,
+    key_col: str = "pseudo_id",
+    text_col: str = "text",
+) -> Path:
+    """
+    对 `source`（如 tweets_enriched.parquet）全量计算文本特征，
+    输出 `key_col` + 特征列，可按 `key_col` 与其他数据集合并。
+    """
+    lf = pl.scan_parquet(source).select(pl.col(key_col), *text_feature_exprs(text_col))
+    io.materialize_parquet(lf, output_path)
+    return output_path
+
+
+def _apply_chunk(fn: Callable[[Any], Any], values: pl.Series) -> list:
+    # 子进程内才物化为 Python 对象；传输的是 Arrow 切片
+    return [fn(v) for v in values.to_list()]
+
+
+@instrumented("text_features.parallel_map_column")
+def parallel_map_column(
+    df: pl.DataFrame,
+    column: str,
+    fn: Callable[[Any], Any],
+    output: str,
+    return_dtype: Optional[pl.PolarsDataType] = None,
+    max_workers: Optional[int] = None,
+    chunk_size: int = 20_000,
+) -> pl.DataFrame:
+    """
+    对无法向量化的逐条函数按块并行执行，结果作为 `output` 列追加。
+
+    `fn` 必须可被 pickle（模块级函数）。使用 spawn 方式启动子进程，
+    原因同 `pipeline.run_events`：Polars 持有线程池，fork 后可能死锁。
+    """
+    # 零拷贝切片，不在主进程一次性 to_list() 整列
+    series = df[column]
+    chunks = [series.slice(i, chunk_size) for i in range(0, series.len(), chunk_size)]
+    if len(chunks) <= 1 or max_workers == 1:
+        results = [_apply_chunk(fn, chunk) for chunk in chunks]
+    else:
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx) as pool:
+            results = list(pool.map(_apply_chunk, [fn] * len(chunks), chunks))
+    flat = [v for chunk in results for v in chunk]
+    return df.with_columns(pl.Series(output, flat, dtype=return_dtype))
+
+
+def textstat_reading_ease(text: Optional[str]) -> Optional[float]:
+    """
+    精确的 `textstat.flesch_reading_ease`，用于抽检音节近似的偏差；
+    配合 `parallel_map_column` 使用。
+    """
+    import textstat
+
+    return textstat.flesch_reading_ease(text) if text else None
@@ -0,0 +1,390 @@
+"""
+在线增量主题建模。
+
+legacy 03_content_semantics 在 1 万条样本上一次性拟合 BERTopic，无法覆盖全量
+与新增推文。这里采用 BERTopic 在线模式的同类组件，全部支持 `partial_fit`：
+- 降维: `IncrementalPCA`（替代 UMAP）
+- 聚类: `MiniBatchKMeans`（替代 HDBSCAN，主题编号在后续批次中保持稳定）
+- 词表: 按主题累计词频，可选衰减，超过上限时淘汰低频词；主题词由 c-TF-IDF 得出
+
+新推文只需 `assign`（降维 + 最近质心），无需重新拟合。
+
+`run_topic_stage` 对全量数据做两遍扫描：第一遍生成句向量并增量拟合，
+句向量以 float32 追加写入缓存文件；第二遍以内存映射读取缓存、用最终模型
+分配主题并累计词表与小时级主题趋势。内存占用只与批大小、主题数和词表上限有关。
+"""
+
+from __future__ import annotations
+
+import pickle
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Sequence
+
+import numpy as np
+import polars as pl
+
+from . import io
+from .instrumentation import instrumented
+
+
+TEXT_COLUMNS = ["pseudo_id", "createdAt", "text", "lang"]
+MODEL_FILE = "topic_model.pkl"
+EMBEDDING_CACHE = "topic_embeddings.f32"
+
+Embedder = Callable[[list[str]], np.ndarray]
+
+
+def default_text_filter(df: pl.DataFrame) -> pl.DataFrame:
+    """
+    与 legacy 03_content_semantics 相同的有效文本条件：非空、英文、长度 > 10。
+    """
+    return df.filter(
+        pl.col("text").is_not_null()
+        & (pl.col("lang") == "en")
+        & (pl.col("text").str.len_chars() > 10)
+    )
+
+
+def default_embedder() -> Embedder:
+    """
+    优先使用共享推理服务生成句向量，服务不可用时在进程内加载模型。
+    """
+    from ..inference import InferenceClient
+
+    client = InferenceClient()
+    if client.is_available():
+        return client.embed
+    from ..inference.models import ModelBackend
+
+    return ModelBackend().embed
+
+
+class OnlineTopicModel:
+    """
+    可增量拟合的主题模型。
+
+    参数
+    ----
+    n_topics:
+        主题数（MiniBatchKMeans 的簇数）。
+    n_components:
+        降维后的维度。
+    top_n_words:
+        每个主题保留的主题词数。
+    max_vocab:
+        词表上限，超过时淘汰累计词频最低的词。
+    decay:
+        每次更新词表前对已有词频乘以 (1 - decay)，用于跟随话题漂移；0 表示不衰减。
+    """
+
+    def __init__(
+        self,
+        n_topics: int = 30,
+        n_components: int = 10,
+        top_n_words: int = 10,
+        max_vocab: int = 50_000,
+        decay: float = 0.0,
+        seed: int = 42,
+    ) -> None:
+        from sklearn.cluster import MiniBatchKMeans
+        from sklearn.decomposition import IncrementalPCA
+        from sklearn.feature_extraction.text import CountVectorizer
+
+        self.n_topics = n_topics
+        self.n_components = n_components
+        self.top_n_words = top_n_words
+        self.max_vocab = max_vocab
+        self.decay = decay
+        self.reducer = IncrementalPCA(n_components=n_components)
+        self.clusterer = MiniBatchKMeans(n_clusters=n_topics, random_state=seed, n_init=3)
+        self.analyzer = CountVectorizer(stop_words="english", token_pattern=r"(?u)\b[a-zA-Z][a-zA-Z]+\b").build_analyzer()
+        self.vocab: dict[str, int] = {}
+        self.term_counts = np.zeros((n_topics, 0), dtype=np.float64)
+        self.doc_counts = np.zeros(n_topics, dtype=np.int64)
+        self.fitted = False
+        self._pending: list[np.ndarray] = []
+
+    # ------------------------------------------------------------------
+    # 增量拟合与分配
+    # ------------------------------------------------------------------
+
+    def partial_fit(self, embeddings: np.ndarray) -> "OnlineTopicModel":
+        """
+        用一批句向量更新降维与聚类。批量不足以初始化时先缓存，直到凑够。
+        """
+        self._pending.append(np.asarray(embeddings, dtype=np.float32))
+        batch = np.vstack(self._pending)
+        if batch.shape[0] < max(self.n_components, self.n_topics):
+            return self
+        self._pending = []
+        self.reducer.partial_fit(batch)
+        self.clusterer.partial_fit(self._reduce(batch))
+        self.fitted = True
+        return self
+
+    def _reduce(self, embeddings: np.ndarray) -> np.ndarray:
+        # 统一为 float64，避免 MiniBatchKMeans 在批次间遇到不同精度
+        return self.reducer.transform(np.asarray(embeddings, dtype=np.float32)).astype(np.float64, copy=False)
+
+    def flush(self) -> "OnlineTopicModel":
+        """
+        用缓存中不足一批的句向量完成拟合（数据总量小于初始化所需时使用）。
+
+        尚未拟合且样本数少于 `n_topics` / `n_components` 时，主题数与降维维度
+        下调为样本数；少于 2 条时无法拟合，抛出 ValueError。已拟合时，样本数
+        不足降维维度的残批只更新聚类。
+        """
+        if not self._pending:
+            return self
+        batch, self._pending = np.vstack(self._pending), []
+        if not self.fitted:
+            if batch.shape[0] < 2:
+                raise ValueError(f"主题模型至少需要 2 条句向量才能拟合，当前仅 {batch.shape[0]} 条")
+            self._shrink(n_topics=min(self.n_topics, batch.shape[0]), n_components=min(self.n_components, *batch.shape))
+        if batch.shape[0] >= self.n_components:
+            self.reducer.partial_fit(batch)
+        self.clusterer.partial_fit(self._reduce(batch))
+        self.fitted = True
+        return self
+
+    def _shrink(self, n_topics: int, n_components: int) -> None:
+        # 仅在尚未拟合时调用：词频矩阵为空，按新主题数重建即可
+        if n_topics != self.n_topics:
+            self.n_topics = n_topics
+            self.clusterer.set_params(n_clusters=n_topics)
+            self.term_counts = np.zeros((n_topics, 0), dtype=np.float64)
+            self.doc_counts = np.zeros(n_topics, dtype=np.int64)
+        if n_components != self.n_components:
+            self.n_components = n_components
+            self.reducer.set_params(n_components=n_components)
+
+    def transform(self, embeddings: np.ndarray) -> np.ndarray:
+        """
+        为句向量分配主题编号（不改变模型）。
+        """
+        if not self.fitted:
+            raise RuntimeError("主题模型尚未拟合，请先调用 partial_fit")
+        return self.clusterer.predict(self._reduce(embeddings))
+
+    def assign(self, texts: Sequence[str], embeddings: np.ndarray, learn: bool = False) -> np.ndarray:
+        """
+        为新推文分配主题并更新词表；`learn=True` 时同时用这批数据继续拟合。
+        """
+        if learn:
+            self.partial_fit(embeddings)
+        topics = self.transform(embeddings)
+        self.update_vocabulary(texts, topics)
+        return topics
+
+    # ------------------------------------------------------------------
+    # 词表与主题表示
+    # ------------------------------------------------------------------
+
+    def update_vocabulary(self, texts: Sequence[str], topics: np.ndarray) -> None:
+        """
+        按主题累计词频。新词追加到词表末尾，超出上限时淘汰低频词。
+        """
+        if self.decay:
+            self.term_counts *= 1.0 - self.decay
+        rows: list[int] = []
+        cols: list[int] = []
+        for text, topic in zip(texts, topics):
+            for token in self.analyzer(text or ""):
+                index = self.vocab.get(token)
+                if index is None:
+                    index = self.vocab[token] = len(self.vocab)
+                rows.append(int(topic))
+                cols.append(index)
+        if len(self.vocab) > self.term_counts.shape[1]:
+            grown = np.zeros((self.n_topics, max(len(self.vocab), 2 * self.term_counts.shape[1])))
+            grown[:, : self.term_counts.shape[1]] = self.term_counts
+            self.term_counts = grown
+        np.add.at(self.term_counts, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)), 1.0)
+        np.add.at(self.doc_counts, np.asarray(topics, dtype=np.intp), 1)
+        if len(self.vocab) > self.max_vocab:
+            self._prune_vocabulary()
+
+    def _prune_vocabulary(self) -> None:
+        size = len(self.vocab)
+        totals = self.term_counts[:, :size].sum(axis=0)
+        keep = np.sort(np.argsort(totals)[::-1][: self.max_vocab])
+        remap = {old: new for new, old in enumerate(keep)}
+        self.vocab = {term: remap[i] for term, i in self.vocab.items() if i in remap}
+        self.term_counts = self.term_counts[:, keep].copy()
+
+    def topic_words(self, top_n: Optional[int] = None) -> dict[int, list[tuple[str, float]]]:
+        """
+        c-TF-IDF 主题词：tf 按主题归一化，idf = log(1 + 平均每主题词数 / 词的总频次)。
+        """
+        top_n = top_n or self.top_n_words
+        size = len(self.vocab)
+        counts = self.term_counts[:, :size]
+        if size == 0:
+            return {t: [] for t in range(self.n_topics)}
+        terms = np.empty(size, dtype=object)
+        for term, i in self.vocab.items():
+            terms[i] = term
+        tf = counts / np.maximum(counts.sum(axis=1, keepdims=True), 1e-12)
+        idf = np.log1p(counts.sum() / self.n_topics / np.maximum(counts.sum(axis=0), 1e-12))
+        scores = tf * idf
+        out = {}
+        for topic in range(self.n_topics):
+            best = np.argsort(scores[topic])[::-1][:top_n]
+            out[topic] = [(terms[i], float(scores[topic, i])) for i in best if scores[topic, i] > 0]
+        return out
+
+    def topic_info(self) -> pl.DataFrame:
+        """
+        主题概览：编号、累计文档数、主题词与名称（前 4 个主题词）。
+        """
+        words = self.topic_words()
+        return pl.DataFrame(
+            {
+                "topic": list(range(self.n_topics)),
+                "count": self.doc_counts.tolist(),
+                "words": [[w for w, _ in words[t]] for t in range(self.n_topics)],
+                "name": [f"{t}_" + "_".join(w for w, _ in words[t][:4]) for t in range(self.n_topics)],
+            },
+            schema_overrides={"words": pl.List(pl.String)},
+        ).sort("count", descending=True)
+
+    # ------------------------------------------------------------------
+    # 持久化
+    # ------------------------------------------------------------------
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state.pop("analyzer")  # CountVectorizer 的分析器是闭包，不可序列化
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        from sklearn.feature_extraction.text import CountVectorizer
+
+        self.__dict__.update(state)
+        self.analyzer = CountVectorizer(stop_words="english", token_pattern=r"(?u)\b[a-zA-Z][a-zA-Z]+\b").build_analyzer()
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as fh:
+            pickle.dump(self, fh)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "OnlineTopicModel":
+        with open(path, "rb") as fh:
+            return pickle.load(fh)
+
+
+@dataclass
+class TopicStageResult:
+    """
+    `run_topic_stage` 的输出路径与规模。
+    """
+
+    assignments: Path
+    topic_info: Path
+    trends: Path
+    model: Path
+    documents: int
+    batches: int
+    info: pl.DataFrame = field(repr=False, default_factory=pl.DataFrame)
+
+
+def _text_batches(source: Path, batch_size: int, text_filter) -> Iterator[pl.DataFrame]:
+    for batch in io.iter_batches(source, batch_size=batch_size, columns=TEXT_COLUMNS):
+        batch = text_filter(batch)
+        if batch.height:
+            yield batch
+
+
+@instrumented("topics.run_topic_stage")
+def run_topic_stage(
+    source: Path,
+    output_dir: Path,
+    embed: Optional[Embedder] = None,
+    model: Optional[OnlineTopicModel] = None,
+    batch_size: int = 4096,
+    text_filter: Callable[[pl.DataFrame], pl.DataFrame] = default_text_filter,
+) -> TopicStageResult:
+    """
+    对 `source`（如 tweets_enriched.parquet）全量做在线主题建模。
+
+    输出（位于 `output_dir`）：
+    - topic_assignments.parquet: pseudo_id, hour, topic
+    - topic_info.parquet: 主题编号、文档数、主题词
+    - topic_trends_hourly.parquet: hour, topic, tweet_count, share
+    - topic_model.pkl: 可继续 `assign` / `partial_fit` 的模型
+    """
+    import pyarrow.parquet as pq
+
+    embed = embed or default_embedder()
+    model = model or OnlineTopicModel()
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    cache_path = output_dir / EMBEDDING_CACHE
+
+    # 第一遍：生成句向量、增量拟合，句向量追加写入缓存
+    dim, documents, batches = 0, 0, 0
+    with open(cache_path, "wb") as cache:
+        for batch in _text_batches(source, batch_size, text_filter):
+            vectors = np.ascontiguousarray(embed(batch["text"].to_list()), dtype=np.float32)
+            dim = vectors.shape[1]
+            model.partial_fit(vectors)
+            cache.write(vectors.tobytes())
+            documents += batch.height
+            batches += 1
+    model.flush()
+
+    # 第二遍：用最终模型分配主题，累计词表与小时级趋势
+    assignments_path = output_dir / "topic_assignments.parquet"
+    tmp_path = assignments_path.with_suffix(".tmp.parquet")
+    embeddings = np.memmap(cache_path, dtype=np.float32, mode="r").reshape(-1, dim) if documents else None
+    trends: dict[tuple, int] = {}
+    writer = None
+    offset = 0
+    try:
+        for batch in _text_batches(source, batch_size, text_filter):
+            vectors = embeddings[offset : offset + batch.height]
+            offset += batch.height
+            topics = model.transform(vectors)
+            model.update_vocabulary(batch["text"].to_list(), topics)
+            assigned = batch.select(
+                "pseudo_id",
+                pl.col("createdAt").dt.truncate("1h").alias("hour"),
+                pl.Series("topic", topics, dtype=pl.Int32),
+            )
+            for hour, topic, count in assigned.group_by("hour", "topic").len().iter_rows():
+                trends[(hour, topic)] = trends.get((hour, topic), 0) + count
+            table = assigned.to_arrow()
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, table.schema, compression="zstd")
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+        del embeddings
+        cache_path.unlink(missing_ok=True)
+    if writer is not None:
+        tmp_path.replace(assignments_path)
+        io.record_manifest_entry(assignments_path)
+
+    info = model.topic_info()
+    trend_df = pl.DataFrame(
+        {
+            "hour": [h for h, _ in trends],
+            "topic": pl.Series([t for _, t in trends], dtype=pl.Int32),
+            "tweet_count": pl.Series(list(trends.values()), dtype=pl.Int64),
+        }
+    ).with_columns(
+        (pl.col("tweet_count") / pl.col("tweet_count").sum().over("hour")).alias("share")
+    ).sort("hour", "topic")
+
+    info_path = output_dir / "topic_info.parquet"
+    trends_path = output_dir / "topic_trends_hourly.parquet"
+    io.materialize_parquet(info.lazy(), info_path)
+    io.materialize_parquet(trend_df.lazy(), trends_path, sort_by="hour")
+    model_path = output_dir / MODEL_FILE
+    model.save(model_path)
+    return TopicStageResult(assignments_path, info_path, trends_path, model_path, documents, batches, info)
@@ -0,0 +1,14 @@
+"""
+本地推理服务
+
+Notebook 与 Reflex 后端共享的常驻模型服务，避免每个 kernel 各自加载模型:
+- batching: 动态微批合并（批大小 / 等待时延双上限）
+- lexicon: 情感标签与叙事原型/关键词（Notebook 与服务共用）
+- models: 情感分类、句向量与叙事打分
+- server: localhost HTTP 服务 (`python -m src.packages.inference.server`)
+- client: 调用端封装
+"""
+
+from .client import InferenceClient
+
+__all__ = ["InferenceClient"]
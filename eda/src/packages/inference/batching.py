@@ -0,0 +1,105 @@
+"""
+动态微批（dynamic micro-batching）。
+
+多个并发请求提交到同一个 `MicroBatcher`，由单个工作线程合并为一批调用模型：
+凑满 `max_batch_size` 条或首条请求等待超过 `max_latency_ms` 即刻执行，
+在吞吐与单请求时延之间取平衡。
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable, Generic, Sequence, TypeVar
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass
+class _Request(Generic[T, R]):
+    items: Sequence[T]
+    future: "Future[list[R]]"
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    将并发提交的小请求合并为批调用 `fn`。
+
+    参数
+    ----
+    fn:
+        批处理函数，输入 N 条返回 N 条结果，顺序一一对应。
+    max_batch_size:
+        单次调用 `fn` 的最大条数；单个请求超过上限时会被切片执行。
+    max_latency_ms:
+        首条请求入队后最多等待多久再凑批。
+    """
+
+    def __init__(self, fn: Callable[[list[T]], list[R]], max_batch_size: int = 64, max_latency_ms: float = 20.0) -> None:
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency_ms / 1000
+        self._queue: "queue.Queue[_Request[T, R] | None]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, items: Sequence[T]) -> "Future[list[R]]":
+        future: "Future[list[R]]" = Future()
+        if not items:
+            future.set_result([])
+        else:
+            self._queue.put(_Request(items, future))
+        return future
+
+    def __call__(self, items: Sequence[T]) -> list[R]:
+        return self.submit(items).result()
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self, first: _Request[T, R]) -> list[_Request[T, R]]:
+        batch, size = [first], len(first.items)
+        deadline = time.monotonic() + self.max_latency
+        while size < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if request is None:
+                self._queue.put(None)  # 留给主循环处理关闭
+                break
+            batch.append(request)
+            size += len(request.items)
+        return batch
+
+    def _execute(self, batch: list[_Request[T, R]]) -> None:
+        items = [item for request in batch for item in request.items]
+        try:
+            results: list[R] = []
+            for start in range(0, len(items), self.max_batch_size):
+                results.extend(self.fn(items[start : start + self.max_batch_size]))
+        except Exception as exc:
+            for request in batch:
+                request.future.set_exception(exc)
+            return
+
+        offset = 0
+        for request in batch:
+            request.future.set_result(results[offset : offset + len(request.items)])
+            offset += len(request.items)
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            self._execute(self._collect(first))
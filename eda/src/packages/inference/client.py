@@ -0,0 +1,92 @@
+"""
+推理服务客户端，Notebook 与 Reflex 后端通用。
+
+    from src.packages.inference import InferenceClient
+
+    client = InferenceClient()
+    scores = client.emotion(df["text"].to_list())
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import urllib.error
+import urllib.request
+from typing import Any, Sequence
+
+import numpy as np
+
+
+DEFAULT_URL = os.environ.get("INFERENCE_URL", "http://127.0.0.1:8765")
+
+
+class InferenceClient:
+    """
+    HTTP 客户端。大列表按 `request_size` 切分为多个请求，服务端会再与
+    其他调用方的请求合并成批。
+    """
+
+    def __init__(self, url: str = DEFAULT_URL, timeout: float = 120.0, request_size: int = 1024) -> None:
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.request_size = request_size
+
+    def _request(self, path: str, payload: dict[str, Any] | None = None) -> dict[str, Any]:
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        request = urllib.request.Request(
+            f"{self.url}{path}",
+            data=data,
+            headers={"Content-Type": "application/json"},
+            method="POST" if data is not None else "GET",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as exc:
+            detail = exc.read().decode("utf-8", errors="replace")
+            raise RuntimeError(f"推理服务返回 {exc.code}: {detail}") from exc
+
+    def _chunks(self, texts: Sequence[str]):
+        for start in range(0, len(texts), self.request_size):
+            yield list(texts[start : start + self.request_size])
+
+    def health(self) -> dict[str, Any]:
+        return self._request("/health")
+
+    def is_available(self) -> bool:
+        try:
+            return self.health().get("status") == "ok"
+        except (OSError, RuntimeError):
+            return False
+
+    def emotion(self, texts: Sequence[str]) -> list[dict[str, float]]:
+        """
+        每条文本 6 类情感概率。
+        """
+        out: list[dict[str, float]] = []
+        for chunk in self._chunks(texts):
+            out.extend(self._request("/emotion", {"texts": chunk})["scores"])
+        return out
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        (N, D) float32 句向量矩阵。
+        """
+        parts = [
+            np.asarray(self._request("/embed", {"texts": chunk})["embeddings"], dtype=np.float32)
+            for chunk in self._chunks(texts)
+        ]
+        return np.vstack(parts) if parts else np.zeros((0, 0), dtype=np.float32)
+
+    def narrative(self, texts: Sequence[str]) -> tuple[list[dict[str, float]], list[tuple[str, float]]]:
+        """
+        返回 (各叙事分数, 主导叙事及分数)。
+        """
+        scores: list[dict[str, float]] = []
+        primary: list[tuple[str, float]] = []
+        for chunk in self._chunks(texts):
+            result = self._request("/narrative", {"texts": chunk})
+            scores.extend(result["scores"])
+            primary.extend((name, score) for name, score in result["primary"])
+        return scores, primary
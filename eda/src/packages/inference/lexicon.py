@@ -0,0 +1,84 @@
+"""
+情感标签与叙事框架词表。
+
+content_research/01_content_semantics 与推理服务共用的唯一来源；
+不依赖任何模型库，可在未安装 torch 的环境中导入。
+"""
+
+from __future__ import annotations
+
+
+EMOTION_LABELS = ["sadness", "joy", "love", "anger", "fear", "surprise"]
+
+NARRATIVE_PROTOTYPES: dict[str, list[str]] = {
+    "political_violence": [
+        "This is a tragic political assassination and act of violence",
+        "Charlie Kirk was a victim of political violence and murder",
+        "The shooting was a terrible attack on a political figure",
+        "This assassination is an act of terror against conservatives",
+    ],
+    "consequences": [
+        "His hateful rhetoric had dangerous consequences",
+        "This is the result of divisive and toxic speech",
+        "He deserves blame for spreading hate and division",
+        "His inflammatory words caused this violence",
+    ],
+    "polarization": [
+        "America is deeply divided and polarized",
+        "This shows our country is on the brink of civil war",
+        "We treat each other as enemies instead of fellow citizens",
+        "Political tribalism is tearing our nation apart",
+    ],
+    "free_speech": [
+        "This is an attack on free speech and open debate",
+        "They are trying to silence conservative voices",
+        "We must defend the right to express political views",
+        "Censorship and suppression of speech led to this",
+    ],
+    "conspiracy": [
+        "This was a false flag operation and setup",
+        "The deep state planned this assassination",
+        "This is a psyop to manipulate public opinion",
+        "The official story is fake and a coverup",
+    ],
+    "memorial": [
+        "We honor and remember Charlie Kirk's legacy",
+        "His impact on conservative youth will not be forgotten",
+        "Rest in peace, he made a difference in politics",
+        "We pay tribute to his memory and contributions",
+    ],
+}
+
+NARRATIVE_KEYWORDS: dict[str, list[str]] = {
+    "political_violence": [
+        r"\bvictim\b", r"\btragedy\b", r"\bassassinat\w*\b", r"\bviolence\b",
+        r"\bmurder\w*\b", r"\bkill\w*\b", r"\bshot\b", r"\bshooting\b",
+        r"\bterror\w*\b", r"\bgunman\b", r"\battack\w*\b",
+    ],
+    "consequences": [
+        r"\brhetoric\b", r"\bconsequences\b", r"\bhate speech\b", r"\bdivisive\b",
+        r"\bresponsib\w*\b", r"\bblame\b", r"\bcaused\b", r"\bdeserve\w*\b",
+        r"\bkarma\b", r"\breap\w*\b",
+    ],
+    "polarization": [
+        r"\bdivided\b", r"\bpolari\w*\b", r"\bcivil war\b", r"\benemy\b",
+        r"\bus vs them\b", r"\btear\w* apart\b", r"\bpartisan\b",
+    ],
+    "free_speech": [
+        r"\bfree speech\b", r"\bsilenc\w*\b", r"\bcensor\w*\b", r"\bdebate\b",
+        r"\bfirst amendment\b", r"\bvoice\b", r"\bspeak\w* out\b",
+    ],
+    "conspiracy": [
+        r"\bfalse flag\b", r"\bsetup\b", r"\bdeep state\b", r"\bpsyop\b",
+        r"\bcoverup\b", r"\bcover-up\b", r"\bplanned\b", r"\binside job\b",
+        r"\bfake\b", r"\bhoax\b",
+    ],
+    "memorial": [
+        r"\blegacy\b", r"\bremember\b", r"\bhonor\b", r"\bimpact\b",
+        r"\bRIP\b", r"\brest in peace\b", r"\bmemory\b", r"\bmemorial\b",
+        r"\btribute\b", r"\bmiss\w*\b",
+    ],
+}
+
+NARRATIVE_THRESHOLD = 0.3
+KEYWORD_BOOST = 0.05
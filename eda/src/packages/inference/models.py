@@ -0,0 +1,131 @@
+"""
+推理服务使用的模型与打分逻辑。
+
+模型与 content_research/01_content_semantics 保持一致：
+- 情感: j-hartmann/emotion-english-distilroberta-base（6 类情感概率）
+- 句向量: all-MiniLM-L6-v2
+- 叙事: 句向量与各叙事原型均值向量的余弦相似度 + 关键词加成
+
+情感标签与叙事原型/关键词定义在 `lexicon`。
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from typing import Optional
+
+import numpy as np
+
+from .lexicon import (
+    EMOTION_LABELS,
+    KEYWORD_BOOST,
+    NARRATIVE_KEYWORDS,
+    NARRATIVE_PROTOTYPES,
+    NARRATIVE_THRESHOLD,
+)
+
+
+EMOTION_MODEL = "j-hartmann/emotion-english-distilroberta-base"
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+MAX_TEXT_CHARS = 512
+
+
+_COMPILED_KEYWORDS = {
+    narrative: [re.compile(p) for p in patterns] for narrative, patterns in NARRATIVE_KEYWORDS.items()
+}
+
+
+class ModelBackend:
+    """
+    持有模型实例的后端。模型在首次使用时加载（或由 `warmup` 预加载），
+    同一进程内只加载一次。
+    """
+
+    def __init__(self, device: Optional[int] = None) -> None:
+        self.device = device
+        self._emotion = None
+        self._embedder = None
+        self._narrative_matrix: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    def warmup(self) -> None:
+        self._emotion_pipeline()
+        self._embedding_model()
+        self._narrative_centroids()
+
+    def _emotion_pipeline(self):
+        with self._lock:
+            if self._emotion is None:
+                import torch
+                from transformers import pipeline
+
+                device = self.device if self.device is not None else (0 if torch.cuda.is_available() else -1)
+                self._emotion = pipeline("text-classification", model=EMOTION_MODEL, device=device, top_k=None)
+            return self._emotion
+
+    def _embedding_model(self):
+        with self._lock:
+            if self._embedder is None:
+                from sentence_transformers import SentenceTransformer
+
+                self._embedder = SentenceTransformer(EMBEDDING_MODEL)
+            return self._embedder
+
+    def _narrative_centroids(self) -> np.ndarray:
+        if self._narrative_matrix is None:
+            centroids = [self.embed(texts).mean(axis=0) for texts in NARRATIVE_PROTOTYPES.values()]
+            matrix = np.vstack(centroids)
+            self._narrative_matrix = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+        return self._narrative_matrix
+
+    def emotion(self, texts: list[str]) -> list[dict[str, float]]:
+        """
+        返回每条文本 6 类情感的概率。
+        """
+        results = self._emotion_pipeline()([t[:MAX_TEXT_CHARS] for t in texts], batch_size=len(texts))
+        return [{item["label"]: float(item["score"]) for item in result} for result in results]
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """
+        返回 (N, D) 的 float32 句向量矩阵。
+        """
+        model = self._embedding_model()
+        return np.asarray(model.encode(texts, batch_size=len(texts), show_progress_bar=False), dtype=np.float32)
+
+    def narrative_scores(self, texts: list[str], embeddings: np.ndarray) -> list[dict[str, float]]:
+        """
+        基于已计算的句向量为每条文本打出各叙事分数。
+        """
+        return narrative_scores(texts, embeddings, self._narrative_centroids())
+
+
+def keyword_hits(text: str) -> dict[str, int]:
+    lowered = text.lower()
+    return {
+        narrative: sum(1 for pattern in patterns if pattern.search(lowered))
+        for narrative, patterns in _COMPILED_KEYWORDS.items()
+    }
+
+
+def narrative_scores(texts: list[str], embeddings: np.ndarray, centroids: np.ndarray) -> list[dict[str, float]]:
+    """
+    叙事分数 = 与原型均值向量的余弦相似度 + 每个命中关键词 `KEYWORD_BOOST`。
+    相似度以一次矩阵乘法完成。
+    """
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    similarity = (embeddings / np.where(norms == 0, 1, norms)) @ centroids.T
+    names = list(NARRATIVE_PROTOTYPES)
+    out = []
+    for text, row in zip(texts, similarity):
+        hits = keyword_hits(text)
+        out.append({name: float(row[i]) + hits[name] * KEYWORD_BOOST for i, name in enumerate(names)})
+    return out
+
+
+def primary_narrative(scores: dict[str, float]) -> tuple[str, float]:
+    """
+    取最高分叙事，低于阈值时记为 `none`。
+    """
+    name = max(scores, key=scores.get)
+    return (name, scores[name]) if scores[name] > NARRATIVE_THRESHOLD else ("none", 0.0)
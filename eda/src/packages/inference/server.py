@@ -0,0 +1,177 @@
+"""
+本地推理 HTTP 服务。
+
+启动（默认仅监听 127.0.0.1）：
+
+    python -m src.packages.inference.server --port 8765
+
+接口（均为 JSON，请求体 `{"texts": [...]}`）：
+- POST /emotion   → `{"scores": [{label: prob, ...}, ...]}`
+- POST /embed     → `{"embeddings": [[...], ...], "dim": D}`
+- POST /narrative → `{"scores": [...], "primary": [[name, score], ...]}`
+- GET  /health    → 服务状态与批处理配置
+
+每个模型由一个 `MicroBatcher` 独占调用，并发请求在其中合并成批；
+/narrative 复用句向量的批处理队列。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+
+import numpy as np
+
+from .batching import MicroBatcher
+from .models import ModelBackend, primary_narrative
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = int(os.environ.get("INFERENCE_PORT", "8765"))
+MAX_TEXTS_PER_REQUEST = 4096
+
+
+@dataclass
+class BatchingConfig:
+    max_batch_size: int = 64
+    max_latency_ms: float = 20.0
+
+
+class InferenceService:
+    """
+    组合模型后端与批处理队列，与传输层无关，便于在进程内直接复用。
+    """
+
+    def __init__(self, backend: ModelBackend, config: Optional[BatchingConfig] = None) -> None:
+        self.backend = backend
+        self.config = config or BatchingConfig()
+        self.emotion_batcher: MicroBatcher[str, dict[str, float]] = MicroBatcher(
+            backend.emotion, self.config.max_batch_size, self.config.max_latency_ms
+        )
+        self.embed_batcher: MicroBatcher[str, np.ndarray] = MicroBatcher(
+            lambda texts: list(backend.embed(texts)), self.config.max_batch_size, self.config.max_latency_ms
+        )
+
+    def emotion(self, texts: list[str]) -> dict[str, Any]:
+        return {"scores": self.emotion_batcher(texts)}
+
+    def embed(self, texts: list[str]) -> dict[str, Any]:
+        vectors = self.embed_batcher(texts)
+        return {
+            "embeddings": [v.tolist() for v in vectors],
+            "dim": int(vectors[0].shape[0]) if vectors else 0,
+        }
+
+    def narrative(self, texts: list[str]) -> dict[str, Any]:
+        vectors = self.embed_batcher(texts)
+        matrix = np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+        scores = self.backend.narrative_scores(texts, matrix) if texts else []
+        return {"scores": scores, "primary": [list(primary_narrative(s)) for s in scores]}
+
+    def health(self) -> dict[str, Any]:
+        return {
+            "status": "ok",
+            "max_batch_size": self.config.max_batch_size,
+            "max_latency_ms": self.config.max_latency_ms,
+        }
+
+    def close(self) -> None:
+        self.emotion_batcher.close()
+        self.embed_batcher.close()
+
+
+def _make_handler(service: InferenceService) -> type[BaseHTTPRequestHandler]:
+    routes = {
+        "/emotion": service.emotion,
+        "/embed": service.embed,
+        "/narrative": service.narrative,
+    }
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status: int, payload: dict[str, Any]) -> None:
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            if self.path == "/health":
+                self._send(200, service.health())
+            else:
+                self._send(404, {"error": f"unknown path {self.path}"})
+
+        def do_POST(self) -> None:
+            route = routes.get(self.path)
+            if route is None:
+                self._send(404, {"error": f"unknown path {self.path}"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", "0"))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                texts = payload.get("texts")
+                if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+                    raise ValueError("`texts` 必须是字符串列表")
+                if len(texts) > MAX_TEXTS_PER_REQUEST:
+                    raise ValueError(f"单次请求最多 {MAX_TEXTS_PER_REQUEST} 条文本")
+            except ValueError as exc:
+                self._send(400, {"error": str(exc)})
+                return
+            try:
+                self._send(200, route(texts))
+            except Exception as exc:
+                self._send(500, {"error": f"{type(exc).__name__}: {exc}"})
+
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+            pass
+
+    return Handler
+
+
+def create_server(
+    service: InferenceService,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+) -> ThreadingHTTPServer:
+    """
+    创建（未启动的）HTTP 服务；调用方负责 `serve_forever()`。
+    """
+    server = ThreadingHTTPServer((host, port), _make_handler(service))
+    server.daemon_threads = True
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="本地推理服务（情感 / 句向量 / 叙事）")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-latency-ms", type=float, default=20.0)
+    parser.add_argument("--lazy", action="store_true", help="首个请求时再加载模型")
+    args = parser.parse_args()
+
+    backend = ModelBackend()
+    if not args.lazy:
+        print("🤖 加载模型...")
+        backend.warmup()
+    service = InferenceService(backend, BatchingConfig(args.max_batch_size, args.max_latency_ms))
+    server = create_server(service, args.host, args.port)
+    print(f"✅ 推理服务已启动: http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()